@@ -0,0 +1,147 @@
+"""
+Cliente HTTP do Asaas reaproveitado entre invocações quentes da Lambda:
+  - Session com pool de conexões keep-alive (sem novo handshake TLS por chamada)
+  - timeouts explícitos de conexão e leitura, cortados pelo prazo da invocação
+    (prazo=) para a falha chegar ao circuit breaker antes do timeout da Lambda
+  - retries com backoff e jitter para chamadas idempotentes
+  - circuit breaker que falha rápido enquanto o Asaas está degradado
+"""
+import logging
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metricas
+
+logger = logging.getLogger()
+
+ASAAS_API_KEY  = os.environ.get('ASAAS')
+ASAAS_ENDPOINT = os.environ.get('ASAAS_ENDPOINT', "https://www.asaas.com/api/v3")
+
+# Pior caso sem prazo: 2 x (2s + 5s) + backoff < 15s; com prazo, cada tentativa só usa o tempo que resta
+ASAAS_CONNECT_TIMEOUT = float(os.environ.get('ASAAS_CONNECT_TIMEOUT', '2'))
+ASAAS_READ_TIMEOUT    = float(os.environ.get('ASAAS_READ_TIMEOUT', '5'))
+ASAAS_MAX_TENTATIVAS  = int(os.environ.get('ASAAS_MAX_TENTATIVAS', '2'))
+ASAAS_TENTATIVA_MIN_SEGUNDOS = 1.0  # com menos que isso até o prazo, não começa outra tentativa
+
+# Circuit breaker: abre após N falhas seguidas e deixa passar uma chamada de teste depois do intervalo
+CIRCUITO_LIMITE_FALHAS  = int(os.environ.get('ASAAS_CIRCUITO_LIMITE_FALHAS', '5'))
+CIRCUITO_ABERTO_SEGUNDOS = float(os.environ.get('ASAAS_CIRCUITO_ABERTO_SEGUNDOS', '30'))
+
+METODOS_IDEMPOTENTES = frozenset(("GET", "HEAD", "PUT", "DELETE", "OPTIONS"))
+STATUS_RETENTAVEIS   = frozenset((429, 500, 502, 503, 504))
+
+_sessao = None
+_circuito = {"falhas": 0, "aberto_ate": 0.0}
+
+
+class AsaasIndisponivel(Exception):
+    """Asaas fora do ar, lento demais ou com circuito aberto (a rota responde 503)."""
+
+
+def _get_sessao():
+    global _sessao
+    if _sessao is None:
+        sessao = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10, max_retries=0)
+        sessao.mount("https://", adapter)
+        sessao.mount("http://", adapter)
+        sessao.headers.update({"Content-Type": "application/json", "access_token": ASAAS_API_KEY or ""})
+        _sessao = sessao
+    return _sessao
+
+
+def circuito_aberto():
+    return _circuito["aberto_ate"] > time.monotonic()
+
+
+def _registrar_falha():
+    _circuito["falhas"] += 1
+    if _circuito["falhas"] >= CIRCUITO_LIMITE_FALHAS:
+        _circuito["aberto_ate"] = time.monotonic() + CIRCUITO_ABERTO_SEGUNDOS
+        logger.error("Circuito do Asaas aberto por %.0fs após %d falhas", CIRCUITO_ABERTO_SEGUNDOS, _circuito["falhas"])
+
+
+def _registrar_sucesso():
+    _circuito["falhas"] = 0
+    _circuito["aberto_ate"] = 0.0
+
+
+def _espera_backoff(tentativa):
+    return min(2.0, 0.2 * (2 ** tentativa)) * random.uniform(0.5, 1.0)
+
+
+def _timeouts(prazo):
+    """(conexão, leitura) da próxima tentativa, ou None se não há mais tempo até o prazo."""
+    if prazo is None:
+        return ASAAS_CONNECT_TIMEOUT, ASAAS_READ_TIMEOUT
+    restante = prazo - time.monotonic()
+    if restante < ASAAS_TENTATIVA_MIN_SEGUNDOS:
+        return None
+    conexao = min(ASAAS_CONNECT_TIMEOUT, restante / 2)
+    return conexao, min(ASAAS_READ_TIMEOUT, restante - conexao)
+
+
+def requisitar(metodo, caminho, prazo=None, **kwargs):
+    """
+    Faz a chamada ao Asaas e devolve o requests.Response já validado.
+    prazo: instante (time.monotonic()) até o qual a chamada pode durar, com
+    retries e backoff; normalmente o fim da invocação menos uma margem.
+    Levanta AsaasIndisponivel para circuito aberto, prazo esgotado, timeouts,
+    erros de conexão e 5xx/429 persistentes; erros 4xx seguem como requests.HTTPError.
+    """
+    if circuito_aberto():
+        raise AsaasIndisponivel("Circuito do Asaas aberto")
+
+    metodo = metodo.upper()
+    idempotente = metodo in METODOS_IDEMPOTENTES
+    url = f"{ASAAS_ENDPOINT}{caminho}"
+
+    ultimo_erro = None
+    for tentativa in range(ASAAS_MAX_TENTATIVAS):
+        timeout = _timeouts(prazo)
+        if timeout is None:
+            break
+        try:
+            with metricas.span("Asaas", f"{metodo} {caminho}"):
+                resp = _get_sessao().request(metodo, url, timeout=timeout, **kwargs)
+        except requests.ConnectTimeout as e:
+            # a requisição nem saiu: pode repetir mesmo não sendo idempotente
+            ultimo_erro, retentavel = e, True
+        except (requests.ConnectionError, requests.Timeout) as e:
+            ultimo_erro, retentavel = e, idempotente
+        else:
+            if resp.status_code not in STATUS_RETENTAVEIS:
+                _registrar_sucesso()
+                if resp.status_code >= 400:
+                    logger.error("Asaas error status=%s body=%s", resp.status_code, resp.text)
+                resp.raise_for_status()
+                return resp
+            logger.warning("Asaas %s %s status=%s body=%s", metodo, caminho, resp.status_code, resp.text)
+            ultimo_erro = requests.HTTPError(f"Asaas status={resp.status_code}", response=resp)
+            retentavel = idempotente
+
+        if not retentavel or tentativa == ASAAS_MAX_TENTATIVAS - 1:
+            break
+        logger.warning("Falha na chamada Asaas %s %s (tentativa %d): %s", metodo, caminho, tentativa + 1, ultimo_erro)
+        espera = _espera_backoff(tentativa)
+        if prazo is not None and prazo - time.monotonic() - espera < ASAAS_TENTATIVA_MIN_SEGUNDOS:
+            break
+        time.sleep(espera)
+
+    if ultimo_erro is None:
+        # o prazo acabou antes da primeira tentativa: não conta como falha do Asaas
+        raise AsaasIndisponivel("Sem tempo restante na invocação para chamar o Asaas")
+    _registrar_falha()
+    raise AsaasIndisponivel(str(ultimo_erro))
+
+
+def post(caminho, payload, prazo=None):
+    return requisitar("POST", caminho, prazo=prazo, json=payload).json()
+
+
+def get(caminho, params=None, prazo=None):
+    return requisitar("GET", caminho, prazo=prazo, params=params).json()
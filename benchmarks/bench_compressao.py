@@ -0,0 +1,159 @@
+"""
+Benchmark do trade-off banda x latência da compressão das respostas (_hook_compressao).
+
+Monta payloads representativos (catálogo de cursos com descrições longas,
+listagens admin de inscrições e o pagamento-info) e, para cada codificação e
+nível, mede o tempo de compressão na Lambda, o tamanho entregue ao cliente, o
+tamanho em base64 dentro da resposta da Lambda e o tempo estimado até o último
+byte em alguns perfis de rede (compressão + transferência).
+
+Uso (fora da Lambda; precisa de boto3; brotli é opcional):
+    python benchmarks/bench_compressao.py --repeticoes 50 --saida compressao.json
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("METRICAS_EMF", "0")
+os.environ.setdefault("LOG_NIVEL", "ERROR")  # logs JSON vão para o stdout, junto com o resultado
+
+# perfis de rede do cliente (Mbit/s)
+REDES = {"3g": 1.6, "4g": 12.0, "banda_larga": 50.0}
+
+DESCRICAO = (
+    "Curso presencial com aulas práticas de programação, projetos reais, mentoria "
+    "individual e acompanhamento de carreira. Conteúdo: lógica, Python, JavaScript, "
+    "bancos de dados, APIs REST, front-end com React e deploy na nuvem. "
+)
+
+
+def _cursos(n):
+    return [{
+        "id": f"curso-{i}",
+        "title": f"Curso Presencial Programação Turma {i}",
+        "price": "R$1.200,00",
+        "obsPrice": "em até 12x no cartão",
+        "modalidade": "Presencial",
+        "horario": "Sábados, 9h às 12h",
+        "ativo": i % 5 != 0,
+        "descricao": DESCRICAO * 4,
+        "ementa": [f"Módulo {m}: {DESCRICAO[:80]}" for m in range(12)]
+    } for i in range(n)]
+
+
+def _inscricoes(n):
+    return {"items": [{
+        "id": str(uuid.uuid4()),
+        "cpf": f"{i:011d}",
+        "nomeCompleto": f"Aluno Exemplo {i}",
+        "email": f"aluno{i}@exemplo.com",
+        "celular": "(11) 99999-0000",
+        "curso": "Curso Presencial Programação Fullstack",
+        "valorCurso": "1050.00",
+        "valorOriginal": "1200.00",
+        "cupom": "PROMO10" if i % 3 == 0 else "",
+        "endereco": "Rua das Flores, 123 - Centro",
+        "cidade": "São Paulo",
+        "dataInscricao": "2025-01-15T10:00:00-03:00",
+        "isAssinatura": i % 4 == 0
+    } for i in range(n)], "nextCursor": base64.urlsafe_b64encode(b'{"id": "x"}').decode()}
+
+
+def _pagamento_info():
+    return {
+        "inscricaoId": str(uuid.uuid4()), "curso": "Curso Presencial Programação Fullstack",
+        "base": 1200.0, "baseFmt": "R$ 1.200,00",
+        "pix": {"valor": 1050.0, "valorFmt": "R$ 1.050,00", "descontoExtraAplicado": 150.0,
+                "mensagem": "PIX com DESCONTO EXTRA de R$ 150,00 exclusivo para Fullstack."},
+        "cartao": {"total": 1296.0, "parcelas": 12, "parcelaFmt": "R$ 108,00"},
+        "assinatura": {"solicitada": False, "solicitadaEm": None}
+    }
+
+
+PAYLOADS = {
+    "pagamento-info": _pagamento_info,
+    "cursos-10": lambda: _cursos(10),
+    "cursos-50": lambda: _cursos(50),
+    "inscricoes-50": lambda: _inscricoes(50),
+    "inscricoes-500": lambda: _inscricoes(500),
+}
+
+
+def _codificacoes(handler):
+    opcoes = [("identity", None)] + [("gzip", n) for n in (1, 6, 9)]
+    if handler.brotli is not None:
+        opcoes += [("br", q) for q in (4, 5, 11)]
+    return opcoes
+
+
+def _comprimir(handler, dados, codificacao, nivel):
+    if codificacao == "gzip":
+        return gzip.compress(dados, compresslevel=nivel, mtime=0)
+    if codificacao == "br":
+        return handler.brotli.compress(dados, quality=nivel)
+    return dados
+
+
+def medir(repeticoes):
+    import handler
+    resultados = []
+    for nome, gerar in PAYLOADS.items():
+        dados = json.dumps(gerar()).encode("utf-8")
+        for codificacao, nivel in _codificacoes(handler):
+            tempos = []
+            for _ in range(repeticoes):
+                t0 = time.perf_counter()
+                saida = _comprimir(handler, dados, codificacao, nivel)
+                tempos.append((time.perf_counter() - t0) * 1000)
+            ms = statistics.median(tempos)
+            r = {
+                "payload": nome,
+                "codificacao": codificacao if nivel is None else f"{codificacao}-{nivel}",
+                "bytesOriginal": len(dados),
+                "bytesEntregues": len(saida),
+                "bytesLambda": len(dados) if nivel is None else len(base64.b64encode(saida)),
+                "razao": round(len(saida) / len(dados), 3),
+                "compressaoMs": round(ms, 3),
+            }
+            for rede, mbps in REDES.items():
+                r[f"ultimoByteMs_{rede}"] = round(ms + len(saida) * 8 / (mbps * 1000), 2)
+            resultados.append(r)
+    return resultados
+
+
+def imprimir(resultados):
+    colunas = ["payload", "codificacao", "bytesOriginal", "bytesEntregues", "bytesLambda", "razao",
+               "compressaoMs"] + [f"ultimoByteMs_{r}" for r in REDES]
+    larguras = [max(len(c), *(len(str(r[c])) for r in resultados)) for c in colunas]
+    print("  ".join(c.ljust(w) for c, w in zip(colunas, larguras)))
+    for r in resultados:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(colunas, larguras)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = medir(args.repeticoes)
+    imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"redesMbps": REDES, "resultados": resultados}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
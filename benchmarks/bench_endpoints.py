@@ -0,0 +1,370 @@
+"""
+Benchmark das rotas de handler.salvar_inscricao contra stand-ins locais da AWS.
+
+Semeia Inscricoes, Cursos, Descontos, ListaInteresse e ListaDeEspera (moto) em
+vários tamanhos, troca o Asaas por um servidor HTTP local e dispara eventos
+sintéticos do API Gateway em todas as rotas. Para cada rota reporta
+p50/p95/p99, média e chamadas ao DynamoDB por requisição; também mede o tempo
+de import do handler (cold start) em processos separados. Um cenário que
+devolve status fora de STATUS_ESPERADO aborta a execução.
+
+Uso (fora da Lambda; precisa de boto3, requests e moto[dynamodb,ses,sqs]):
+    python benchmarks/bench_endpoints.py --tamanhos 1000,10000,100000 --saida bench.json
+    python benchmarks/bench_endpoints.py --comparar base.json bench.json
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("ADMIN_EMAIL", "admin@programaai.dev")
+os.environ.setdefault("METRICAS_EMF", "0")
+os.environ.setdefault("EXPORT_BUCKET", "bench-exportacao")  # snapshot do filtro de interesse
+os.environ.setdefault("LOG_NIVEL", "ERROR")  # logs JSON vão para o stdout, junto com o resultado
+
+CURSO_FULLSTACK = "Curso Presencial Programação Fullstack"
+# o catálogo real tem poucas dezenas de cursos; não faz sentido semear 100k
+MAX_CURSOS = 50
+# faixas de CPF (9 primeiros dígitos) dos alunos semeados e dos criados pelo benchmark
+CPF_BASE_SEMEADOS = 100_000_000
+CPF_BASE_NOVOS    = 500_000_000
+CPF_BASE_CUPOM    = 600_000_000
+
+TABELAS = {
+    "Inscricoes": ("id", []),
+    "InscricoesUnicas": ("chave", []),
+    "Cursos": ("id", []),
+    "Descontos": ("id", [("cupom-curso-index", "cupom", "curso")]),
+    "ListaInteresse": ("id", [("email-index", "email", None), ("cadastro-index", "diaCadastro", "dataCadastro")]),
+    "ListaDeEspera": ("id", []),
+    "EmailsFalhos": ("id", []),
+    "AsaasEventos": ("id", []),
+    "Idempotencia": ("chave", []),
+    "LimitesTaxa": ("chave", []),
+    "CuponsResgates": ("chave", []),
+}
+
+
+# status que cada cenário deve devolver (os demais, 200); qualquer outro aborta o benchmark,
+# para não publicar latências do caminho de erro (400/429/500) como se fossem da rota
+STATUS_ESPERADO = {
+    "POST /inscricao": {201},
+    "POST /inscricao (cupom limitado)": {201},
+    "POST /inscricao (duplicada)": {409},
+    "POST /clube/interesse": {201},
+    "POST /lista-espera": {201},
+}
+
+
+class _AsaasFalso(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(tamanho)
+        corpo = json.dumps({"id": f"pl_{uuid.uuid4().hex[:12]}", "url": "https://asaas.test/c/x"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def iniciar_asaas_falso():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _AsaasFalso)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    os.environ["ASAAS_ENDPOINT"] = f"http://127.0.0.1:{srv.server_port}"
+    return srv
+
+
+def criar_tabelas(boto3):
+    client = boto3.client("dynamodb")
+    for nome, (chave, gsis) in TABELAS.items():
+        attrs = {chave}
+        kwargs = {}
+        if gsis:
+            kwargs["GlobalSecondaryIndexes"] = [{
+                "IndexName": idx,
+                "KeySchema": [{"AttributeName": h, "KeyType": "HASH"}]
+                + ([{"AttributeName": r, "KeyType": "RANGE"}] if r else []),
+                "Projection": {"ProjectionType": "ALL"}
+            } for idx, h, r in gsis]
+            for _, h, r in gsis:
+                attrs.update(a for a in (h, r) if a)
+        client.create_table(
+            TableName=nome,
+            KeySchema=[{"AttributeName": chave, "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in sorted(attrs)],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs
+        )
+    boto3.client("ses").verify_email_identity(EmailAddress="no-reply@programaai.dev")
+
+
+def gerar_cpf(n):
+    """CPF válido (só dígitos) com os 9 primeiros dígitos de n; a validação das rotas recusa os inválidos."""
+    d = [int(c) for c in f"{n:09d}"]
+    dv1 = sum(x * (10 - i) for i, x in enumerate(d)) * 10 % 11 % 10
+    dv2 = (sum(x * (11 - i) for i, x in enumerate(d)) + dv1 * 2) * 10 % 11 % 10
+    return f"{n:09d}{dv1}{dv2}"
+
+
+def semear(boto3, n):
+    ddb = boto3.resource("dynamodb")
+    cursos = [CURSO_FULLSTACK] + [f"Curso {i}" for i in range(1, min(n, MAX_CURSOS))]
+    with ddb.Table("Cursos").batch_writer() as w:
+        for i, titulo in enumerate(cursos):
+            w.put_item(Item={
+                "id": f"c{i}", "title": titulo, "price": "R$1.499,99", "ativo": True,
+                "descricao": "Descrição longa do curso. " * 40
+            })
+    with ddb.Table("Descontos").batch_writer() as w:
+        for i in range(n):
+            w.put_item(Item={
+                "id": f"d{i}", "cupom": f"CUPOM{i}", "curso": cursos[i % len(cursos)],
+                "desconto": "10%", "ativo": True, "disponivel": True
+            })
+        # cupom com limite de resgates: a inscrição reserva o resgate na mesma transação
+        w.put_item(Item={
+            "id": "dlimitado", "cupom": "LIMITADO", "curso": CURSO_FULLSTACK,
+            "desconto": "10%", "ativo": True, "disponivel": True, "maxResgates": 10 ** 6, "maxPorCpf": 1
+        })
+    with ddb.Table("Inscricoes").batch_writer() as wi, ddb.Table("InscricoesUnicas").batch_writer() as wu:
+        for i in range(n):
+            curso = cursos[i % len(cursos)]
+            wi.put_item(Item={
+                "id": f"i{i}", "cpf": gerar_cpf(CPF_BASE_SEMEADOS + i), "curso": curso, "nomeCompleto": f"Aluno {i}",
+                "email": f"aluno{i}@exemplo.com", "dataInscricao": "2025-01-01T00:00:00-03:00"
+            })
+            wu.put_item(Item={"chave": f"{gerar_cpf(CPF_BASE_SEMEADOS + i)}#{curso}", "inscricaoId": f"i{i}"})
+    with ddb.Table("ListaInteresse").batch_writer() as w:
+        for i in range(n):
+            w.put_item(Item={"id": f"li{i}", "nome": f"Pessoa {i}", "email": f"pessoa{i}@exemplo.com",
+                              "dataCadastro": "2025-01-01T00:00:00-03:00", "diaCadastro": "2025-01-01"})
+    with ddb.Table("ListaDeEspera").batch_writer() as w:
+        for i in range(n):
+            w.put_item(Item={"id": f"le{i}", "nome": f"Pessoa {i}", "curso": cursos[0], "email": f"e{i}@x.com"})
+    return cursos
+
+
+def evento(method, path, body=None, qs=None, headers=None):
+    return {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": qs,
+        "headers": headers or {"User-Agent": "bench"},
+        "body": json.dumps(body) if body is not None else None,
+        "requestContext": {"identity": {"sourceIp": "127.0.0.1"}}
+    }
+
+
+def ip_origem(i):
+    """Um IP por iteração: o rate limit por IP conta (DynamoDB incluso) sem bloquear o benchmark com 429."""
+    return f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+
+
+def cenarios(n, cursos):
+    """Cada cenário é (nome, fábrica de evento por iteração)."""
+    estado = {"inscricoes": []}
+
+    def nova_inscricao(i):
+        return evento("POST", "/inscricao", {
+            "cpf": gerar_cpf(CPF_BASE_NOVOS + i), "curso": CURSO_FULLSTACK, "nomeCompleto": f"Bench {i}",
+            "email": f"bench{i}@exemplo.com", "cupom": "CUPOM0", "aceitouTermos": True
+        })
+
+    def inscricao_existente(i):
+        lista = estado["inscricoes"]
+        return lista[i % len(lista)] if lista else f"i{i % n}"
+
+    return estado, [
+        ("POST /inscricao", nova_inscricao),
+        ("POST /inscricao (cupom limitado)", lambda i: evento("POST", "/inscricao", {
+            "cpf": gerar_cpf(CPF_BASE_CUPOM + i), "curso": CURSO_FULLSTACK, "nomeCompleto": f"Bench {i}",
+            "email": f"bench-cupom{i}@exemplo.com", "cupom": "LIMITADO", "aceitouTermos": True
+        })),
+        ("POST /inscricao (duplicada)", lambda i: evento("POST", "/inscricao", {
+            "cpf": gerar_cpf(CPF_BASE_SEMEADOS + i % n), "curso": cursos[(i % n) % len(cursos)],
+            "nomeCompleto": "Dup", "email": f"dup{i}@exemplo.com"})),
+        ("GET /cursos", lambda i: evento("GET", "/cursos")),
+        ("GET /cursos?id", lambda i: evento("GET", "/cursos", qs={"id": f"c{i % len(cursos)}"})),
+        ("GET /checa-cupom (válido)", lambda i: evento("GET", "/checa-cupom", qs={
+            "cupom": f"CUPOM{i % n}", "curso": cursos[(i % n) % len(cursos)]})),
+        ("GET /checa-cupom (inválido)", lambda i: evento("GET", "/checa-cupom", qs={
+            "cupom": f"CHUTE{i}", "curso": CURSO_FULLSTACK})),
+        ("GET /clube/interesse", lambda i: evento("GET", "/clube/interesse", qs={"email": f"pessoa{i % n}@exemplo.com"})),
+        ("POST /clube/interesse", lambda i: evento("POST", "/clube/interesse", {
+            "nome": "Bench", "email": f"novo{i}@exemplo.com", "aceitaContato": True})),
+        ("POST /lista-espera", lambda i: evento("POST", "/lista-espera", {
+            "nome": "Bench", "curso": CURSO_FULLSTACK, "email": f"le{i}@x.com", "telefone": "83999999999",
+            "comoConheceu": "Instagram"})),
+        ("GET /pagamento-info", lambda i: evento("GET", "/pagamento-info", qs={"inscricaoId": inscricao_existente(i)})),
+        ("POST /paymentlink", lambda i: evento("POST", "/paymentlink", {
+            "inscricaoId": inscricao_existente(i), "paymentMethod": "PIX" if i % 2 else "CARTAO"})),
+        ("POST /paymentlink (replay Idempotency-Key)", lambda i: evento("POST", "/paymentlink", {
+            "inscricaoId": inscricao_existente(0), "paymentMethod": "PIX"},
+            headers={"User-Agent": "bench", "Idempotency-Key": "bench-replay"})),
+        ("POST /isAssinatura", lambda i: evento("POST", "/isAssinatura", {"inscricaoId": inscricao_existente(i)})),
+        ("POST /asaas/webhook", lambda i: evento("POST", "/asaas/webhook", {
+            "id": f"evt_{i}", "event": "PAYMENT_RECEIVED",
+            "payment": {"id": f"pay_{i}", "externalReference": inscricao_existente(i), "status": "RECEIVED", "value": 100}})),
+        ("OPTIONS", lambda i: evento("OPTIONS", "/inscricao")),
+    ]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenados) - 1)
+    return ordenados[f] + (ordenados[c] - ordenados[f]) * (k - f)
+
+
+def medir_tamanho(n, iteracoes):
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        criar_tabelas(boto3)
+        inicio = time.perf_counter()
+        cursos = semear(boto3, n)
+        semeadura_s = time.perf_counter() - inicio
+
+        import handler
+        handler = importlib.reload(handler)
+        # a Lambda agendada publica o snapshot do filtro do Clube antes do tráfego
+        boto3.client("s3").create_bucket(Bucket=os.environ["EXPORT_BUCKET"])
+        handler.publicar_filtro_interesse({}, None)
+        chamadas = {"n": 0}
+
+        def contar(**kwargs):
+            chamadas["n"] += 1
+
+        handler.dynamodb.meta.client.meta.events.register("before-call.dynamodb.*", contar)
+
+        estado, lista = cenarios(n, cursos)
+        resultados = {}
+        for nome, fabrica in lista:
+            tempos, ddb, status = [], [], {}
+            for i in range(iteracoes):
+                ev = fabrica(i)
+                ev["requestContext"]["identity"]["sourceIp"] = ip_origem(i)
+                antes = chamadas["n"]
+                t0 = time.perf_counter()
+                resp = handler.salvar_inscricao(ev, None)
+                tempos.append((time.perf_counter() - t0) * 1000)
+                ddb.append(chamadas["n"] - antes)
+                status[resp["statusCode"]] = status.get(resp["statusCode"], 0) + 1
+                if nome == "POST /inscricao" and resp["statusCode"] == 201:
+                    estado["inscricoes"].append(json.loads(resp["body"])["inscricao_id"])
+            esperado = STATUS_ESPERADO.get(nome, {200})
+            inesperados = {k: v for k, v in status.items() if k not in esperado}
+            if inesperados:
+                raise SystemExit(f"n={n} {nome}: status inesperados {inesperados} (esperado {sorted(esperado)})")
+            resultados[nome] = {
+                "p50Ms": round(percentil(tempos, 50), 3),
+                "p95Ms": round(percentil(tempos, 95), 3),
+                "p99Ms": round(percentil(tempos, 99), 3),
+                "mediaMs": round(statistics.fmean(tempos), 3),
+                "chamadasDynamoPorReq": round(statistics.fmean(ddb), 3),
+                "status": {str(k): v for k, v in sorted(status.items())}
+            }
+            print(f"  n={n:>7} {nome:<30} p50={resultados[nome]['p50Ms']:>8.2f}ms "
+                  f"p99={resultados[nome]['p99Ms']:>8.2f}ms ddb/req={resultados[nome]['chamadasDynamoPorReq']}",
+                  file=sys.stderr)
+        return {"semeaduraS": round(semeadura_s, 2), "rotas": resultados}
+
+
+def medir_cold_start(repeticoes):
+    codigo = (
+        "import time; t = time.perf_counter(); import handler; "
+        "import json; print(json.dumps({'totalMs': (time.perf_counter() - t) * 1000, "
+        "'relatorio': handler.RELATORIO_COLD_START}))"
+    )
+    amostras = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True,
+            env=dict(os.environ)
+        ).stdout.strip().splitlines()[-1]
+        amostras.append(json.loads(saida))
+    totais = [a["totalMs"] for a in amostras]
+    return {
+        "repeticoes": repeticoes,
+        "importP50Ms": round(percentil(totais, 50), 3),
+        "importMaxMs": round(max(totais), 3),
+        "relatorio": amostras[-1]["relatorio"]
+    }
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(base_path, novo_path):
+    base = json.load(open(base_path))
+    novo = json.load(open(novo_path))
+    print(f"{'tamanho':>8} {'rota':<30} {'p50 base':>10} {'p50 novo':>10} {'delta':>8} {'ddb base':>9} {'ddb novo':>9}")
+    for tamanho, dados in novo["tamanhos"].items():
+        for rota, r in dados["rotas"].items():
+            b = base.get("tamanhos", {}).get(tamanho, {}).get("rotas", {}).get(rota)
+            if not b:
+                continue
+            delta = (r["p50Ms"] - b["p50Ms"]) / b["p50Ms"] * 100 if b["p50Ms"] else 0.0
+            print(f"{tamanho:>8} {rota:<30} {b['p50Ms']:>10.2f} {r['p50Ms']:>10.2f} {delta:>7.1f}% "
+                  f"{b['chamadasDynamoPorReq']:>9} {r['chamadasDynamoPorReq']:>9}")
+    print(f"cold start p50: {base['coldStart']['importP50Ms']}ms -> {novo['coldStart']['importP50Ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", default="1000,10000,100000")
+    parser.add_argument("--iteracoes", type=int, default=200)
+    parser.add_argument("--cold-start", type=int, default=5, help="processos para medir o import")
+    parser.add_argument("--saida", help="arquivo JSON de resultado (padrão: stdout)")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NOVO"))
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    iniciar_asaas_falso()
+    resultado = {
+        "commit": commit_atual(),
+        "python": sys.version.split()[0],
+        "iteracoes": args.iteracoes,
+        "coldStart": medir_cold_start(args.cold_start),
+        "tamanhos": {}
+    }
+    for n in (int(t) for t in args.tamanhos.split(",")):
+        resultado["tamanhos"][str(n)] = medir_tamanho(n, args.iteracoes)
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w") as f:
+            f.write(saida)
+    else:
+        print(saida)
+
+
+if __name__ == "__main__":
+    main()
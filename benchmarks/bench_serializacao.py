@@ -0,0 +1,145 @@
+"""
+Benchmark da serialização das respostas: caminho antigo x serializar() x corpo pré-serializado.
+
+  - antigo: json.dumps puro, que só funciona depois de converter à mão os
+    Decimal do boto3 (a conversão recursiva entra na conta)
+  - serializar: handler.resposta() com o encoder que entende Decimal/set
+  - pre-serializado: handler.resposta() recebendo um JsonPronto (catálogo e
+    cupons em cache), sem reencodar
+
+Os payloads imitam o que o boto3 devolve: números como Decimal.
+
+Uso (fora da Lambda; precisa de boto3):
+    python benchmarks/bench_serializacao.py --repeticoes 200 --saida serializacao.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("METRICAS_EMF", "0")
+os.environ.setdefault("LOG_NIVEL", "ERROR")  # logs JSON vão para o stdout, junto com o resultado
+
+
+def _cursos(n):
+    return [{
+        "id": f"curso-{i}",
+        "title": f"Curso Presencial Programação Turma {i}",
+        "price": "R$1.200,00",
+        "precoNumerico": Decimal("1200.00"),
+        "vagas": Decimal(30),
+        "cargaHoraria": Decimal(120),
+        "avaliacao": Decimal("4.85"),
+        "ativo": True,
+        "descricao": "Aulas práticas, projetos reais e mentoria. " * 8,
+        "tags": {"python", "web", "presencial"}
+    } for i in range(n)]
+
+
+def _inscricoes(n):
+    return {"items": [{
+        "id": str(uuid.uuid4()),
+        "nomeCompleto": f"Aluno Exemplo {i}",
+        "email": f"aluno{i}@exemplo.com",
+        "curso": "Curso Presencial Programação Fullstack",
+        "valorCurso": Decimal("1050.00"),
+        "valorOriginal": Decimal("1200.00"),
+        "descontoAplicado": Decimal("150.00"),
+        "parcelas": Decimal(12),
+        "dataInscricao": "2025-01-15T10:00:00-03:00"
+    } for i in range(n)], "proximoCursor": None}
+
+
+PAYLOADS = {
+    "checa-cupom": lambda: {"valid": True, "desconto": "10%"},
+    "cursos-10": lambda: _cursos(10),
+    "cursos-50": lambda: _cursos(50),
+    "inscricoes-50": lambda: _inscricoes(50),
+    "inscricoes-500": lambda: _inscricoes(500),
+}
+
+
+def _para_float(valor):
+    # o que cada handler precisava fazer antes de chamar json.dumps
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, dict):
+        return {k: _para_float(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_para_float(v) for v in valor]
+    if isinstance(valor, set):
+        return sorted(valor)
+    return valor
+
+
+def _cronometrar(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1_000_000)
+    tempos.sort()
+    return {
+        "p50us": round(statistics.median(tempos), 1),
+        "p95us": round(tempos[int(len(tempos) * 0.95) - 1], 1),
+    }
+
+
+def medir(repeticoes):
+    import handler
+    resultados = []
+    for nome, gerar in PAYLOADS.items():
+        obj = gerar()
+        try:
+            json.dumps(obj)
+            antigo_falha = False
+        except TypeError:
+            antigo_falha = True
+        pronto = handler.JsonPronto(handler.serializar(obj))
+        caminhos = {
+            "antigo": lambda: json.dumps(_para_float(obj)),
+            "serializar": lambda: handler.resposta(200, obj),
+            "pre-serializado": lambda: handler.resposta(200, pronto),
+        }
+        for caminho, fn in caminhos.items():
+            r = {"payload": nome, "caminho": caminho, "bytes": len(fn() if caminho == "antigo" else fn()["body"])}
+            r.update(_cronometrar(fn, repeticoes))
+            if caminho == "antigo":
+                r["jsonDumpsPuroFalha"] = antigo_falha
+            resultados.append(r)
+    return resultados
+
+
+def imprimir(resultados):
+    colunas = ["payload", "caminho", "bytes", "p50us", "p95us"]
+    larguras = [max(len(c), *(len(str(r[c])) for r in resultados)) for c in colunas]
+    print("  ".join(c.ljust(w) for c, w in zip(colunas, larguras)))
+    for r in resultados:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(colunas, larguras)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = medir(args.repeticoes)
+    imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"resultados": resultados}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark da validação dos bodies POST (schemas compilados em @rota(..., schema=...)).
+
+Para cada rota mede o validar() compilado com um payload válido e um inválido
+(vários campos com erro) e, como referência, o json.loads do mesmo body, que a
+requisição já pagava antes. A validação deve ficar na casa dos microssegundos,
+bem abaixo de qualquer chamada à AWS que ela evita.
+
+Uso (fora da Lambda; precisa de boto3):
+    python benchmarks/bench_validacao.py --repeticoes 5000 --saida validacao.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("METRICAS_EMF", "0")
+os.environ.setdefault("LOG_NIVEL", "ERROR")  # logs JSON vão para o stdout, junto com o resultado
+
+
+def _aluno(i):
+    return {
+        "nomeCompleto": f"Aluno Exemplo {i}", "cpf": "529.982.247-25", "rg": "12.345.678-9",
+        "email": f"aluno{i}@exemplo.com", "whatsapp": "(11) 99999-0000", "sexo": "Feminino",
+        "dataNascimento": "1995-04-12", "formacaoTI": "Superior incompleto", "ondeEstuda": "USP",
+        "comoSoube": "Instagram", "nomeAmigo": "", "aceitouTermos": True
+    }
+
+
+PAYLOADS = {
+    "POST /inscricao": (
+        {**_aluno(0), "curso": "Curso Presencial Programação Fullstack", "cupom": "promo10"},
+        {**_aluno(0), "cpf": "111.111.111-11", "email": "sem-arroba", "curso": "", "nomeCompleto": 42}
+    ),
+    "POST /inscricoes/batch": (
+        {"curso": "Curso Presencial Programação Fullstack", "alunos": [_aluno(i) for i in range(50)]},
+        {"curso": "", "alunos": "x"}
+    ),
+    "POST /lista-espera": (
+        {"nome": "Maria", "curso": "Python", "email": "maria@exemplo.com", "telefone": "(11) 99999-0000",
+         "comoConheceu": "Google"},
+        {"nome": "", "curso": "Python", "email": "maria@", "telefone": "1" * 200}
+    ),
+    "POST /clube/interesse": (
+        {"nome": "Maria", "email": "maria@exemplo.com", "aceitaContato": True, "interesses": ["python", "ia"]},
+        {"nome": "Maria", "email": "maria", "aceitaContato": False, "interesses": [1, 2]}
+    ),
+    "POST /isAssinatura": (
+        {"inscricaoId": "0b7c2a54-2f4e-4d1e-9a53-1f0d6c1b2e3f", "isAssinatura": True},
+        {"inscricaoId": ""}
+    ),
+    "POST /paymentlink": (
+        {"inscricaoId": "0b7c2a54-2f4e-4d1e-9a53-1f0d6c1b2e3f", "paymentMethod": "cartao"},
+        {"inscricaoId": "0b7c2a54-2f4e-4d1e-9a53-1f0d6c1b2e3f", "paymentMethod": "BOLETO"}
+    ),
+}
+
+
+def _cronometrar(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1_000_000)
+    tempos.sort()
+    return {
+        "p50us": round(statistics.median(tempos), 2),
+        "p95us": round(tempos[int(len(tempos) * 0.95) - 1], 2),
+    }
+
+
+def medir(repeticoes):
+    import handler
+    resultados = []
+    for nome, (valido, invalido) in PAYLOADS.items():
+        validar = handler.ROTAS[tuple(nome.split(" ", 1))]["validar"]
+        for caso, body in (("valido", valido), ("invalido", invalido)):
+            raw = json.dumps(body)
+            _, erros = validar(body)
+            if (caso == "valido") == bool(erros):
+                raise SystemExit(f"{nome} {caso}: resultado inesperado {erros}")
+            r = {"rota": nome, "caso": caso, "erros": len(erros), "bytes": len(raw)}
+            r.update(_cronometrar(lambda: validar(body), repeticoes))
+            r["jsonLoadsP50us"] = _cronometrar(lambda: json.loads(raw), repeticoes)["p50us"]
+            resultados.append(r)
+    return resultados
+
+
+def imprimir(resultados):
+    colunas = ["rota", "caso", "erros", "bytes", "p50us", "p95us", "jsonLoadsP50us"]
+    larguras = [max(len(c), *(len(str(r[c])) for r in resultados)) for c in colunas]
+    print("  ".join(c.ljust(w) for c, w in zip(colunas, larguras)))
+    for r in resultados:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(colunas, larguras)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5000)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = medir(args.repeticoes)
+    imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"resultados": resultados}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Filtro de Bloom em memória: responde "com certeza não está" sem consultar a
+tabela e "talvez esteja" com taxa de falso positivo controlada.
+
+O tamanho sai da capacidade e da taxa de falso positivo desejadas, limitado por
+um orçamento de memória (acima dele a taxa efetiva piora e é informada em
+taxa_estimada()). para_bytes()/de_bytes() serializam o mapa de bits para que
+o filtro montado num processo seja carregado em outros.
+"""
+import hashlib
+import math
+
+
+class FiltroBloom:
+
+    def __init__(self, capacidade, taxa_falso_positivo=0.01, max_bytes=1 << 20):
+        capacidade = max(1, int(capacidade))
+        bits = math.ceil(-capacidade * math.log(taxa_falso_positivo) / (math.log(2) ** 2))
+        # múltiplo de 8: o mapa serializado (para_bytes) tem exatamente os bits usados nas posições
+        self.bits = max(8, min(bits, max_bytes * 8) + 7) // 8 * 8
+        self.hashes = max(1, round(self.bits / capacidade * math.log(2)))
+        self.capacidade = capacidade
+        self.itens = 0
+        self._mapa = bytearray((self.bits + 7) // 8)
+
+    def _posicoes(self, valor):
+        # double hashing (Kirsch-Mitzenmacher): k posições a partir de dois hashes de 64 bits
+        digest = hashlib.blake2b(valor.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def adicionar(self, valor):
+        for p in self._posicoes(valor):
+            self._mapa[p >> 3] |= 1 << (p & 7)
+        self.itens += 1
+
+    def __contains__(self, valor):
+        return all(self._mapa[p >> 3] & (1 << (p & 7)) for p in self._posicoes(valor))
+
+    def cheio(self):
+        return self.itens >= self.capacidade
+
+    def taxa_estimada(self):
+        return (1 - math.exp(-self.hashes * self.itens / self.bits)) ** self.hashes
+
+    def tamanho_bytes(self):
+        return len(self._mapa)
+
+    def para_bytes(self):
+        return bytes(self._mapa)
+
+    @classmethod
+    def de_bytes(cls, mapa, hashes, capacidade, itens, bits=None):
+        """Reconstrói um filtro a partir de para_bytes() e dos parâmetros com que foi montado."""
+        filtro = cls.__new__(cls)
+        filtro.bits = int(bits) if bits is not None else len(mapa) * 8
+        if not 0 < filtro.bits <= len(mapa) * 8:
+            raise ValueError(f"Mapa de {len(mapa)} bytes incompatível com {filtro.bits} bits")
+        filtro.hashes = int(hashes)
+        filtro.capacidade = int(capacidade)
+        filtro.itens = int(itens)
+        filtro._mapa = bytearray(mapa)
+        return filtro
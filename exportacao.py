@@ -0,0 +1,230 @@
+"""
+Exportação completa de Inscricoes, ListaDeEspera e ListaInteresse para o S3.
+
+Cada tabela é lida com scan paralelo (Segment/TotalSegments) num pool de
+threads. Cada página do scan é convertida e escrita direto num arquivo gzip
+(NDJSON ou CSV) enviado ao S3 em multipart upload: em memória ficam só a
+página atual e o bloco comprimido ainda não enviado (até
+BLOCO_MULTIPART_BYTES), cerca de 20 MB por thread, ou ~320 MB com
+MAX_THREADS = 16 dentro dos 1024 MB da função. Cada arquivo tem até
+ITENS_POR_PARTE itens; ao final é gravado um manifest.json com todos.
+
+Números do DynamoDB saem como texto decimal exato ("1499.99", "40"), nunca
+float: valores em reais não perdem precisão. No CSV as colunas de cada arquivo
+são os atributos da primeira página dele; atributos que só aparecem depois
+vão como JSON na coluna _extras.
+
+Evento (todos opcionais):
+  {"tabelas": ["Inscricoes"], "formato": "ndjson" | "csv", "segmentos": 8,
+   "bucket": "...", "prefixo": "exports/2025-01-01"}
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+
+import logs
+
+logger = logging.getLogger()
+logs.configurar()
+
+EXPORT_BUCKET        = os.environ.get('EXPORT_BUCKET')
+TABELAS_PADRAO       = ("Inscricoes", "ListaDeEspera", "ListaInteresse")
+SEGMENTOS_PADRAO     = int(os.environ.get('EXPORT_SEGMENTOS', '4'))
+ITENS_POR_PARTE      = int(os.environ.get('EXPORT_ITENS_POR_PARTE', '50000'))
+BLOCO_MULTIPART_BYTES = 8 * 1024 * 1024  # o S3 exige >= 5 MiB por bloco, menos no último
+MAX_THREADS          = 16
+
+# clients do boto3 são thread-safe (resources não são)
+ddb = boto3.client('dynamodb')
+s3  = boto3.client('s3')
+_deserializer = TypeDeserializer()
+
+
+def exportar_tabelas(event, context):
+    event = event or {}
+    formato = (event.get("formato") or "ndjson").lower()
+    if formato not in ("ndjson", "csv"):
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    bucket = event.get("bucket") or EXPORT_BUCKET
+    if not bucket:
+        raise ValueError("Bucket de exportação não configurado (EXPORT_BUCKET).")
+    tabelas = event.get("tabelas") or list(TABELAS_PADRAO)
+    segmentos = max(1, int(event.get("segmentos") or SEGMENTOS_PADRAO))
+    inicio = datetime.now(timezone(timedelta(hours=-3)))
+    prefixo = (event.get("prefixo") or f"exports/{inicio.strftime('%Y-%m-%dT%H%M%S')}").rstrip("/")
+
+    tarefas = [(t, seg) for t in tabelas for seg in range(segmentos)]
+    with ThreadPoolExecutor(max_workers=min(MAX_THREADS, len(tarefas))) as pool:
+        partes = pool.map(
+            lambda tarefa: _exportar_segmento(tarefa[0], tarefa[1], segmentos, formato, bucket, prefixo),
+            tarefas
+        )
+        partes = [p for lista in partes for p in lista]
+
+    manifest = {
+        "formato": formato,
+        "compressao": "gzip",
+        "segmentos": segmentos,
+        "iniciadoEm": inicio.isoformat(),
+        "concluidoEm": datetime.now(timezone(timedelta(hours=-3))).isoformat(),
+        "tabelas": {
+            t: {
+                "itens": sum(p["itens"] for p in partes if p["tabela"] == t),
+                "partes": [p for p in partes if p["tabela"] == t]
+            }
+            for t in tabelas
+        }
+    }
+    chave_manifest = f"{prefixo}/manifest.json"
+    s3.put_object(
+        Bucket=bucket, Key=chave_manifest,
+        Body=json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+        ContentType="application/json"
+    )
+    logger.info("Exportação concluída: s3://%s/%s %s", bucket, chave_manifest,
+                {t: d["itens"] for t, d in manifest["tabelas"].items()})
+    return {"manifest": f"s3://{bucket}/{chave_manifest}",
+            "itens": {t: d["itens"] for t, d in manifest["tabelas"].items()}}
+
+
+def _exportar_segmento(tabela, segmento, total, formato, bucket, prefixo):
+    partes = []
+    arquivo = None
+    try:
+        for pagina in _scan_paginas(tabela, segmento, total):
+            for item in pagina:
+                if arquivo is None:
+                    chave = f"{prefixo}/{tabela}/segmento-{segmento:03d}/parte-{len(partes) + 1:05d}.{formato}.gz"
+                    arquivo = _ArquivoS3(bucket, chave, formato, pagina)
+                arquivo.escrever(item)
+                if arquivo.itens >= ITENS_POR_PARTE:
+                    partes.append(_fechar_parte(arquivo, tabela, segmento))
+                    arquivo = None
+        if arquivo is not None:
+            partes.append(_fechar_parte(arquivo, tabela, segmento))
+    except Exception:
+        if arquivo is not None:
+            arquivo.abortar()
+        raise
+    logger.info("Segmento %s/%d de %s exportado em %d partes", segmento, total, tabela, len(partes))
+    return partes
+
+
+def _fechar_parte(arquivo, tabela, segmento):
+    arquivo.fechar()
+    return {"tabela": tabela, "segmento": segmento, "chave": arquivo.chave,
+            "itens": arquivo.itens, "bytes": arquivo.bytes}
+
+
+def _scan_paginas(tabela, segmento, total):
+    """Páginas do scan do segmento, já desserializadas e convertidas (uma por vez em memória)."""
+    kwargs = {"TableName": tabela, "Segment": segmento, "TotalSegments": total}
+    while True:
+        resp = ddb.scan(**kwargs)
+        yield [_converter({k: _deserializer.deserialize(v) for k, v in item.items()}) for item in resp.get("Items", [])]
+        if not resp.get("LastEvaluatedKey"):
+            return
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _converter(valor):
+    if isinstance(valor, Decimal):
+        return format(valor, "f")
+    if isinstance(valor, dict):
+        return {k: _converter(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_converter(v) for v in valor]
+    if isinstance(valor, set):
+        return sorted(_converter(v) for v in valor)
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode("utf-8", "replace")
+    return valor
+
+
+class _ArquivoS3:
+    """
+    Um arquivo gzip da exportação gravado em multipart upload: os itens são
+    comprimidos num buffer enviado a cada BLOCO_MULTIPART_BYTES. Arquivo que
+    não chega a um bloco vai num put_object só.
+    """
+
+    def __init__(self, bucket, chave, formato, primeira_pagina):
+        self.bucket, self.chave, self.formato = bucket, chave, formato
+        self.content_type = "application/x-ndjson" if formato == "ndjson" else "text/csv"
+        self.itens = self.bytes = 0
+        self._buf = io.BytesIO()
+        self._gz = gzip.GzipFile(fileobj=self._buf, mode="wb")
+        self._upload_id = None
+        self._blocos = []
+        if formato == "csv":
+            self._colunas = sorted({k for item in primeira_pagina for k in item})
+            self._conjunto = frozenset(self._colunas)
+            self._texto = io.StringIO()
+            self._csv = csv.writer(self._texto)
+            self._escrever_csv(self._colunas + ["_extras"])
+
+    def escrever(self, item):
+        if self.formato == "ndjson":
+            self._gz.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        else:
+            extras = {k: v for k, v in item.items() if k not in self._conjunto}
+            self._escrever_csv([_celula_csv(item.get(k)) for k in self._colunas]
+                               + [json.dumps(extras, ensure_ascii=False) if extras else ""])
+        self.itens += 1
+        if self._buf.tell() >= BLOCO_MULTIPART_BYTES:
+            self._enviar_bloco()
+
+    def _escrever_csv(self, valores):
+        self._csv.writerow(valores)
+        self._gz.write(self._texto.getvalue().encode("utf-8"))
+        self._texto.seek(0)
+        self._texto.truncate()
+
+    def _enviar_bloco(self):
+        if self._upload_id is None:
+            self._upload_id = s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.chave, ContentEncoding="gzip", ContentType=self.content_type
+            )["UploadId"]
+        corpo = self._buf.getvalue()
+        numero = len(self._blocos) + 1
+        resp = s3.upload_part(Bucket=self.bucket, Key=self.chave, UploadId=self._upload_id,
+                              PartNumber=numero, Body=corpo)
+        self._blocos.append({"ETag": resp["ETag"], "PartNumber": numero})
+        self.bytes += len(corpo)
+        self._buf.seek(0)
+        self._buf.truncate()
+
+    def fechar(self):
+        self._gz.close()  # grava o rodapé do gzip no buffer
+        if self._upload_id is None:
+            corpo = self._buf.getvalue()
+            s3.put_object(Bucket=self.bucket, Key=self.chave, Body=corpo,
+                          ContentEncoding="gzip", ContentType=self.content_type)
+            self.bytes += len(corpo)
+            return
+        if self._buf.tell():
+            self._enviar_bloco()
+        s3.complete_multipart_upload(Bucket=self.bucket, Key=self.chave, UploadId=self._upload_id,
+                                     MultipartUpload={"Parts": self._blocos})
+
+    def abortar(self):
+        if self._upload_id is not None:
+            try:
+                s3.abort_multipart_upload(Bucket=self.bucket, Key=self.chave, UploadId=self._upload_id)
+            except Exception:
+                logger.exception("Erro ao abortar o multipart upload de %s", self.chave)
+
+
+def _celula_csv(valor):
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return "" if valor is None else valor
@@ -1,503 +1,1069 @@
+import time
+_INICIO_IMPORT = time.perf_counter()
+
+import base64
+import gzip
+import hashlib
 import json
+import math
 import os
+import random
+import re
 import uuid
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from email.utils import format_datetime, parsedate_to_datetime
 
 import boto3
-import requests
-import firebase_admin
-from firebase_admin import auth, credentials
+from boto3.dynamodb.types import Binary
 from botocore.exceptions import ClientError
 
-# Setup logging
+import logs
+import metricas
+import precos
+import validacao
+from bloom import FiltroBloom
+
+try:
+    import brotli  # opcional: sem o pacote, só gzip
+except ImportError:
+    brotli = None
+
+# Setup logging (JSON redigido, em buffer por invocação: ver logs.py)
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logs.configurar()
 
-# AWS resources
+# AWS resources (instrumentados para métricas de latência por dependência)
 dynamodb         = boto3.resource('dynamodb')
-table_inscricoes  = dynamodb.Table('Inscricoes')
-table_interesse   = dynamodb.Table('ListaInteresse')
-table_lista_espera = dynamodb.Table('ListaDeEspera')
-table_cursos      = dynamodb.Table('Cursos')
-table_descontos   = dynamodb.Table('Descontos')
-ses              = boto3.client('ses')
-s3               = boto3.client('s3')
+ddb_client       = metricas.instrumentar(dynamodb.meta.client, 'DynamoDB', dynamo=True)
+table_inscricoes  = metricas.instrumentar(dynamodb.Table('Inscricoes'), 'Inscricoes', dynamo=True)
+table_interesse   = metricas.instrumentar(dynamodb.Table('ListaInteresse'), 'ListaInteresse', dynamo=True)
+table_lista_espera = metricas.instrumentar(dynamodb.Table('ListaDeEspera'), 'ListaDeEspera', dynamo=True)
+table_cursos      = metricas.instrumentar(dynamodb.Table('Cursos'), 'Cursos', dynamo=True)
+table_descontos   = metricas.instrumentar(dynamodb.Table('Descontos'), 'Descontos', dynamo=True)
+table_unicidade   = metricas.instrumentar(dynamodb.Table('InscricoesUnicas'), 'InscricoesUnicas', dynamo=True)
+table_asaas_eventos = metricas.instrumentar(dynamodb.Table('AsaasEventos'), 'AsaasEventos', dynamo=True)
+table_idempotencia = metricas.instrumentar(dynamodb.Table('Idempotencia'), 'Idempotencia', dynamo=True)
+table_emails_falhos = metricas.instrumentar(dynamodb.Table('EmailsFalhos'), 'EmailsFalhos', dynamo=True)
+table_limites    = metricas.instrumentar(dynamodb.Table('LimitesTaxa'), 'LimitesTaxa', dynamo=True)
+table_resgates   = metricas.instrumentar(dynamodb.Table('CuponsResgates'), 'CuponsResgates', dynamo=True)
+ses              = metricas.instrumentar(boto3.client('ses'), 'SES')
+sqs              = metricas.instrumentar(boto3.client('sqs'), 'SQS')
 
 # Configs
-ASAAS_API_KEY     = os.environ.get('ASAAS')
-ASAAS_ENDPOINT    = "https://www.asaas.com/api/v3"
 REMETENTE         = 'programa AI <no-reply@programaai.dev>'
 FIREBASE_BUCKET   = os.environ.get('FIREBASE_BUCKET')
 FIREBASE_KEY_PATH = os.environ.get('FIREBASE_KEY_PATH')
 ADMIN_EMAIL       = os.environ.get('ADMIN_EMAIL')
 
-FULLSTACK_NOME_CURSO = "Curso Presencial Programação Fullstack"
+# Outbox de e-mails (fila SQS consumida por processar_outbox_emails)
+EMAIL_OUTBOX_QUEUE_URL     = os.environ.get('EMAIL_OUTBOX_QUEUE_URL')
+SES_MAX_ENVIOS_POR_SEGUNDO = float(os.environ.get('SES_MAX_ENVIOS_POR_SEGUNDO', '10'))
+SES_MAX_TENTATIVAS         = 4
+SES_ERROS_THROTTLING       = ("Throttling", "ThrottlingException", "TooManyRequestsException")
+# com o outbox fora do ar, até estes e-mails saem na hora; o resto vai para EmailsFalhos
+# (um lote de 200 inscrições não vira 200 chamadas ao SES dentro da requisição)
+EMAIL_ENVIO_DIRETO_MAX     = int(os.environ.get('EMAIL_ENVIO_DIRETO_MAX', '5'))
+_proximo_envio_ses = 0.0
+
+FULLSTACK_NOME_CURSO = precos.FULLSTACK_NOME_CURSO
+TZ_BRASILIA          = timezone(timedelta(hours=-3))
+
+# Cache do catálogo de cursos (vive entre invocações "quentes" da Lambda)
+CATALOGO_TTL_SEGUNDOS = int(os.environ.get('CATALOGO_TTL_SEGUNDOS', '300'))
+CATALOGO_RECARGA_MIN_SEGUNDOS = 30
+_catalogo = {
+    "itens": [], "por_id": {}, "por_titulo": {}, "carregado_em": None, "versao": None, "modificado_em": None,
+    "json": None, "json_por_id": {}  # corpos já serializados de GET /cursos
+}
+catalogo_stats = {"hits": 0, "misses": 0}
+
+# Webhook Asaas: eventos gravados em AsaasEventos e processados pela fila
+ASAAS_EVENTOS_QUEUE_URL = os.environ.get('ASAAS_EVENTOS_QUEUE_URL')
+# dateCreated chega como "YYYY-MM-DD HH:MM:SS" (horário de Brasília) ou ISO-8601 com T, fração, Z ou offset
+_RE_DATA_ASAAS = re.compile(
+    r"^(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}:\d{2}(?::\d{2})?)(?:\.(\d+))?)?\s*(Z|[+-]\d{2}:?\d{2})?$"
+)
+# ordem monotônica dos status de cobrança; um evento só sobrescreve status de ordem menor ou igual
+ASAAS_ORDEM_STATUS = {
+    "PENDING": 10,
+    "AWAITING_RISK_ANALYSIS": 15,
+    "OVERDUE": 20,
+    "CONFIRMED": 30,
+    "RECEIVED": 40,
+    "RECEIVED_IN_CASH": 40,
+    "DUNNING_REQUESTED": 42,
+    "DUNNING_RECEIVED": 45,
+    "REFUND_REQUESTED": 50,
+    "REFUND_IN_PROGRESS": 55,
+    "CHARGEBACK_REQUESTED": 60,
+    "CHARGEBACK_DISPUTE": 65,
+    "AWAITING_CHARGEBACK_REVERSAL": 70,
+    "REFUNDED": 80
+}
+# status em que a cobrança ainda espera pagamento (os links continuam sendo renovados)
+ASAAS_STATUS_EM_ABERTO = frozenset({"PENDING", "OVERDUE"})
+
+# Idempotency-Key: respostas guardadas por chave (TTL) e trava enquanto a primeira execução roda
+IDEMPOTENCIA_TTL_SEGUNDOS    = int(os.environ.get('IDEMPOTENCIA_TTL_SEGUNDOS', '86400'))
+# A trava dura o timeout da Lambda da API (LAMBDA_TIMEOUT_SEGUNDOS = custom.timeoutApi no serverless.yml)
+# mais uma folga: execução morta por timeout libera a chave logo depois. As repetidas esperam no máximo
+# IDEMPOTENCIA_ESPERA_SEGUNDOS e nunca mais que metade do tempo restante da própria invocação.
+LAMBDA_TIMEOUT_SEGUNDOS      = int(os.environ.get('LAMBDA_TIMEOUT_SEGUNDOS', '10'))
+IDEMPOTENCIA_TRAVA_SEGUNDOS  = LAMBDA_TIMEOUT_SEGUNDOS + 2
+IDEMPOTENCIA_ESPERA_SEGUNDOS = 3.0
+
+# Pagamento-info materializado na inscrição; mude PAGAMENTO_INFO_REGRAS ao alterar calcular_pagamento_info
+PAGAMENTO_INFO_REGRAS  = "1"
+CAMPOS_MATERIALIZADOS  = ("pagamentoInfoJson", "pagamentoInfoVersao")
+
+# Compressão negociada por Accept-Encoding (corpos menores que o limite vão sem compressão)
+COMPRESSAO_MIN_BYTES   = int(os.environ.get('COMPRESSAO_MIN_BYTES', '1024'))
+COMPRESSAO_NIVEL_GZIP  = 6
+COMPRESSAO_NIVEL_BR    = 5
+
+# Payment links PIX e cartão pré-criados logo após a inscrição (fila + worker) e
+# renovados antes de expirar; /paymentlink só cria na hora se ainda não houver link
+PAYMENTLINKS_QUEUE_URL          = os.environ.get('PAYMENTLINKS_QUEUE_URL')
+PAYMENTLINK_METODOS             = ("PIX", "CARTAO")
+PAYMENTLINK_VALIDADE_DIAS       = {"PIX": 2, "CARTAO": 7}
+PAYMENTLINK_RENOVAR_ANTES_HORAS = 12
+PAYMENTLINK_RENOVAR_MAX_DIAS    = int(os.environ.get('PAYMENTLINK_RENOVAR_MAX_DIAS', '30'))
+# GSI esparso de Inscricoes (hash: renovacaoLinks, range: linksVencemEm): só inscrições com pagamento
+# em aberto têm renovacaoLinks; linksVencemEm é o vencimento mais próximo entre os links (ISO, Brasília)
+PAYMENTLINK_RENOVACAO_INDEX     = 'renovacao-index'
+RENOVACAO_PENDENTE              = 'PENDENTE'
+# Chamadas ao Asaas terminam (com retries) até o fim da invocação menos esta margem, que fica
+# para gravar o link e responder; assim o timeout vira AsaasIndisponivel/503 e conta no circuit breaker
+ASAAS_MARGEM_SEGUNDOS           = 1.5
+
+# Filtro de Bloom dos e-mails do Clube: GET /clube/interesse responde os negativos
+# sem DynamoDB; positivos prováveis (e todo POST) são confirmados no GSI email-index.
+# A base do filtro é um snapshot no S3 (publicar_filtro_interesse, agendada); o delta
+# vem do GSI cadastro-index (hash: diaCadastro, range: dataCadastro)
+INTERESSE_EMAIL_INDEX               = 'email-index'
+INTERESSE_CADASTRO_INDEX            = 'cadastro-index'
+INTERESSE_FILTRO_TAXA_FP            = float(os.environ.get('INTERESSE_FILTRO_TAXA_FP', '0.01'))
+INTERESSE_FILTRO_MAX_BYTES          = int(os.environ.get('INTERESSE_FILTRO_MAX_BYTES', str(1 << 20)))
+INTERESSE_FILTRO_CAPACIDADE_MIN     = 1024
+INTERESSE_FILTRO_ATUALIZAR_SEGUNDOS = 60
+INTERESSE_FILTRO_SNAPSHOT_SEGUNDOS  = 3600  # troca pelo snapshot mais novo (já redimensionado) a cada hora
+INTERESSE_FILTRO_MARGEM_SEGUNDOS    = 120  # sobreposição do delta para não perder gravações concorrentes
+INTERESSE_FILTRO_BUCKET             = os.environ.get('EXPORT_BUCKET')
+INTERESSE_FILTRO_CHAVE              = 'filtros/lista-interesse.bloom'
+_filtro_interesse = {"filtro": None, "desde": None, "atualizado_em": None, "carregado_em": None}
+filtro_interesse_stats = {"negativos": 0, "confirmados": 0, "falsos_positivos": 0, "sem_filtro": 0}
+_s3 = None
+
+# Inscrição em lote (POST /inscricoes/batch)
+INSCRICAO_LOTE_MAX          = 200
+LOTE_THREADS                = 8
+LOTE_MAX_TENTATIVAS         = 6
+LOTE_BACKOFF_BASE_SEGUNDOS  = 0.05
+
+# Rate limit por rota: @rota(..., limites={"ip": N, "email": N, "cpf": N}) em requisições por minuto.
+# Token bucket em memória na frente (bloqueia sem ir ao DynamoDB) e contador por janela em
+# LimitesTaxa (TTL expiraEm) somando todas as Lambdas. LIMITES_TAXA sobrescreve por rota,
+# ex.: {"POST /inscricao": {"ip": 20}}; limite 0 desliga a dimensão.
+LIMITE_JANELA_SEGUNDOS = 60
+LIMITE_BUCKETS_MAX     = 10000
+LIMITES_TAXA           = json.loads(os.environ.get('LIMITES_TAXA') or '{}')
+_buckets = OrderedDict()  # chave (rota#dimensão#hash) -> [tokens, atualizado_em]
+limite_taxa_stats = {"bloqueios_locais": 0, "bloqueios_compartilhados": 0}
+
+# Listagem admin de inscrições
+INSCRICOES_CURSO_INDEX = 'curso-index'
+LISTAGEM_LIMITE_PADRAO = 50
+LISTAGEM_LIMITE_MAX    = 500
+
+# Cupons: consulta pelo GSI (cupom, curso) + LRU de positivos e cache negativo curto
+CUPOM_CURSO_INDEX            = 'cupom-curso-index'
+CUPONS_CACHE_MAX             = int(os.environ.get('CUPONS_CACHE_MAX', '1024'))
+CUPONS_TTL_SEGUNDOS          = int(os.environ.get('CUPONS_TTL_SEGUNDOS', '300'))
+CUPONS_NEGATIVO_TTL_SEGUNDOS = int(os.environ.get('CUPONS_NEGATIVO_TTL_SEGUNDOS', '30'))
+_cupons_positivos = OrderedDict()  # (cupom, curso) -> [itens, expira_em, corpo de /checa-cupom serializado]
+_cupons_negativos = OrderedDict()  # (cupom, curso) -> expira_em
+
+# Limite de resgates: maxResgates (total) e maxPorCpf no item de Descontos, contados por código
+# de cupom em CuponsResgates. O total fica espalhado em `shards` itens (padrão CUPOM_SHARDS_PADRAO),
+# cada um com sua fatia do limite, para um cupom viral não virar partição quente; não reduza
+# shards com a promoção em andamento (a contagem dos shards removidos seria ignorada).
+CUPOM_SHARDS_PADRAO          = 8
+CUPOM_RESTANTES_TTL_SEGUNDOS = 10
+_cupons_restantes = {}  # cupom -> (resgates restantes, expira_em)
+
+
+# Tempos de inicialização do container (import + inicializações sob demanda)
+RELATORIO_COLD_START = {}
+_firebase_auth = None
 
 
 def init_firebase():
-    if not firebase_admin._apps:
-        obj = s3.get_object(Bucket=FIREBASE_BUCKET, Key=FIREBASE_KEY_PATH)
-        key = json.load(obj['Body'])
-        cred = credentials.Certificate(key)
-        firebase_admin.initialize_app(cred)
+    """
+    Inicializa o Firebase Admin na primeira chamada (busca a chave no S3) e
+    devolve o módulo auth já pronto. As chamadas seguintes reaproveitam o estado.
+    """
+    global _firebase_auth
+    if _firebase_auth is None:
+        inicio = time.perf_counter()
+        import firebase_admin
+        from firebase_admin import auth, credentials
+        if not firebase_admin._apps:
+            obj = boto3.client('s3').get_object(Bucket=FIREBASE_BUCKET, Key=FIREBASE_KEY_PATH)
+            key = json.load(obj['Body'])
+            cred = credentials.Certificate(key)
+            firebase_admin.initialize_app(cred)
+        _firebase_auth = auth
+        RELATORIO_COLD_START["initFirebaseMs"] = round((time.perf_counter() - inicio) * 1000, 2)
+        logger.info("Firebase inicializado: %s", RELATORIO_COLD_START)
+    return _firebase_auth
+
+
+# Registro de rotas: (método, caminho normalizado) -> configuração da rota
+ROTAS = {}
+# Hooks do pipeline: pre(req) -> resposta|None (resposta interrompe); pos(req, resp) -> resposta
+HOOKS_PRE = []
+HOOKS_POS = []
+
+
+def rota(metodo, caminho, corpo=None, honeypot=False, schema=None, **opcoes):
+    """
+    Registra a função como handler de (metodo, caminho).
+      corpo: None (não lê o body), "opcional" ({} se vazio) ou "obrigatorio"
+      honeypot: rejeita bodies com o campo 'website' preenchido
+      schema: {campo: regra de validacao}; compilado aqui, no import, e aplicado
+        logo após o parse (400 com erros por campo; a rota lê req["dados"])
+      opcoes: configurações extras lidas pelos hooks do pipeline
+        (cache=..., idempotente=True, limites={"ip": N, "email": N, "cpf": N} por minuto)
+    """
+    def registrar(fn):
+        ROTAS[(metodo, caminho)] = dict(
+            opcoes, fn=fn, nome=f"{metodo} {caminho}", corpo=corpo, honeypot=honeypot,
+            validar=validacao.compilar(schema) if schema else None
+        )
+        return fn
+    return registrar
+
 
-init_firebase()
+def _resolver_rota(metodo, path):
+    # mesmo critério do antigo path.endswith(...): testa os sufixos de 2 e 1 segmentos
+    partes = [p for p in path.split("/") if p]
+    for n in (2, 1):
+        if len(partes) >= n:
+            cfg = ROTAS.get((metodo, "/" + "/".join(partes[-n:])))
+            if cfg:
+                return cfg
+    return None
 
 
+@logs.por_invocacao
 def salvar_inscricao(event, context):
     path   = event.get("path", "")
     method = event.get("httpMethod", "")
     qs     = event.get("queryStringParameters") or {}
     logger.info("Incoming request: path=%s method=%s qs=%s", path, method, qs)
 
-    # GET /pagamento-info?inscricaoId=...
-    if path.endswith("/pagamento-info") and method == "GET":
-        iid = (qs.get("inscricaoId") or "").strip()
-        if not iid:
-            return resposta(400, {"error": "Parâmetro 'inscricaoId' é obrigatório."})
+    # Admin routes
+    """if "/galaxy" in path:
         try:
-            info = montar_pagamento_info(iid)
-            return resposta(200, info)
-        except ValueError as ve:
-            logger.warning("Pagamento-info inválido: %s", ve)
-            return resposta(400, {"error": str(ve)})
+            hdr = event["headers"].get("Authorization","")
+            uid, email = validar_jwt(hdr)
+            logger.info("Admin auth OK: uid=%s email=%s", uid, email)
         except Exception:
-            logger.exception("Erro ao montar pagamento-info")
-            return resposta(500, {"error": "Erro interno ao montar pagamento-info"})
+            logger.warning("Admin auth failed")
+            return resposta(401, {"error":"Unauthorized"})
+        if path.endswith("/galaxy/inscricoes") and method == "GET":
+            return listar_inscricoes(qs)
+        if path.startswith("/galaxy/inscricoes/") and method == "DELETE":
+            iid = path.split("/")[-1]
+            return remover_inscricao(iid)
+        return resposta(404, {"error":"Admin route not found"})"""
 
-    # POST /asaas/webhook
-    if path.endswith("/asaas/webhook") and method == "POST":
+    cfg = _resolver_rota(method, path)
+    if cfg is None:
+        # CORS
+        if method == "OPTIONS":
+            return resposta(200, {"message":"CORS OK"})
+        logger.warning("Route not found: %s %s", method, path)
+        return resposta(404, {"error":"Route not found"})
+    logs.definir_rota(cfg["nome"])
+
+    req = {
+        "event": event,
+        "context": context,
+        "path": path,
+        "method": method,
+        "qs": qs,
+        "headers": event.get("headers") or {},
+        "rota": cfg,
+        "body": None,
+        "agora": datetime.now(TZ_BRASILIA).isoformat(),
+        "erro": None
+    }
+    return executar_pipeline(req)
+
+
+def executar_pipeline(req):
+    """Roda os hooks pre, o handler da rota e os hooks pos (sempre)."""
+    resp = None
+    for hook in HOOKS_PRE:
+        resp = hook(req)
+        if resp is not None:
+            break
+    if resp is None:
         try:
-            body = json.loads(event.get("body") or "{}")
-        except Exception:
-            logger.warning("Webhook Asaas com body inválido")
+            resp = req["rota"]["fn"](req)
+        except Exception as e:
+            req["erro"] = type(e).__name__
+            logger.exception("Erro não tratado em %s", req["rota"]["nome"])
+            resp = resposta(500, {"error": "Erro interno"})
+    for hook in HOOKS_POS:
+        resp = hook(req, resp)
+    return resp
+
+
+def ler_corpo(req):
+    """Hook pre: faz o parse do body uma única vez conforme a configuração da rota e valida pelo schema."""
+    cfg = req["rota"]
+    if not cfg["corpo"]:
+        return None
+    raw = corpo_bruto(req)
+    if not raw:
+        if cfg["corpo"] == "obrigatorio":
+            return resposta(400, {"error": "Body é obrigatório."})
+        body = {}
+    else:
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            logger.warning("Body inválido em %s", cfg["nome"])
             return resposta(400, {"error": "Body inválido"})
+        if cfg["honeypot"] and body.get("website"):  # honeypot simples
+            logger.warning("Honeypot acionado em %s", cfg["nome"])
+            return resposta(400, {"error": "Solicitação inválida."})
+    req["body"] = body
+    if cfg["validar"]:
+        dados, erros = cfg["validar"](body)
+        if erros:
+            logger.warning("Validação falhou em %s: %s", cfg["nome"], erros)
+            return resposta(400, {"error": validacao.mensagem_erros(erros), "campos": erros})
+        req["dados"] = dados
+    return None
 
-        event_type = (body.get("event") or body.get("eventType") or "").strip()
-        payment = body.get("payment") or {}
-        external_ref = (payment.get("externalReference") or "").strip()
 
-        if not external_ref:
-            logger.warning("Webhook Asaas sem externalReference: %s", body)
-            return resposta(200, {"ok": True})
+def corpo_bruto(req):
+    """Body original da requisição como texto (o API Gateway manda em base64 por causa do binaryMediaTypes)."""
+    raw = req["event"].get("body") or ""
+    if raw and req["event"].get("isBase64Encoded"):
+        raw = base64.b64decode(raw).decode("utf-8")
+    return raw
 
-        status = payment.get("status")
-        now = datetime.now(timezone(timedelta(hours=-3))).isoformat()
 
-        def _to_decimal(v):
-            if v is None or v == "":
-                return None
+def _hook_metricas_inicio(req):
+    req["inicio"] = time.perf_counter()
+    metricas.iniciar()
+    return None
+
+
+def _hook_metricas_fim(req, resp):
+    metricas.finalizar(req["rota"]["nome"], resp["statusCode"], req["inicio"], req["erro"])
+    return resp
+
+
+def header(req, nome):
+    """Lê um header sem diferenciar maiúsculas/minúsculas."""
+    nome = nome.lower()
+    for k, v in req["headers"].items():
+        if k.lower() == nome:
+            return v
+    return None
+
+
+def _hook_cache(req, resp):
+    """Hook pos: aplica o Cache-Control declarado na rota (@rota(..., cache=...)) às respostas 200/304."""
+    politica = req["rota"].get("cache")
+    if politica:
+        resp["headers"]["Cache-Control"] = politica if resp["statusCode"] in (200, 304) else "no-store"
+    return resp
+
+
+def _hook_compressao(req, resp):
+    """
+    Hook pos: comprime com br/gzip (conforme o Accept-Encoding) os corpos acima de
+    COMPRESSAO_MIN_BYTES e devolve em base64 para o API Gateway decodificar.
+    """
+    corpo = resp.get("body")
+    if not corpo or resp.get("isBase64Encoded"):
+        return resp
+    dados = corpo.encode("utf-8")
+    if len(dados) < COMPRESSAO_MIN_BYTES:
+        return resp
+    headers = resp["headers"]
+    headers["Vary"] = "Accept-Encoding"
+    codificacao = escolher_codificacao(header(req, "Accept-Encoding"))
+    if codificacao is None:
+        return resp
+    comprimido = comprimir(dados, codificacao)
+    if len(comprimido) >= len(dados):
+        return resp
+    resp["body"] = base64.b64encode(comprimido).decode("ascii")
+    resp["isBase64Encoded"] = True
+    headers["Content-Encoding"] = codificacao
+    if headers.get("ETag", "").startswith('"'):
+        # mesma versão, outra representação: o ETag forte vira fraco
+        headers["ETag"] = "W/" + headers["ETag"]
+    return resp
+
+
+def escolher_codificacao(accept_encoding):
+    """Escolhe 'br' ou 'gzip' pelo maior q do Accept-Encoding (br ganha empates); None = sem compressão."""
+    if not accept_encoding:
+        return None
+    pesos = {}
+    for parte in accept_encoding.split(","):
+        nome, _, params = parte.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
             try:
-                return Decimal(str(v)).quantize(Decimal("0.01"))
-            except Exception:
-                return None
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        pesos[nome.strip().lower()] = q
+    suportadas = ("br", "gzip") if brotli is not None else ("gzip",)
+    melhor, melhor_q = None, 0.0
+    for codificacao in suportadas:
+        q = pesos.get(codificacao, pesos.get("*", 0.0))
+        if q > melhor_q:
+            melhor, melhor_q = codificacao, q
+    return melhor
+
+
+def comprimir(dados, codificacao):
+    if codificacao == "br":
+        return brotli.compress(dados, quality=COMPRESSAO_NIVEL_BR)
+    return gzip.compress(dados, compresslevel=COMPRESSAO_NIVEL_GZIP, mtime=0)
+
+
+def resposta_condicional(req, versao, corpo, modificado_em=None):
+    """
+    Resposta 200 com ETag (e Last-Modified, se informado) ou 304 sem corpo quando
+    o cliente já tem essa versão. No 304 o corpo nem é serializado.
+      versao: identificador estável do conteúdo (hash do item/catálogo)
+      corpo: objeto a serializar ou JsonPronto
+      modificado_em: datetime em UTC
+    """
+    etag = f'"{versao}"'
+    if_none_match = header(req, "If-None-Match")
+    if if_none_match is not None:
+        # comparação fraca (RFC 9110): ignora o prefixo W/ que CDNs costumam adicionar
+        tags = [t.strip() for t in if_none_match.split(",")]
+        nao_modificado = "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+    else:
+        nao_modificado = modificado_em is not None and _nao_modificado_desde(header(req, "If-Modified-Since"), modificado_em)
 
-        updates = {
-            ":s": status,
-            ":pid": payment.get("id"),
-            ":evt": event_type or None,
-            ":bt": payment.get("billingType"),
-            ":v": _to_decimal(payment.get("value")),
-            ":rv": _to_decimal(payment.get("receivedValue")),
-            ":c": payment.get("customer"),
-            ":u": now
-        }
+    headers = cors_headers()
+    headers["ETag"] = etag
+    if modificado_em is not None:
+        headers["Last-Modified"] = format_datetime(modificado_em, usegmt=True)
+    if nao_modificado:
+        return {"statusCode": 304, "headers": headers, "body": ""}
+    return {"statusCode": 200, "headers": headers, "body": corpo if isinstance(corpo, JsonPronto) else serializar(corpo)}
 
-        try:
-            table_inscricoes.update_item(
-                Key={"id": external_ref},
-                UpdateExpression=(
-                    "SET asaasPaymentStatus = :s, "
-                    "asaasPaymentId = :pid, "
-                    "asaasPaymentEvent = :evt, "
-                    "asaasPaymentBillingType = :bt, "
-                    "asaasPaymentValue = :v, "
-                    "asaasPaymentReceivedValue = :rv, "
-                    "asaasPaymentCustomer = :c, "
-                    "asaasPaymentUpdatedAt = :u, "
-                    "updatedAt = :u"
-                ),
-                ConditionExpression="attribute_exists(id)",
-                ExpressionAttributeValues=updates
+
+def _nao_modificado_desde(valor, modificado_em):
+    if not valor:
+        return False
+    try:
+        return modificado_em <= parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return False
+
+
+def _hook_limite_ip(req):
+    """Hook pre: limite por IP de origem, antes do parse do body e de qualquer acesso ao DynamoDB da rota."""
+    ip = req["event"].get("requestContext", {}).get("identity", {}).get("sourceIp")
+    return verificar_limites(req, {"ip": ip})
+
+
+def _hook_limite_identidade(req):
+    """
+    Hook pre: limites por e-mail/CPF informados no body (ou na query string, nas
+    rotas GET). A repetição de uma Idempotency-Key já registrada não conta: ela
+    recebe a resposta guardada em _hook_idempotencia_inicio, não faz trabalho novo.
+    """
+    fonte = req["body"] if req["body"] is not None else req["qs"]
+    email = fonte.get("email")
+    cpf = fonte.get("cpf")
+    identidades = {
+        "email": normalizar_email(email) if email else None,
+        "cpf": cpf_digitos(cpf) if cpf else None
+    }
+    limites = limites_da_rota(req)
+    # sem limite ativo para as identidades presentes, nem consulta a Idempotencia
+    if not any(valor and limites.get(dimensao) for dimensao, valor in identidades.items()):
+        return None
+    if repeticao_idempotente(req):
+        return None
+    return verificar_limites(req, identidades)
+
+
+def limites_da_rota(req):
+    """Limites por minuto da rota ({dimensão: n}), com a sobrescrita de LIMITES_TAXA."""
+    nome = req["rota"]["nome"]
+    limites = req["rota"].get("limites") or {}
+    if nome in LIMITES_TAXA:
+        limites = {**limites, **LIMITES_TAXA[nome]}
+    return limites
+
+
+def verificar_limites(req, identidades):
+    """429 com Retry-After se alguma identidade ({dimensão: valor}) estourou o limite da rota."""
+    nome = req["rota"]["nome"]
+    limites = limites_da_rota(req)
+    if not limites:
+        return None
+    for dimensao, valor in identidades.items():
+        por_minuto = limites.get(dimensao)
+        if not por_minuto or not valor:
+            continue
+        # hash para não gravar IP/e-mail/CPF em claro na tabela de limites
+        digest = hashlib.sha256(str(valor).encode("utf-8")).hexdigest()[:32]
+        espera = consumir_limite(f"{nome}#{dimensao}#{digest}", por_minuto)
+        if espera:
+            logger.warning("Rate limit em %s por %s (Retry-After %ss)", nome, dimensao, espera)
+            resp = resposta(429, {"error": "Muitas requisições. Tente novamente em instantes."})
+            resp["headers"]["Retry-After"] = str(espera)
+            return resp
+    return None
+
+
+def consumir_limite(chave, por_minuto):
+    """
+    Consome uma ficha do limite `chave`; devolve 0 se liberou ou os segundos até
+    haver ficha de novo. O bucket local (capacidade por_minuto, reposição
+    contínua) barra rajadas deste container sem I/O; o que passa por ele soma no
+    contador da janela no DynamoDB, compartilhado entre as Lambdas. Falha no
+    DynamoDB não bloqueia ninguém (o bucket local continua valendo).
+    """
+    agora = time.time()
+    taxa = por_minuto / LIMITE_JANELA_SEGUNDOS
+    bucket = _buckets.get(chave)
+    if bucket is None:
+        bucket = _buckets[chave] = [float(por_minuto), agora]
+        if len(_buckets) > LIMITE_BUCKETS_MAX:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(chave)
+        bucket[0] = min(float(por_minuto), bucket[0] + (agora - bucket[1]) * taxa)
+        bucket[1] = agora
+    if bucket[0] < 1:
+        limite_taxa_stats["bloqueios_locais"] += 1
+        return math.ceil((1 - bucket[0]) / taxa)
+    bucket[0] -= 1
+
+    janela = int(agora // LIMITE_JANELA_SEGUNDOS)
+    fim_janela = (janela + 1) * LIMITE_JANELA_SEGUNDOS
+    try:
+        table_limites.update_item(
+            Key={"chave": f"{chave}#{janela}"},
+            UpdateExpression="SET expiraEm = if_not_exists(expiraEm, :exp) ADD contagem :um",
+            ConditionExpression="attribute_not_exists(contagem) OR contagem < :limite",
+            ExpressionAttributeValues={":um": 1, ":limite": por_minuto, ":exp": fim_janela + LIMITE_JANELA_SEGUNDOS}
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            logger.exception("Erro no contador de rate limit %s; seguindo só com o limite local", chave)
+            return 0
+        # a janela já foi gasta por outras Lambdas: esvazia o bucket local até ela virar,
+        # para as próximas requisições deste container nem chegarem ao DynamoDB
+        limite_taxa_stats["bloqueios_compartilhados"] += 1
+        bucket[0] = 1 - (fim_janela - agora) * taxa
+        return max(1, math.ceil(fim_janela - agora))
+    except Exception:
+        logger.exception("Erro no contador de rate limit %s; seguindo só com o limite local", chave)
+    return 0
+
+
+def chave_idempotencia(req):
+    """Registro em Idempotencia da Idempotency-Key da requisição, ou None se a rota/requisição não usa."""
+    if not req["rota"].get("idempotente"):
+        return None
+    chave = (header(req, "Idempotency-Key") or "").strip()
+    if not chave or len(chave) > 255:
+        return None
+    return f"{req['rota']['nome']}#{chave}"
+
+
+def repeticao_idempotente(req):
+    """True se a Idempotency-Key já tem registro vigente com o mesmo body (concluído ou em andamento)."""
+    registro = chave_idempotencia(req)
+    if registro is None:
+        return False
+    item = table_idempotencia.get_item(
+        Key={"chave": registro},
+        ProjectionExpression="impressao, expiraEm"
+    ).get("Item")
+    return bool(item) and item.get("expiraEm", 0) >= int(time.time()) and \
+        item.get("impressao") == hashlib.sha256(corpo_bruto(req).encode("utf-8")).hexdigest()
+
+
+def _hook_idempotencia_inicio(req):
+    """
+    Hook pre das rotas idempotentes: a primeira requisição com a Idempotency-Key
+    trava a chave e segue; as repetidas recebem a resposta guardada (esperando
+    até IDEMPOTENCIA_ESPERA_SEGUNDOS se a primeira ainda estiver rodando).
+    """
+    if not req["rota"].get("idempotente"):
+        return None
+    chave = (header(req, "Idempotency-Key") or "").strip()
+    if not chave:
+        return None
+    if len(chave) > 255:
+        return resposta(400, {"error": "Idempotency-Key muito longa (máx. 255)."})
+
+    registro = f"{req['rota']['nome']}#{chave}"
+    impressao = hashlib.sha256(corpo_bruto(req).encode("utf-8")).hexdigest()
+    if _travar_idempotencia(req, registro, impressao):
+        return None
+
+    limite = time.monotonic() + IDEMPOTENCIA_ESPERA_SEGUNDOS
+    if req["context"] is not None:
+        limite = min(limite, time.monotonic() + req["context"].get_remaining_time_in_millis() / 2000)
+    while True:
+        item = table_idempotencia.get_item(Key={"chave": registro}, ConsistentRead=True).get("Item")
+        if not item:
+            # a primeira tentativa falhou com 5xx e apagou o registro: esta refaz o trabalho
+            if _travar_idempotencia(req, registro, impressao):
+                logger.info("Idempotency-Key retomada após falha da primeira tentativa: %s", registro)
+                return None
+            continue
+        if item.get("impressao") and item["impressao"] != impressao:
+            return resposta(422, {"error": "Idempotency-Key já usada com outro conteúdo."})
+        if item.get("status") == "CONCLUIDO":
+            resp = json.loads(item["resposta"])
+            resp["headers"]["Idempotent-Replayed"] = "true"
+            logger.info("Resposta idempotente reaproveitada: %s", registro)
+            return resp
+        if time.monotonic() >= limite:
+            return resposta(409, {"error": "Requisição com esta Idempotency-Key ainda em processamento."})
+        time.sleep(0.25)
+
+
+def _travar_idempotencia(req, registro, impressao):
+    """Cria (ou assume, se expirado ou com a trava vencida) o registro EM_ANDAMENTO; False se outro o tem."""
+    agora = int(time.time())
+    try:
+        table_idempotencia.put_item(
+            Item={
+                "chave": registro,
+                "status": "EM_ANDAMENTO",
+                "impressao": impressao,
+                "criadoEm": req["agora"],
+                "travaAte": agora + IDEMPOTENCIA_TRAVA_SEGUNDOS,
+                "expiraEm": agora + IDEMPOTENCIA_TTL_SEGUNDOS
+            },
+            ConditionExpression=(
+                "attribute_not_exists(chave) OR expiraEm < :agora OR "
+                "(#st = :andamento AND travaAte < :agora)"
+            ),
+            ExpressionAttributeNames={"#st": "status"},
+            ExpressionAttributeValues={":agora": agora, ":andamento": "EM_ANDAMENTO"}
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+        return False
+    req["idempotencia"] = registro
+    return True
+
+
+def _hook_idempotencia_fim(req, resp):
+    registro = req.get("idempotencia")
+    if not registro:
+        return resp
+    try:
+        if resp["statusCode"] >= 500:
+            # falha: libera a chave para a próxima tentativa refazer o trabalho
+            table_idempotencia.delete_item(Key={"chave": registro})
+        else:
+            table_idempotencia.update_item(
+                Key={"chave": registro},
+                UpdateExpression="SET #st = :c, resposta = :r",
+                ExpressionAttributeNames={"#st": "status"},
+                ExpressionAttributeValues={":c": "CONCLUIDO", ":r": json.dumps(resp)}
             )
-            logger.info("Webhook Asaas atualizado: %s status=%s", external_ref, status)
-        except ClientError as e:
-            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
-                logger.warning("Inscrição não encontrada para externalReference=%s", external_ref)
-                return resposta(200, {"ok": True})
-            logger.exception("Erro ao atualizar inscrição via webhook Asaas")
-            return resposta(500, {"error": "Erro ao atualizar inscrição"})
+    except Exception:
+        logger.exception("Erro ao gravar resposta idempotente %s", registro)
+    return resp
+
+
+HOOKS_PRE.append(_hook_metricas_inicio)
+# rate limit e validação do body antes de qualquer escrita (a idempotência já grava no DynamoDB)
+HOOKS_PRE.append(_hook_limite_ip)
+HOOKS_PRE.append(ler_corpo)
+HOOKS_PRE.append(_hook_limite_identidade)
+HOOKS_PRE.append(_hook_idempotencia_inicio)
+HOOKS_POS.append(_hook_idempotencia_fim)
+HOOKS_POS.append(_hook_cache)
+HOOKS_POS.append(_hook_compressao)
+# as métricas ficam por último para medir todo o pipeline
+HOOKS_POS.append(_hook_metricas_fim)
+
+
+# Schemas dos bodies POST (validacao.compilar roda no registro da rota)
+SCHEMA_ALUNO = {
+    "nomeCompleto":   validacao.texto(obrigatorio=True, maximo=120),
+    "cpf":            validacao.cpf(obrigatorio=True),
+    "rg":             validacao.texto(maximo=20),
+    "email":          validacao.email(obrigatorio=True),
+    "whatsapp":       validacao.texto(maximo=30),
+    "sexo":           validacao.texto(maximo=30),
+    "dataNascimento": validacao.texto(maximo=30),
+    "formacaoTI":     validacao.texto(maximo=100),
+    "ondeEstuda":     validacao.texto(maximo=200),
+    "comoSoube":      validacao.texto(maximo=100),
+    "nomeAmigo":      validacao.texto(maximo=120),
+    "aceitouTermos":  validacao.booleano()
+}
+validar_aluno = validacao.compilar(SCHEMA_ALUNO)
+CAMPO_CURSO = validacao.texto(obrigatorio=True, maximo=200)
+CAMPO_CUPOM = validacao.texto(maximo=50, maiusculas=True)
+CAMPO_INSCRICAO_ID = validacao.texto(obrigatorio=True, maximo=64)
+
+
+# GET /pagamento-info?inscricaoId=...
+# dado pessoal: nada de cache compartilhado, mas o navegador pode revalidar com If-None-Match
+@rota("GET", "/pagamento-info", cache="private, no-cache", limites={"ip": 60})
+def rota_pagamento_info(req):
+    iid = (req["qs"].get("inscricaoId") or "").strip()
+    if not iid:
+        return resposta(400, {"error": "Parâmetro 'inscricaoId' é obrigatório."})
+    try:
+        versao, documento = montar_pagamento_info(iid)
+        return resposta_condicional(req, versao, documento)
+    except ValueError as ve:
+        logger.warning("Pagamento-info inválido: %s", ve)
+        return resposta(400, {"error": str(ve)})
+    except Exception:
+        logger.exception("Erro ao montar pagamento-info")
+        return resposta(500, {"error": "Erro interno ao montar pagamento-info"})
+
 
+# POST /asaas/webhook
+@rota("POST", "/asaas/webhook", corpo="opcional")
+def rota_asaas_webhook(req):
+    """
+    Registra o evento bruto em AsaasEventos e responde logo; a atualização da
+    inscrição acontece em processar_fila_eventos_asaas (ou na hora, sem fila).
+    """
+    body = req["body"]
+    payment = body.get("payment") or {}
+    external_ref = (payment.get("externalReference") or "").strip()
+
+    if not external_ref:
+        logger.warning("Webhook Asaas sem externalReference")
+        logs.payload("Webhook Asaas sem externalReference", body)
         return resposta(200, {"ok": True})
 
-    # POST /isAssinatura
-    if path.endswith("/isAssinatura") and method == "POST":
-        logger.info("isAssinatura request body: %s", event.get("body"))
+    evento = montar_evento_asaas(body, corpo_bruto(req), req["agora"])
+    try:
+        # reentregas de eventos já processados são descartadas aqui
+        table_asaas_eventos.put_item(
+            Item=evento,
+            ConditionExpression="attribute_not_exists(id) OR attribute_not_exists(processadoEm)"
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            logger.info("Webhook Asaas duplicado ignorado: %s", evento["id"])
+            return resposta(200, {"ok": True})
+        logger.exception("Erro ao registrar evento do webhook Asaas")
+        return resposta(500, {"error": "Erro ao registrar evento"})
+
+    if ASAAS_EVENTOS_QUEUE_URL:
         try:
-            body = json.loads(event.get("body", "{}"))
-            iid = (body.get("inscricaoId") or "").strip()
-            valor_assinatura = bool(body.get("isAssinatura", True))
+            sqs.send_message(QueueUrl=ASAAS_EVENTOS_QUEUE_URL, MessageBody=json.dumps({"id": evento["id"]}))
+        except Exception:
+            # evento já está gravado; fica pendente para reprocessar_eventos_asaas
+            logger.exception("Erro ao enfileirar evento Asaas %s", evento["id"])
+        return resposta(200, {"ok": True})
 
-            if not iid:
-                logger.warning("inscricaoId ausente em /isAssinatura")
-                return resposta(400, {"error": "Parâmetro 'inscricaoId' é obrigatório."})
+    try:
+        aplicar_evento_asaas(evento)
+    except Exception:
+        logger.exception("Erro ao atualizar inscrição via webhook Asaas")
+        return resposta(500, {"error": "Erro ao atualizar inscrição"})
+    return resposta(200, {"ok": True})
+
+
+# POST /isAssinatura
+@rota("POST", "/isAssinatura", corpo="opcional", limites={"ip": 10}, schema={
+    "inscricaoId": CAMPO_INSCRICAO_ID,
+    "isAssinatura": validacao.booleano(padrao=True)
+})
+def rota_is_assinatura(req):
+    dados = req["dados"]
+    logs.payload("isAssinatura request body", req["body"])
+    try:
+        iid = dados["inscricaoId"]
+        valor_assinatura = dados["isAssinatura"]
+
+        # busca inscrição
+        resp = table_inscricoes.get_item(Key={"id": iid})
+        insc = resp.get("Item")
+        if not insc:
+            logger.warning("Inscrição %s não encontrada em /isAssinatura", iid)
+            return resposta(404, {"error": f"Inscrição '{iid}' não encontrada"})
+
+        nome_curso = insc.get("curso", "")
+        if FULLSTACK_NOME_CURSO not in nome_curso:
+            logger.info("Bloqueado /isAssinatura: curso '%s' não contém '%s'", nome_curso, FULLSTACK_NOME_CURSO)
+            return resposta(403, {
+                "error": f"Ação permitida apenas para inscrições do curso que contenha '{FULLSTACK_NOME_CURSO}'."})
+
+        # Já existe pedido gravado?
+        ja_solicitada = bool(insc.get("isAssinatura"))
+        if valor_assinatura and ja_solicitada:
+            return resposta(200, {
+                "message": "Assinatura já havia sido solicitada anteriormente.",
+                "inscricaoId": iid,
+                "isAssinatura": True,
+                "alreadyExisted": True,
+                "assinaturaSolicitadaEm": insc.get("assinaturaSolicitadaEm")
+            })
 
-            # busca inscrição
-            resp = table_inscricoes.get_item(Key={"id": iid})
-            insc = resp.get("Item")
-            if not insc:
-                logger.warning("Inscrição %s não encontrada em /isAssinatura", iid)
-                return resposta(404, {"error": f"Inscrição '{iid}' não encontrada"})
-
-            nome_curso = insc.get("curso", "")
-            if FULLSTACK_NOME_CURSO not in nome_curso:
-                logger.info("Bloqueado /isAssinatura: curso '%s' não contém '%s'", nome_curso, FULLSTACK_NOME_CURSO)
-                return resposta(403, {
-                    "error": f"Ação permitida apenas para inscrições do curso que contenha '{FULLSTACK_NOME_CURSO}'."})
-
-            # Já existe pedido gravado?
-            ja_solicitada = bool(insc.get("isAssinatura"))
-            if valor_assinatura and ja_solicitada:
-                return resposta(200, {
-                    "message": "Assinatura já havia sido solicitada anteriormente.",
-                    "inscricaoId": iid,
-                    "isAssinatura": True,
-                    "alreadyExisted": True,
-                    "assinaturaSolicitadaEm": insc.get("assinaturaSolicitadaEm")
-                })
+        # Atualiza apenas se mudou (idempotente)
+        agora = req["agora"]
+        expressao = "SET isAssinatura = :v, assinaturaSolicitadaEm = :u, updatedAt = :u"
+        valores = {":v": valor_assinatura, ":u": agora}
+        curso_item = buscar_curso_por_titulo(nome_curso.strip())
+        if curso_item:
+            # pagamento-info reflete a assinatura, então é regravado no mesmo update
+            materializado = pagamento_info_materializado(
+                {**insc, "isAssinatura": valor_assinatura, "assinaturaSolicitadaEm": agora}, curso_item)
+            if materializado:
+                expressao += ", pagamentoInfoJson = :pij, pagamentoInfoVersao = :piv"
+                valores.update({":pij": materializado["pagamentoInfoJson"], ":piv": materializado["pagamentoInfoVersao"]})
+        try:
+            upd = table_inscricoes.update_item(
+                Key={"id": iid},
+                UpdateExpression=expressao,
+                ConditionExpression="attribute_not_exists(isAssinatura) OR isAssinatura <> :v",
+                ExpressionAttributeValues=valores,
+                ReturnValues="ALL_NEW"
+            )
+            item_atualizado = {
+                k: v for k, v in upd.get("Attributes", {}).items() if k not in CAMPOS_MATERIALIZADOS
+            }
+            logger.info("Inscrição %s atualizada isAssinatura=%s", iid, valor_assinatura)
 
-            # Atualiza apenas se mudou (idempotente)
-            agora = datetime.now(timezone(timedelta(hours=-3))).isoformat()
+            # e-mails: admin + aluno
             try:
-                upd = table_inscricoes.update_item(
-                    Key={"id": iid},
-                    UpdateExpression="SET isAssinatura = :v, assinaturaSolicitadaEm = :u, updatedAt = :u",
-                    ConditionExpression="attribute_not_exists(isAssinatura) OR isAssinatura <> :v",
-                    ExpressionAttributeValues={":v": valor_assinatura, ":u": agora},
-                    ReturnValues="ALL_NEW"
+                enfileirar_emails(
+                    ("assinatura_admin", item_atualizado),
+                    ("assinatura_aluno", item_atualizado)
                 )
-                item_atualizado = upd.get("Attributes", {})
-                logger.info("Inscrição %s atualizada isAssinatura=%s", iid, valor_assinatura)
-
-                # e-mails: admin + aluno
-                try:
-                    enviar_email_admin_is_assinatura(item_atualizado)
-                except Exception:
-                    logger.exception("Erro ao enviar email admin de assinatura")
-                try:
-                    enviar_email_confirmacao_assinatura_aluno(item_atualizado)
-                except Exception:
-                    logger.exception("Erro ao enviar email aluno de assinatura")
+            except Exception:
+                logger.exception("Erro ao enfileirar e-mails de assinatura")
 
+            return resposta(200, {
+                "message": "Solicitação de pagamento em mensalidades registrada com sucesso.",
+                "inscricaoId": iid,
+                "isAssinatura": True,
+                "assinaturaSolicitadaEm": agora
+            })
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                # outro processo gravou; comporta-se como já existente
                 return resposta(200, {
-                    "message": "Solicitação de pagamento em mensalidades registrada com sucesso.",
+                    "message": "Assinatura já havia sido solicitada anteriormente.",
                     "inscricaoId": iid,
                     "isAssinatura": True,
-                    "assinaturaSolicitadaEm": agora
+                    "alreadyExisted": True,
+                    "assinaturaSolicitadaEm": insc.get("assinaturaSolicitadaEm") or agora
                 })
-            except ClientError as e:
-                if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
-                    # outro processo gravou; comporta-se como já existente
-                    return resposta(200, {
-                        "message": "Assinatura já havia sido solicitada anteriormente.",
-                        "inscricaoId": iid,
-                        "isAssinatura": True,
-                        "alreadyExisted": True,
-                        "assinaturaSolicitadaEm": insc.get("assinaturaSolicitadaEm") or agora
-                    })
-                raise
+            raise
 
-        except Exception:
-            logger.exception("Erro no endpoint /isAssinatura")
-            return resposta(500, {"error": "Erro interno ao atualizar isAssinatura"})
-
-    # POST /lista-espera
-    if path.endswith("/lista-espera") and method == "POST":
-        body_raw = event.get("body")
-        logger.info("Lista de Espera payload: %s", body_raw)
-        if not body_raw:
-            return resposta(400, {"error": "Body é obrigatório."})
-        body = json.loads(body_raw)
-        if body.get("website"):  # honeypot simples
-            logger.warning("Honeypot acionado em lista-espera")
-            return resposta(400, {"error": "Solicitação inválida."})
+    except Exception:
+        logger.exception("Erro no endpoint /isAssinatura")
+        return resposta(500, {"error": "Erro interno ao atualizar isAssinatura"})
 
-        nome = (body.get("nome") or "").strip()
-        curso = (body.get("curso") or "").strip()
-        email = (body.get("email") or "").strip()
-        telefone = (body.get("telefone") or "").strip()
-        como_conheceu = (body.get("comoConheceu") or "").strip()
-
-        if not all([nome, curso, email, telefone, como_conheceu]):
-            logger.warning("Campos obrigatórios ausentes em lista-espera: %s", body)
-            return resposta(400, {"error": "Nome, curso, email, telefone e comoConheceu são obrigatórios."})
-
-        agora = datetime.now(timezone(timedelta(hours=-3))).isoformat()
-        item = {
-            "id": str(uuid.uuid4()),
-            "nome": nome,
-            "curso": curso,
-            "email": email,
-            "telefone": telefone,
-            "comoConheceu": como_conheceu,
-            "criadoEm": agora
-        }
 
-        table_lista_espera.put_item(Item=item)
-        logger.info("Registro salvo na ListaDeEspera: %s", item)
+# POST /lista-espera
+@rota("POST", "/lista-espera", corpo="obrigatorio", honeypot=True, limites={"ip": 10, "email": 3}, schema={
+    "nome":         validacao.texto(obrigatorio=True, maximo=120),
+    "curso":        CAMPO_CURSO,
+    "email":        validacao.email(obrigatorio=True),
+    "telefone":     validacao.texto(obrigatorio=True, maximo=30),
+    "comoConheceu": validacao.texto(obrigatorio=True, maximo=100)
+})
+def rota_lista_espera(req):
+    logs.payload("Lista de Espera payload", req["body"])
 
-        try:
-            enviar_email_admin_lista_espera(item)
-        except Exception:
-            logger.exception("Erro ao enviar e-mail para admin na lista-espera")
-
-        return resposta(201, {"message": "Registro incluído na lista de espera."})
-
-    # POST /clube/interesse
-    if path.endswith("/clube/interesse") and method == "POST":
-        body = json.loads(event.get("body", "{}"))
-        logger.info("Clube Interesse POST payload: %s", body)
-        if body.get("website"):
-            logger.warning("Honeypot triggered for clube/interesse")
-            return resposta(400, {"error":"Solicitação inválida."})
-        nome, email, aceita = body.get("nome"), body.get("email"), body.get("aceitaContato")
-        if not nome or not email or not aceita:
-            logger.warning("Missing required fields in clube/interesse")
-            return resposta(400, {"error":"Nome, email e aceitaContato são obrigatórios."})
-        if verificar_interesse_existente(email):
-            logger.info("Email %s já cadastrado no clube", email)
-            return resposta(409, {"error":f"Email {email} já cadastrado."})
-        item = {
-            "id": str(uuid.uuid4()),
-            "nome": nome,
-            "email": email,
-            "whatsapp": body.get("whatsapp",""),
-            "interesse": body.get("interesses",[]),
-            "aceita_contato": aceita,
-            "dataCadastro": datetime.now(timezone(timedelta(hours=-3))).isoformat()
-        }
-        table_interesse.put_item(Item=item)
-        logger.info("Novo membro do clube salvo: %s", item)
-        try:
-            enviar_email_boas_vindas_clube(item)
-            enviar_email_admin_clube(item)
-        except Exception:
-            logger.exception("Erro enviando e-mails clube")
-        return resposta(201, {"message":"Cadastro no Clube realizado."})
-
-    # GET /clube/interesse?email=...
-    if path.endswith("/clube/interesse") and method == "GET":
-        email = qs.get("email","").strip()
-        logger.info("Clube Interesse GET query: email=%s", email)
-        if not email:
-            return resposta(400, {"error":"Parâmetro 'email' é obrigatório."})
+    item = {
+        "id": str(uuid.uuid4()),
+        **req["dados"],
+        "criadoEm": req["agora"]
+    }
+
+    table_lista_espera.put_item(Item=item)
+    logs.payload("Registro salvo na ListaDeEspera", item, id=item["id"])
+
+    try:
+        enfileirar_emails(("lista_espera_admin", item))
+    except Exception:
+        logger.exception("Erro ao enfileirar e-mail para admin na lista-espera")
+
+    return resposta(201, {"message": "Registro incluído na lista de espera."})
+
+
+# POST /clube/interesse
+@rota("POST", "/clube/interesse", corpo="opcional", honeypot=True, limites={"ip": 10, "email": 3}, schema={
+    "nome":          validacao.texto(obrigatorio=True, maximo=120),
+    "email":         validacao.email(obrigatorio=True),
+    "aceitaContato": validacao.booleano(obrigatorio=True),
+    "whatsapp":      validacao.texto(maximo=30),
+    "interesses":    validacao.lista(max_itens=20, itens=validacao.texto(maximo=100))
+})
+def rota_clube_interesse_post(req):
+    dados = req["dados"]
+    logs.payload("Clube Interesse POST payload", req["body"])
+    nome, email, aceita = dados["nome"], dados["email"], dados["aceitaContato"]
+    if verificar_interesse_existente(email):
+        logger.info("Email %s já cadastrado no clube", email)
+        return resposta(409, {"error":f"Email {email} já cadastrado."})
+    item = {
+        "id": str(uuid.uuid4()),
+        "nome": nome,
+        "email": email,
+        "whatsapp": dados["whatsapp"],
+        "interesse": dados["interesses"],
+        "aceita_contato": aceita,
+        "dataCadastro": req["agora"],
+        "diaCadastro": dia_cadastro(req["agora"])
+    }
+    table_interesse.put_item(Item=item)
+    if _filtro_interesse["filtro"] is not None:
+        _filtro_interesse["filtro"].adicionar(normalizar_email(email))
+    logs.payload("Novo membro do clube salvo", item, id=item["id"])
+    try:
+        enfileirar_emails(("clube_boas_vindas", item), ("clube_admin", item))
+    except Exception:
+        logger.exception("Erro enfileirando e-mails clube")
+    return resposta(201, {"message":"Cadastro no Clube realizado."})
+
+
+# GET /clube/interesse?email=...
+@rota("GET", "/clube/interesse", limites={"ip": 30, "email": 10})
+def rota_clube_interesse_get(req):
+    email = req["qs"].get("email","").strip()
+    logger.info("Clube Interesse GET query: email=%s", email)
+    if not email:
+        return resposta(400, {"error":"Parâmetro 'email' é obrigatório."})
+    if email_pode_estar_no_clube(email):
         existe = verificar_interesse_existente(email)
-        logger.info("Clube check for %s: %s", email, existe)
-        return resposta(200, {"existe": existe})
-
-    # GET /checa-cupom?cupom=XXX&curso=YYY
-    if path.endswith("/checa-cupom") and method == "GET":
-        cupom = qs.get("cupom","").strip().upper()
-        curso = qs.get("curso","").strip()
-        logger.info("Checagem de cupom: cupom=%s curso=%s", cupom, curso)
-        if not cupom or not curso:
-            return resposta(400, {"error":"Parâmetros 'cupom' e 'curso' são obrigatórios."})
-
-        resp = table_descontos.scan(
-            FilterExpression="cupom = :c AND curso = :u AND ativo = :t AND disponivel = :t",
-            ExpressionAttributeValues={":c":cupom, ":u":curso, ":t":True}
+        filtro_interesse_stats["confirmados" if existe else "falsos_positivos"] += 1
+    else:
+        existe = False
+        filtro_interesse_stats["negativos"] += 1
+    logger.info("Clube check for %s: %s", email, existe)
+    return resposta(200, {"existe": existe})
+
+
+# GET /checa-cupom?cupom=XXX&curso=YYY
+@rota("GET", "/checa-cupom", limites={"ip": 30})
+def rota_checa_cupom(req):
+    cupom = req["qs"].get("cupom","").strip().upper()
+    curso = req["qs"].get("curso","").strip()
+    logger.info("Checagem de cupom: cupom=%s curso=%s", cupom, curso)
+    if not cupom or not curso:
+        return resposta(400, {"error":"Parâmetros 'cupom' e 'curso' são obrigatórios."})
+
+    return resposta(200, corpo_checa_cupom(cupom, curso))
+
+
+# POST /paymentlink
+@rota("POST", "/paymentlink", corpo="opcional", idempotente=True, limites={"ip": 20}, schema={
+    "inscricaoId":   CAMPO_INSCRICAO_ID,
+    "paymentMethod": validacao.texto(maiusculas=True, opcoes=PAYMENTLINK_METODOS, padrao="PIX")
+})
+def rota_paymentlink(req):
+    import asaas_client
+    logs.payload("PaymentLink request body", req["body"])
+    try:
+        iid = req["dados"]["inscricaoId"]
+        pm = req["dados"]["paymentMethod"]
+
+        resp = table_inscricoes.get_item(
+            Key={"id": iid},
+            ProjectionExpression="id, nomeCompleto, curso, valorCurso, paymentLinks"
         )
-        items = resp.get("Items", [])
-        valid = bool(items)
+        insc = resp.get("Item")
+        if not insc:
+            logger.warning("Inscrição %s não encontrada", iid)
+            return resposta(404, {"error": f"Inscrição '{iid}' não encontrada"})
 
-        # pega o valor do desconto (ex: "10%" ou "R$10,00") se existir
-        desconto = items[0]["desconto"] if valid else None
-        logger.info("Cupom %s válido? %s desconto=%s", cupom, valid, desconto)
+        # Normalmente o link já foi pré-criado pelo worker; reaproveita para evitar múltiplas cobranças
+        link = (insc.get("paymentLinks") or {}).get(pm)
+        if not link_valido(link, pm):
+            logger.info("Sem paymentLink %s válido para %s; criando na hora", pm, iid)
+            link = gerar_paymentlink(insc, pm, prazo_da_invocacao(req["context"]))
 
         return resposta(200, {
-            "valid": valid,
-            "desconto": desconto
+            "inscricaoId": iid,
+            "paymentMethod": pm,
+            "descontoExtraPix": link.get("descontoExtraPix") or 0.0,
+            "valorFinal": link.get("valorFinal"),
+            "paymentLinkId": link.get("id"),
+            "url": link.get("url")
         })
 
-    # POST /paymentlink
-    if path.endswith("/paymentlink") and method == "POST":
-        logger.info("PaymentLink request body: %s", event.get("body"))
-        try:
-            body = json.loads(event.get("body", "{}"))
-            iid = body.get("inscricaoId", "").strip()
-            pm = body.get("paymentMethod", "PIX").upper()
-            if not iid or pm not in ("PIX", "CARTAO"):
-                logger.warning("Invalid paymentlink parameters: %s", body)
-                return resposta(400, {"error": "inscricaoId e paymentMethod válidos são obrigatórios."})
-
-            # Busca inscrição e pega valorCurso
-            resp = table_inscricoes.get_item(Key={"id": iid})
-            insc = resp.get("Item")
-            if not insc:
-                logger.warning("Inscrição %s não encontrada", iid)
-                return resposta(404, {"error": f"Inscrição '{iid}' não encontrada"})
-
-            aluno = insc.get("nomeCompleto", "")
-            curso = insc.get("curso", "")
-
-            # Reaproveita link existente para evitar múltiplas cobranças por clique
-            existing_links = insc.get("paymentLinks") or {}
-            existing = existing_links.get(pm) or {}
-            existing_url = existing.get("url")
-            existing_created = existing.get("createdAt")
-            existing_ttl_days = existing.get("dueDateLimitDays")
-            if not existing_ttl_days:
-                existing_ttl_days = 2 if pm == "PIX" else 7
-            link_expired = False
-            if existing_created:
-                try:
-                    created_dt = datetime.fromisoformat(existing_created)
-                    expires_dt = created_dt + timedelta(days=int(existing_ttl_days))
-                    link_expired = datetime.now(timezone(timedelta(hours=-3))) > expires_dt
-                except Exception:
-                    logger.warning("Não foi possível validar expiração do paymentLink para %s", iid)
-            if existing_url and not link_expired:
-                valor_final = existing.get("valorFinal")
-                desconto_extra = existing.get("descontoExtraPix", 0.0)
-                if isinstance(valor_final, Decimal):
-                    valor_final = float(valor_final)
-                if isinstance(desconto_extra, Decimal):
-                    desconto_extra = float(desconto_extra)
-                return resposta(200, {
-                    "inscricaoId": iid,
-                    "paymentMethod": pm,
-                    "descontoExtraPix": desconto_extra or 0.0,
-                    "valorFinal": valor_final,
-                    "paymentLinkId": existing.get("id"),
-                    "url": existing_url
-                })
-
-            # Aqui pegamos o valor já calculado e armazenado na inscrição:
-            valor_decimal = insc.get("valorCurso", 0)
-            # Se vier como Decimal, converte para float:
-            valor = float(valor_decimal) if isinstance(valor_decimal, (Decimal,)) else float(valor_decimal)
-
-            logger.info("Found inscrição %s: aluno=%s, curso=%s, valor=%s", iid, aluno, curso, valor)
-            link = criar_paymentlink_asaas(curso, aluno, valor, pm, iid)
-            asaas_resp = link.get("asaas", {})  # novo formato
-
-            logger.info("Asaas link created: %s", asaas_resp.get("url"))
-
-            # Persiste link por método para reutilização futura
-            agora = datetime.now(timezone(timedelta(hours=-3))).isoformat()
-            valor_final_dec = Decimal(str(link.get("valorFinal"))).quantize(Decimal("0.01"))
-            desconto_dec = Decimal(str(link.get("descontoExtraPix", 0.0))).quantize(Decimal("0.01"))
-            link_info = {
-                "id": asaas_resp.get("id"),
-                "url": asaas_resp.get("url"),
-                "paymentMethod": pm,
-                "createdAt": agora,
-                "dueDateLimitDays": 2 if pm == "PIX" else 7,
-                "valorFinal": valor_final_dec,
-                "descontoExtraPix": desconto_dec
-            }
-            try:
-                table_inscricoes.update_item(
-                    Key={"id": iid},
-                    UpdateExpression="SET paymentLinks = if_not_exists(paymentLinks, :empty)",
-                    ExpressionAttributeValues={":empty": {}}
-                )
-                table_inscricoes.update_item(
-                    Key={"id": iid},
-                    UpdateExpression="SET paymentLinks.#pm = :v, updatedAt = :u",
-                    ExpressionAttributeNames={"#pm": pm},
-                    ExpressionAttributeValues={":v": link_info, ":u": agora}
-                )
-            except Exception:
-                logger.exception("Erro ao salvar paymentLink na inscrição %s", iid)
-
-            return resposta(200, {
-                "inscricaoId": iid,
-                "paymentMethod": pm,
-                "descontoExtraPix": link.get("descontoExtraPix", 0.0),
-                "valorFinal": link.get("valorFinal"),
-                "paymentLinkId": asaas_resp.get("id"),
-                "url": asaas_resp.get("url")
-            })
+    except asaas_client.AsaasIndisponivel as e:
+        logger.error("Asaas indisponível ao gerar paymentlink: %s", e)
+        return resposta(503, {"error": "Serviço de pagamento indisponível no momento. Tente novamente em instantes."})
+    except Exception:
+        logger.exception("Erro ao gerar paymentlink")
+        return resposta(500, {"error": "Erro interno ao gerar paymentlink"})
 
-        except Exception:
-            logger.exception("Erro ao gerar paymentlink")
-            return resposta(500, {"error": "Erro interno ao gerar paymentlink"})
 
-    # GET /cursos or GET /cursos?id=...
-    if path.endswith("/cursos") and method == "GET":
-        cid = qs.get("id")
-        logger.info("Listar cursos, id=%s", cid)
-        try:
-            if cid:
-                item = table_cursos.get_item(Key={"id": cid}).get("Item")
-                if not item:
-                    logger.warning("Curso %s não encontrado", cid)
-                    return resposta(404, {"error":f"Curso '{cid}' não encontrado"})
-                return resposta(200, item)
-            else:
-                items = table_cursos.scan().get("Items",[])
-                logger.info("Total cursos retornados: %d", len(items))
-                return resposta(200, items)
-        except Exception:
-            logger.exception("Erro listando cursos")
-            return resposta(500, {"error":"Falha ao buscar cursos"})
+# GET /cursos or GET /cursos?id=...
+@rota("GET", "/cursos", cache="public, max-age=300, stale-while-revalidate=60")
+def rota_cursos(req):
+    cid = req["qs"].get("id")
+    logger.info("Listar cursos, id=%s", cid)
+    try:
+        if cid:
+            item = buscar_curso_por_id(cid)
+            if not item:
+                logger.warning("Curso %s não encontrado", cid)
+                return resposta(404, {"error":f"Curso '{cid}' não encontrado"})
+            return resposta_condicional(
+                req, f"{_catalogo['versao']}-{cid}", _catalogo["json_por_id"][cid], _catalogo["modificado_em"])
+        else:
+            items = listar_cursos()
+            logger.info("Total cursos retornados: %d", len(items))
+            return resposta_condicional(req, _catalogo["versao"], _catalogo["json"], _catalogo["modificado_em"])
+    except Exception:
+        logger.exception("Erro listando cursos")
+        return resposta(500, {"error":"Falha ao buscar cursos"})
 
-    # POST /inscricao
-    if path.endswith("/inscricao") and method == "POST":
-        return processar_inscricao(event, context)
 
-    # Admin routes
-    """if "/galaxy" in path:
-        try:
-            hdr = event["headers"].get("Authorization","")
-            uid, email = validar_jwt(hdr)
-            logger.info("Admin auth OK: uid=%s email=%s", uid, email)
-        except Exception:
-            logger.warning("Admin auth failed")
-            return resposta(401, {"error":"Unauthorized"})
-        if path.endswith("/galaxy/inscricoes") and method == "GET":
-            return listar_inscricoes()
-        if path.startswith("/galaxy/inscricoes/") and method == "DELETE":
-            iid = path.split("/")[-1]
-            return remover_inscricao(iid)
-        return resposta(404, {"error":"Admin route not found"})"""
+# POST /inscricao
+@rota("POST", "/inscricao", corpo="obrigatorio", honeypot=True, idempotente=True,
+      limites={"ip": 10, "email": 5, "cpf": 3}, schema={**SCHEMA_ALUNO, "curso": CAMPO_CURSO, "cupom": CAMPO_CUPOM})
+def processar_inscricao(req):
+    logs.payload("Processando inscrição", req["body"])
 
-    # CORS
-    if method == "OPTIONS":
-        return resposta(200, {"message":"CORS OK"})
-
-    logger.warning("Route not found: %s %s", method, path)
-    return resposta(404, {"error":"Route not found"})
-
-
-def processar_inscricao(event, context):
-    logger.info("Processando inscrição, body=%s", event.get("body"))
-    body_raw = event.get("body")
-    if not body_raw:
-        return resposta(400, {"error": "Body is required"})
-    body = json.loads(body_raw)
-    if body.get("website"):
-        logger.warning("Honeypot triggered in inscrição")
-        return resposta(400, {"error": "Solicitação inválida."})
-
-    # Extrair campos
-    cpf_aluno     = body.get("cpf", "").strip()
-    nome_curso    = body.get("curso", "").strip()
-    nome_aluno    = body.get("nomeCompleto", "").strip()
-    rg_aluno      = body.get("rg", "").strip()
-    email         = body.get("email", "").strip()
-    whatsapp      = body.get("whatsapp", "").strip()
-    sexo          = body.get("sexo", "").strip()
-    data_nasc     = body.get("dataNascimento", "").strip()
-    form_ti       = body.get("formacaoTI", "").strip()
-    onde_estuda   = body.get("ondeEstuda", "").strip()
-    como_soube    = body.get("comoSoube", "").strip()
-    nome_amigo    = body.get("nomeAmigo", "").strip()
-    aceita_termos = bool(body.get("aceitouTermos"))
-    cupom         = body.get("cupom", "").strip().upper()
+    # Campos já validados e normalizados pelo schema
+    dados      = dict(req["dados"])
+    nome_curso = dados.pop("curso")
+    cupom      = dados.pop("cupom")
+    cpf_aluno  = dados["cpf"]
 
     # Verifica duplicidade
     if verificar_inscricao_existente(cpf_aluno, nome_curso):
@@ -505,15 +1071,10 @@ def processar_inscricao(event, context):
         return resposta(409, {"error": f"Aluno {cpf_aluno} já inscrito em {nome_curso}."})
 
     # Busca dados do curso (para preço e para checar 'ativo')
-    scan_resp = table_cursos.scan(
-        FilterExpression="title = :t",
-        ExpressionAttributeValues={":t": nome_curso}
-    )
-    items = scan_resp.get("Items", [])
-    if not items:
+    curso_item = buscar_curso_por_titulo(nome_curso)
+    if not curso_item:
         logger.warning("Curso '%s' não encontrado em inscrição", nome_curso)
         return resposta(404, {"error": f"Curso '{nome_curso}' não encontrado"})
-    curso_item = items[0]
 
     # Bloqueia inscrição se curso estiver inativo
     if not curso_item.get("ativo", True):
@@ -522,57 +1083,211 @@ def processar_inscricao(event, context):
             "error": f"Inscrições para o curso '{nome_curso}' estão encerradas."
         })
 
-    # Calcula preço original
-    raw_price   = curso_item.get("price", "")
-    clean_price = raw_price.replace("R$", "").replace(".", "").replace(",", ".").strip()
     try:
-        valor_original = Decimal(clean_price)
+        valor_original, valor_com_desconto, cupom_item = valores_inscricao(curso_item, nome_curso, cupom)
+    except ValueError as ve:
+        return resposta(500, {"error": str(ve)})
+
+    # Monta e salva o item de inscrição; o resgate do cupom limitado vai na mesma transação
+    item, gravada, aviso_cupom = gravar_inscricao_com_cupom(
+        req, dados, nome_curso, curso_item, cupom, valor_original, valor_com_desconto, limites_cupom(cupom_item))
+    inscricao_id = item["id"]
+    if not gravada:
+        # outra requisição gravou o mesmo cpf+curso entre a checagem e a escrita
+        logger.info("Inscrição duplicada (transação): cpf=%s curso=%s", cpf_aluno, nome_curso)
+        return resposta(409, {"error": f"Aluno {cpf_aluno} já inscrito em {nome_curso}."})
+    logs.payload("Inscrição salva", item, id=inscricao_id, curso=nome_curso)
+
+    # Envia notificações
+    try:
+        enfileirar_emails(("inscricao_aluno", item), ("inscricao_admin", item))
     except Exception:
-        logger.error("Preço inválido no curso: %s", raw_price)
-        return resposta(500, {"error": f"Preço inválido: {raw_price}"})
+        logger.exception("Erro ao enfileirar e-mails de inscrição")
+    enfileirar_paymentlinks(inscricao_id)
+
+    corpo = {
+        "message": "Inscrição criada com sucesso!",
+        "inscricao_id": inscricao_id
+    }
+    if aviso_cupom:
+        corpo["avisoCupom"] = aviso_cupom
+    return resposta(201, corpo)
+
+
+# POST /inscricoes/batch
+@rota("POST", "/inscricoes/batch", corpo="obrigatorio", honeypot=True, idempotente=True, limites={"ip": 3}, schema={
+    "curso":  CAMPO_CURSO,
+    "cupom":  CAMPO_CUPOM,
+    "alunos": validacao.lista(obrigatorio=True, max_itens=INSCRICAO_LOTE_MAX)
+})
+def processar_inscricoes_lote(req):
+    """
+    Inscrição em grupo (empresas/escolas): um curso, cupom opcional e 1..INSCRICAO_LOTE_MAX alunos.
+      corpo: {"curso": "...", "cupom": "...", "alunos": [{"cpf", "nomeCompleto", "email", ...}]}
+    Curso e cupom são resolvidos uma vez e os duplicados já conhecidos saem num
+    BatchGetItem; as demais linhas são gravadas em paralelo (LOTE_THREADS), cada
+    uma na transação condicional do POST /inscricao. Cada linha volta com status
+    criada | duplicada | invalida | erro.
+    """
+    nome_curso = req["dados"]["curso"]
+    cupom      = req["dados"]["cupom"]
+    alunos     = req["dados"]["alunos"]
+
+    # Valida todas as linhas antes de qualquer acesso ao DynamoDB
+    resultados = {}
+    validos = []  # (linha, dados)
+    cpfs_no_lote = set()
+    for linha, aluno in enumerate(alunos):
+        if not isinstance(aluno, dict):
+            resultados[linha] = {"status": "invalida", "error": "Aluno deve ser um objeto."}
+            continue
+        dados, erros = validar_aluno(aluno)
+        if erros:
+            resultados[linha] = {"status": "invalida", "error": validacao.mensagem_erros(erros), "campos": erros}
+        elif cpf_digitos(dados["cpf"]) in cpfs_no_lote:
+            resultados[linha] = {"status": "duplicada", "error": "CPF repetido no lote."}
+        else:
+            cpfs_no_lote.add(cpf_digitos(dados["cpf"]))
+            validos.append((linha, dados))
+
+    curso_item = buscar_curso_por_titulo(nome_curso)
+    if not curso_item:
+        logger.warning("Curso '%s' não encontrado em inscrição em lote", nome_curso)
+        return resposta(404, {"error": f"Curso '{nome_curso}' não encontrado"})
+    if not curso_item.get("ativo", True):
+        return resposta(400, {"error": f"Inscrições para o curso '{nome_curso}' estão encerradas."})
+    try:
+        valor_original, valor_com_desconto, cupom_item = valores_inscricao(curso_item, nome_curso, cupom)
+    except ValueError as ve:
+        return resposta(500, {"error": str(ve)})
+    limites = limites_cupom(cupom_item)
+
+    existentes = buscar_unicidades_existentes(chave_unicidade(d["cpf"], nome_curso) for _, d in validos)
+
+    pendentes = []
+    for linha, dados in validos:
+        if chave_unicidade(dados["cpf"], nome_curso) in existentes:
+            resultados[linha] = {"status": "duplicada", "error": f"Aluno {dados['cpf']} já inscrito em {nome_curso}."}
+        else:
+            pendentes.append((linha, dados))
+
+    def gravar_linha(linha_dados):
+        # mesma transação condicional do POST /inscricao: um POST concorrente com o mesmo
+        # cpf+curso (depois do BatchGetItem acima) faz esta linha voltar como duplicada
+        linha, dados = linha_dados
+        try:
+            return linha, gravar_inscricao_com_cupom(
+                req, dados, nome_curso, curso_item, cupom, valor_original, valor_com_desconto, limites)
+        except Exception:
+            logger.exception("Erro ao gravar linha %d da inscrição em lote", linha)
+            return linha, None
+
+    criados = []
+    with ThreadPoolExecutor(max_workers=min(LOTE_THREADS, len(pendentes) or 1)) as pool:
+        for linha, gravacao in pool.map(gravar_linha, pendentes):
+            if gravacao is None:
+                resultados[linha] = {"status": "erro", "error": "Falha ao gravar; reenvie este aluno."}
+                continue
+            item, gravada, aviso_cupom = gravacao
+            if not gravada:
+                resultados[linha] = {"status": "duplicada", "error": f"Aluno {item['cpf']} já inscrito em {nome_curso}."}
+                continue
+            resultados[linha] = {"status": "criada", "inscricao_id": item["id"]}
+            if aviso_cupom:
+                resultados[linha]["avisoCupom"] = aviso_cupom
+            criados.append(item)
+    logger.info("Inscrição em lote no curso %s: %d alunos, %d criadas", nome_curso, len(alunos), len(criados))
+
+    if criados:
+        try:
+            enfileirar_emails(
+                *[("inscricao_aluno", item) for item in criados],
+                ("inscricao_lote_admin", {
+                    "curso": nome_curso,
+                    "criadoEm": req["agora"],
+                    "alunos": [{k: item[k] for k in ("nomeCompleto", "cpf", "email")} for item in criados]
+                })
+            )
+        except Exception:
+            logger.exception("Erro ao enfileirar e-mails da inscrição em lote")
+        enfileirar_paymentlinks(*[item["id"] for item in criados])
+
+    linhas = [{"linha": linha, **resultados[linha]} for linha in range(len(alunos))]
+    resumo = {}
+    for r in linhas:
+        resumo[r["status"]] = resumo.get(r["status"], 0) + 1
+    return resposta(200, {"curso": nome_curso, "resumo": resumo, "resultados": linhas})
+
+
+def valores_inscricao(curso_item, nome_curso, cupom):
+    """
+    Retorna (valor_original, valor_com_desconto, item do cupom aplicado ou None).
+    Cupom inválido não bloqueia a inscrição; preço inválido no curso levanta ValueError
+    e cupom-curso-index ausente levanta IndiceAusente (não cobra preço cheio em silêncio).
+    """
+    try:
+        valor_original = precos.preco_original(nome_curso, curso_item)
+    except ValueError:
+        logger.error("Preço inválido no curso: %s", curso_item.get("price"))
+        raise
     logger.info("Preço original do curso '%s': %s", nome_curso, valor_original)
 
     # Tenta aplicar desconto de cupom (se houver), mas não bloqueia inscrição se inválido
-    desconto_valor = Decimal("0")
+    desconto = None
+    cupom_item = None
     if cupom:
         try:
-            desconto = checa_cupom_e_retorna_desconto(cupom, nome_curso)
+            cupom_item = cupom_aplicavel(cupom, nome_curso)
+            desconto = cupom_item.get("desconto") if cupom_item else None
             if desconto:
-                if desconto.endswith("%"):
-                    pct = Decimal(desconto.rstrip("%")) / Decimal("100")
-                    desconto_valor = (valor_original * pct).quantize(Decimal("0.01"))
-                else:
-                    val = desconto.replace("R$", "").replace(",", ".").strip()
-                    desconto_valor = Decimal(val).quantize(Decimal("0.01"))
-                logger.info("Desconto aplicado: %s => %s", desconto, desconto_valor)
+                logger.info("Desconto do cupom '%s': %s", cupom, desconto)
             else:
                 logger.info("Cupom '%s' inválido para o curso '%s', prosseguindo sem desconto", cupom, nome_curso)
+        except IndiceAusente:
+            raise
         except Exception as e:
             logger.warning("Erro ao verificar cupom '%s': %s. Prosseguindo sem desconto.", cupom, e)
 
-    valor_com_desconto = (valor_original - desconto_valor).quantize(Decimal("0.01"))
+    _, valor_com_desconto = precos.valores_com_cupom(nome_curso, curso_item, desconto)
     logger.info("Valor com desconto final (ou preço cheio): %s", valor_com_desconto)
+    return valor_original, valor_com_desconto, cupom_item if desconto else None
 
-    # Monta e salva o item de inscrição
-    inscricao_id = str(uuid.uuid4())
-    now = datetime.now(timezone(timedelta(hours=-3))).isoformat()
-    ip = event.get("requestContext", {}).get("identity", {}).get("sourceIp", "")
-    ua = event.get("headers", {}).get("User-Agent", "")
-    item = {
-        "id": inscricao_id,
+
+def gravar_inscricao_com_cupom(req, dados, nome_curso, curso_item, cupom, valor_original, valor_com_desconto,
+                               limites):
+    """
+    Monta e grava a inscrição com gravar_inscricao_unica. Cupom limitado que
+    esgotou não bloqueia: grava sem o desconto e devolve o aviso.
+    Retorna (item, gravada, aviso_cupom); gravada False = cpf+curso já inscrito.
+    """
+    aviso_cupom = None
+    while True:
+        item = montar_item_inscricao(req, dados, nome_curso, cupom, valor_original, valor_com_desconto)
+        try:
+            # pagamento-info já sai calculado junto com a inscrição (GET /pagamento-info vira uma leitura)
+            # paymentLinks nasce vazio para o worker gravar cada link com um único update;
+            # a inscrição entra no renovacao-index já vencida, para o agendamento cobrir falhas do worker
+            gravada = gravar_inscricao_unica({
+                **item, **pagamento_info_materializado(item, curso_item), "paymentLinks": {},
+                "renovacaoLinks": RENOVACAO_PENDENTE, "linksVencemEm": item["dataInscricao"]
+            }, limites)
+            return item, gravada, aviso_cupom
+        except CupomIndisponivel as e:
+            # como cupom inválido: a inscrição segue sem desconto
+            logger.info("Cupom '%s' indisponível na inscrição: %s", cupom, e)
+            aviso_cupom = f"{e} A inscrição foi feita sem o desconto."
+            cupom, limites = "", None
+            _, valor_com_desconto = precos.valores_com_cupom(nome_curso, curso_item, None)
+
+
+def montar_item_inscricao(req, dados, nome_curso, cupom, valor_original, valor_com_desconto):
+    now = req["agora"]
+    ip = req["event"].get("requestContext", {}).get("identity", {}).get("sourceIp", "")
+    ua = req["headers"].get("User-Agent", "")
+    return {
+        "id": str(uuid.uuid4()),
         "curso": nome_curso,
-        "nomeCompleto": nome_aluno,
-        "cpf": cpf_aluno,
-        "rg": rg_aluno,
-        "email": email,
-        "whatsapp": whatsapp,
-        "sexo": sexo,
-        "dataNascimento": data_nasc,
-        "formacaoTI": form_ti,
-        "ondeEstuda": onde_estuda,
-        "comoSoube": como_soube,
-        "nomeAmigo": nome_amigo,
-        "aceitouTermos": aceita_termos,
+        **dados,
         "dataInscricao": now,
         "ip": ip,
         "userAgent": ua,
@@ -580,35 +1295,223 @@ def processar_inscricao(event, context):
         "valorCurso": valor_com_desconto,
         "cupom": cupom or None
     }
-    table_inscricoes.put_item(Item=item)
-    logger.info("Inscrição salva: %s", item)
 
-    # Envia notificações
-    try:
-        enviar_email_para_aluno(item)
-        enviar_email_para_admin(item)
-    except Exception:
-        logger.exception("Erro ao enviar e-mails de inscrição")
 
-    return resposta(201, {
-        "message": "Inscrição criada com sucesso!",
-        "inscricao_id": inscricao_id
-    })
+def cupom_aplicavel(cupom, curso):
+    items = buscar_cupom(cupom, curso)
+    return items[0] if items else None
+
+
+class CupomIndisponivel(Exception):
+    """Cupom sem resgate disponível: esgotado ou limite por CPF atingido."""
+
+
+def limites_cupom(cupom_item):
+    """Limites de resgate do item de Descontos ({"cupom", "total", "porCpf", "shards"}) ou None se não tiver."""
+    if not cupom_item:
+        return None
+    total, por_cpf = cupom_item.get("maxResgates"), cupom_item.get("maxPorCpf")
+    if total is None and por_cpf is None:
+        return None
+    total = int(total) if total is not None else None
+    shards = int(cupom_item.get("shards") or CUPOM_SHARDS_PADRAO)
+    return {
+        "cupom": cupom_item["cupom"],
+        "total": total,
+        "porCpf": int(por_cpf) if por_cpf is not None else None,
+        # sem shard de limite zero: um cupom de 3 resgates usa 3 shards
+        "shards": max(1, min(shards, total)) if total is not None else 0
+    }
+
+
+def chave_resgate_shard(cupom, shard):
+    return f"{cupom}#shard#{shard}"
+
+
+def chave_resgate_cpf(cupom, cpf):
+    return f"{cupom}#cpf#{cpf_digitos(cpf)}"
+
+
+def limite_shard(limites, shard):
+    """Fatia do maxResgates que cabe a cada shard (a soma das fatias é exatamente o total)."""
+    base, resto = divmod(limites["total"], limites["shards"])
+    return base + (1 if shard < resto else 0)
+
+
+def transacao_com_resgate(itens, limites, cpf):
+    """
+    Roda TransactWriteItems com `itens` mais o resgate do cupom: +1 no contador
+    do CPF e +1 num shard com folga, ambos condicionais. Começa num shard
+    aleatório e passa para o próximo se ele estiver cheio; devolve o shard usado
+    (None se o cupom só limita por CPF). Levanta CupomIndisponivel se o cupom
+    esgotou ou o CPF já usou o limite; conflito nos próprios `itens` sobe como
+    o ClientError original (TransactionCanceledException).
+    """
+    cupom = limites["cupom"]
+    extras = []
+    if limites["porCpf"] is not None:
+        extras.append({"Update": {
+            "TableName": table_resgates.name,
+            "Key": {"chave": chave_resgate_cpf(cupom, cpf)},
+            "UpdateExpression": "ADD resgates :um",
+            "ConditionExpression": "attribute_not_exists(resgates) OR resgates < :max",
+            "ExpressionAttributeValues": {":um": 1, ":max": limites["porCpf"]}
+        }})
+    if limites["total"] is None:
+        ordem = [None]
+    else:
+        if resgates_restantes(limites) == 0:
+            raise CupomIndisponivel("Cupom esgotado.")
+        inicio = random.randrange(limites["shards"])
+        ordem = [(inicio + i) % limites["shards"] for i in range(limites["shards"])]
+
+    for shard in ordem:
+        resgate_shard = []
+        if shard is not None:
+            resgate_shard.append({"Update": {
+                "TableName": table_resgates.name,
+                "Key": {"chave": chave_resgate_shard(cupom, shard)},
+                "UpdateExpression": "ADD resgates :um",
+                "ConditionExpression": "attribute_not_exists(resgates) OR resgates < :max",
+                "ExpressionAttributeValues": {":um": 1, ":max": limite_shard(limites, shard)}
+            }})
+        try:
+            ddb_client.transact_write_items(TransactItems=itens + extras + resgate_shard)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+                raise
+            motivos = e.response.get("CancellationReasons") or []
+            falhas = {i for i, m in enumerate(motivos) if m.get("Code") == "ConditionalCheckFailed"}
+            if not falhas or min(falhas) < len(itens):
+                raise
+            if extras and len(itens) in falhas:
+                raise CupomIndisponivel("Limite de uso do cupom por CPF atingido.")
+            continue  # shard cheio: tenta o próximo
+        restantes = _cupons_restantes.get(cupom)
+        if shard is not None and restantes:
+            _cupons_restantes[cupom] = (max(0, restantes[0] - 1), restantes[1])
+        return shard
+
+    _cupons_restantes[cupom] = (0, time.monotonic() + CUPOM_RESTANTES_TTL_SEGUNDOS)
+    raise CupomIndisponivel("Cupom esgotado.")
+
+
+def resgates_restantes(limites):
+    """
+    Resgates que ainda cabem no maxResgates (None se o cupom não tem limite
+    total): um BatchGetItem com os shards somados, em cache por alguns segundos.
+    """
+    if not limites or limites["total"] is None:
+        return None
+    cupom = limites["cupom"]
+    agora = time.monotonic()
+    cache = _cupons_restantes.get(cupom)
+    if cache and cache[1] > agora:
+        return cache[0]
+    resp = ddb_client.batch_get_item(RequestItems={table_resgates.name: {
+        "Keys": [{"chave": chave_resgate_shard(cupom, i)} for i in range(limites["shards"])],
+        "ProjectionExpression": "resgates"
+    }})
+    usados = sum(int(i.get("resgates", 0)) for i in resp.get("Responses", {}).get(table_resgates.name, []))
+    restantes = max(0, limites["total"] - usados)
+    _cupons_restantes[cupom] = (restantes, agora + CUPOM_RESTANTES_TTL_SEGUNDOS)
+    return restantes
+
+
+class IndiceAusente(Exception):
+    """GSI (ou tabela) que o código consulta não existe: deploy incompleto, não 'nenhum resultado'."""
+
+
+def consultar_indice(tabela, **kwargs):
+    """
+    tabela.query(IndexName=...) que transforma índice inexistente em IndiceAusente,
+    para quem trata erro da consulta como "sem resultado" não esconder a falha.
+    """
+    try:
+        return tabela.query(**kwargs)
+    except ClientError as e:
+        erro = e.response.get("Error", {})
+        codigo, mensagem = erro.get("Code"), erro.get("Message") or ""
+        # DynamoDB: ValidationException "...does not have the specified index"; tabela ausente: ResourceNotFound
+        if codigo == "ResourceNotFoundException" or (codigo == "ValidationException" and "specified index" in mensagem):
+            logger.critical("Índice %s da tabela %s indisponível: %s", kwargs.get("IndexName"), tabela.name, mensagem)
+            raise IndiceAusente(f"{tabela.name}/{kwargs.get('IndexName')}") from e
+        raise
 
 
-def checa_cupom_e_retorna_desconto(cupom, curso):
-    resp = table_descontos.scan(
-        FilterExpression="cupom = :c AND curso = :s",
-        ExpressionAttributeValues={":c":cupom, ":s":curso}
+def buscar_cupom(cupom, curso):
+    """
+    Retorna os itens de Descontos para o par (cupom, curso), usando o GSI
+    cupom-curso-index. Positivos ficam num LRU limitado e cupons inexistentes
+    num cache negativo de TTL curto, então chutes repetidos não vão ao DynamoDB.
+    """
+    chave = (cupom, curso)
+    agora = time.monotonic()
+
+    positivo = _cupons_positivos.get(chave)
+    if positivo and positivo[1] > agora:
+        _cupons_positivos.move_to_end(chave)
+        return positivo[0]
+    expira = _cupons_negativos.get(chave)
+    if expira and expira > agora:
+        return []
+
+    resp = consultar_indice(
+        table_descontos,
+        IndexName=CUPOM_CURSO_INDEX,
+        KeyConditionExpression="cupom = :c AND curso = :u",
+        ExpressionAttributeValues={":c": cupom, ":u": curso}
     )
     items = resp.get("Items", [])
-    return items[0].get("desconto") if items else None
 
+    if items:
+        _cupons_negativos.pop(chave, None)
+        _cupons_positivos[chave] = [items, agora + CUPONS_TTL_SEGUNDOS, None]
+        # o valor do curso com este desconto já fica pronto para a inscrição e o pagamento
+        precos.registrar_cupons(curso, [it.get("desconto") for it in items])
+        _cupons_positivos.move_to_end(chave)
+        if len(_cupons_positivos) > CUPONS_CACHE_MAX:
+            _cupons_positivos.popitem(last=False)
+    else:
+        _cupons_positivos.pop(chave, None)
+        _cupons_negativos[chave] = agora + CUPONS_NEGATIVO_TTL_SEGUNDOS
+        _cupons_negativos.move_to_end(chave)
+        if len(_cupons_negativos) > CUPONS_CACHE_MAX:
+            _cupons_negativos.popitem(last=False)
+    return items
 
-def criar_paymentlink_asaas(curso, aluno, valor, metodo, ext_ref):
+
+def corpo_checa_cupom(cupom, curso):
+    """
+    Corpo JSON de /checa-cupom, serializado uma vez por entrada do cache de cupons.
+    Cupom com maxResgates também informa os resgates restantes (cache curto, fora do corpo pronto).
+    """
+    items = buscar_cupom(cupom, curso)
+    entrada = _cupons_positivos.get((cupom, curso))
+    if entrada is not None and entrada[0] is items and entrada[2] is not None:
+        return entrada[2]
+
+    validos = [i for i in items if i.get("ativo") is True and i.get("disponivel") is True]
+    valid = bool(validos)
+    # pega o valor do desconto (ex: "10%" ou "R$10,00") se existir
+    desconto = validos[0]["desconto"] if valid else None
+    restantes = resgates_restantes(limites_cupom(validos[0])) if valid else None
+    if restantes is not None:
+        logger.info("Cupom %s válido? %s desconto=%s restantes=%d", cupom, restantes > 0, desconto, restantes)
+        return JsonPronto(serializar({"valid": restantes > 0, "desconto": desconto, "restantes": restantes}))
+    logger.info("Cupom %s válido? %s desconto=%s", cupom, valid, desconto)
+
+    corpo = JsonPronto(serializar({"valid": valid, "desconto": desconto}))
+    if entrada is not None and entrada[0] is items:
+        entrada[2] = corpo
+    return corpo
+
+
+def criar_paymentlink_asaas(curso, aluno, valor, metodo, ext_ref, prazo=None):
     """
     Cria PaymentLink no Asaas aplicando, quando cabível:
     - Desconto extra PIX de R$150 para cursos Fullstack.
+    prazo (time.monotonic) limita a chamada com retries; ver prazo_da_invocacao.
 
     Retorno:
       {
@@ -617,19 +1520,15 @@ def criar_paymentlink_asaas(curso, aluno, valor, metodo, ext_ref):
         "descontoExtraPix": <float>
       }
     """
-    # Normaliza valor de entrada para Decimal (seguro p/ cálculo)
-    valor_dec = Decimal(str(valor)).quantize(Decimal("0.01"))
-
-    # Regras de desconto
-    desconto_extra = Decimal("0.00")
-    if metodo == "PIX" and FULLSTACK_NOME_CURSO in curso:
-        desconto_extra = Decimal("150.00")
-        valor_dec = (valor_dec - desconto_extra).quantize(Decimal("0.01"))
-        # Evita valor zero/negativo no Asaas
-        if valor_dec <= Decimal("0.00"):
-            valor_dec = Decimal("0.01")
+    # Valores por método vêm da tabela de preços (desconto PIX Fullstack, cartão +8%)
+    valores = precos.valores_metodos(valor, curso)
+    if metodo == "PIX" and valores["descontoPix"] > 0:
+        valor_dec = valores["pix"]
+        desconto_extra = valores["descontoPix"]
+    else:
+        valor_dec = valores["base"]
+        desconto_extra = Decimal("0.00")
 
-    hdr = {"Content-Type": "application/json", "access_token": ASAAS_API_KEY}
     nome = f"Inscrição: {curso}"
     desc = f"{nome}. Aluno: {aluno}"
 
@@ -640,13 +1539,13 @@ def criar_paymentlink_asaas(curso, aluno, valor, metodo, ext_ref):
             "chargeType": "DETACHED",
             "value": float(valor_dec),            # valor já com desconto (se houver)
             "description": desc,
-            "dueDateLimitDays": 2,
+            "dueDateLimitDays": PAYMENTLINK_VALIDADE_DIAS["PIX"],
             "externalReference": ext_ref,
             "notificationEnabled": True
         }
     else:
         # Cartão segue a regra atual (acréscimo de 8% sobre o valor base sem desconto PIX)
-        tc = round(float(valor_dec) * 1.08, 2)
+        tc = float(valores["cartao"])
         charge_type = "INSTALLMENT"
         max_installments = 12
         if tc < 10:
@@ -658,27 +1557,302 @@ def criar_paymentlink_asaas(curso, aluno, valor, metodo, ext_ref):
             "chargeType": charge_type,
             "value": tc,
             "description": desc,
-            "dueDateLimitDays": 7,
+            "dueDateLimitDays": PAYMENTLINK_VALIDADE_DIAS["CARTAO"],
             "maxInstallmentCount": max_installments,
             "externalReference": ext_ref,
             "notificationEnabled": True
         }
 
-    logger.info("Asaas payload: %s", payload)
-    resp = requests.post(f"{ASAAS_ENDPOINT}/paymentLinks", headers=hdr, json=payload)
+    import asaas_client
+
+    logs.payload("Asaas payload", payload)
+    result = asaas_client.post("/paymentLinks", payload, prazo=prazo)
+    logs.payload("Asaas response", result, id=result.get("id"))
+
+    return {
+        "asaas": result,
+        "valorFinal": float(valor_dec),
+        "descontoExtraPix": float(desconto_extra) if desconto_extra > 0 else 0.0
+    }
+
+
+def gerar_paymentlink(insc, pm, prazo=None):
+    """Cria o link no Asaas e grava na inscrição; retorna o link que ficou salvo."""
+    valor = float(insc.get("valorCurso", 0))
+    logger.info("Criando paymentLink %s: inscrição=%s curso=%s valor=%s", pm, insc["id"], insc.get("curso"), valor)
+    link = criar_paymentlink_asaas(insc.get("curso", ""), insc.get("nomeCompleto", ""), valor, pm, insc["id"], prazo)
+    asaas_resp = link.get("asaas", {})
+    logger.info("Asaas link created: %s", asaas_resp.get("url"))
+
+    agora = datetime.now(TZ_BRASILIA)
+    dias = PAYMENTLINK_VALIDADE_DIAS[pm]
+    link_info = {
+        "id": asaas_resp.get("id"),
+        "url": asaas_resp.get("url"),
+        "paymentMethod": pm,
+        "createdAt": agora.isoformat(),
+        "dueDateLimitDays": dias,
+        "expiraEm": (agora + timedelta(days=dias)).isoformat(),
+        "valorFinal": Decimal(str(link.get("valorFinal"))).quantize(Decimal("0.01")),
+        "descontoExtraPix": Decimal(str(link.get("descontoExtraPix", 0.0))).quantize(Decimal("0.01"))
+    }
+    return salvar_paymentlink(insc["id"], pm, link_info)
+
+
+def salvar_paymentlink(iid, pm, link_info):
+    """
+    Grava o link do método com um único update condicional: só substitui link
+    ausente ou perto de expirar. Se outro processo gravou um link válido antes,
+    devolve o que está salvo (o criado agora fica sem uso no Asaas).
+    """
+    agora = link_info["createdAt"]
+    limite = (datetime.fromisoformat(agora) + timedelta(hours=PAYMENTLINK_RENOVAR_ANTES_HORAS)).isoformat()
+    try:
+        table_inscricoes.update_item(
+            Key={"id": iid},
+            UpdateExpression="SET paymentLinks.#pm = :v, updatedAt = :u",
+            ConditionExpression=(
+                "attribute_exists(paymentLinks) AND "
+                "(attribute_not_exists(paymentLinks.#pm.expiraEm) OR paymentLinks.#pm.expiraEm < :lim)"
+            ),
+            ExpressionAttributeNames={"#pm": pm},
+            ExpressionAttributeValues={":v": link_info, ":u": agora, ":lim": limite}
+        )
+        return link_info
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+    insc = table_inscricoes.get_item(
+        Key={"id": iid}, ProjectionExpression="id, paymentLinks", ConsistentRead=True
+    ).get("Item")
+    if not insc:
+        raise ValueError(f"Inscrição '{iid}' não encontrada.")
+    if "paymentLinks" in insc:
+        return insc["paymentLinks"].get(pm) or link_info
+
+    # inscrição anterior ao mapa paymentLinks gravado na criação
+    try:
+        table_inscricoes.update_item(
+            Key={"id": iid},
+            UpdateExpression="SET paymentLinks = :m, updatedAt = :u",
+            ConditionExpression="attribute_exists(id) AND attribute_not_exists(paymentLinks)",
+            ExpressionAttributeValues={":m": {pm: link_info}, ":u": agora}
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+        return salvar_paymentlink(iid, pm, link_info)
+    return link_info
+
+
+def prazo_da_invocacao(context, margem=ASAAS_MARGEM_SEGUNDOS):
+    """Instante (time.monotonic) até o qual dependências externas podem rodar nesta invocação."""
+    if context is None:
+        return None
+    return time.monotonic() + context.get_remaining_time_in_millis() / 1000 - margem
+
+
+def link_valido(link, pm, margem=timedelta(0)):
+    """True se o link salvo existe e ainda vale por mais que 'margem'."""
+    expira = expiracao_link(link, pm)
+    return expira is not None and datetime.now(TZ_BRASILIA) + margem < expira
+
+
+def expiracao_link(link, pm):
+    """Quando o link salvo expira (datetime), ou None se não há link utilizável."""
+    if not link or not link.get("url"):
+        return None
     try:
-        resp.raise_for_status()
-    except requests.HTTPError:
-        logger.error("Asaas error status=%s body=%s", resp.status_code, resp.text)
-        raise
-    result = resp.json()
-    logger.info("Asaas response: %s", result)
+        if link.get("expiraEm"):
+            return datetime.fromisoformat(link["expiraEm"])
+        # links gravados antes do expiraEm
+        dias = int(link.get("dueDateLimitDays") or PAYMENTLINK_VALIDADE_DIAS[pm])
+        return datetime.fromisoformat(link["createdAt"]) + timedelta(days=dias)
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Não foi possível validar expiração do paymentLink %s", link.get("id"))
+        return None
 
-    return {
-        "asaas": result,
-        "valorFinal": float(valor_dec),
-        "descontoExtraPix": float(desconto_extra) if desconto_extra > 0 else 0.0
+
+def pagamento_em_aberto(insc):
+    """True enquanto a inscrição não tem cobrança paga, estornada ou em análise no Asaas."""
+    status = insc.get("asaasPaymentStatus")
+    return status is None or status in ASAAS_STATUS_EM_ABERTO
+
+
+def vencimento_links(links):
+    """Vencimento mais próximo entre os links (ISO, Brasília); link ausente ou inválido vence agora."""
+    agora = datetime.now(TZ_BRASILIA)
+    return min(expiracao_link(links.get(pm), pm) or agora for pm in PAYMENTLINK_METODOS).astimezone(
+        TZ_BRASILIA).isoformat()
+
+
+def atualizar_renovacao_links(iid, links):
+    """Regrava linksVencemEm no renovacao-index; inscrição que já saiu do índice (paga) não volta."""
+    try:
+        table_inscricoes.update_item(
+            Key={"id": iid},
+            UpdateExpression="SET linksVencemEm = :v",
+            ConditionExpression="attribute_exists(renovacaoLinks)",
+            ExpressionAttributeValues={":v": vencimento_links(links)}
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+
+def sair_da_renovacao(iid):
+    """Tira a inscrição do renovacao-index (pagamento fechado ou inscrição antiga demais)."""
+    try:
+        table_inscricoes.update_item(
+            Key={"id": iid},
+            UpdateExpression="REMOVE renovacaoLinks, linksVencemEm",
+            ConditionExpression="attribute_exists(id)"
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+
+def enfileirar_paymentlinks(*inscricao_ids):
+    """Pede ao worker os links PIX e cartão das inscrições. Sem fila, o /paymentlink cria na hora."""
+    if not PAYMENTLINKS_QUEUE_URL:
+        return
+    ids = list(inscricao_ids)
+    for i in range(0, len(ids), 10):
+        entradas = [
+            {"Id": str(n), "MessageBody": json.dumps({"inscricaoId": iid})}
+            for n, iid in enumerate(ids[i:i + 10])
+        ]
+        try:
+            resp = sqs.send_message_batch(QueueUrl=PAYMENTLINKS_QUEUE_URL, Entries=entradas)
+            if resp.get("Failed"):
+                logger.warning("Falha ao enfileirar %d pré-criações de paymentLink", len(resp["Failed"]))
+        except Exception:
+            logger.exception("Erro ao enfileirar pré-criação de paymentLinks")
+
+
+@logs.por_invocacao
+def processar_fila_paymentlinks(event, context):
+    """
+    Consumidor SQS: cria (ou renova, se perto de expirar) os links PIX e cartão
+    da inscrição e regrava o vencimento no renovacao-index. Pagamento que não
+    está mais em aberto não ganha link novo e sai do índice.
+    """
+    margem = timedelta(hours=PAYMENTLINK_RENOVAR_ANTES_HORAS)
+    prazo = prazo_da_invocacao(context)
+    falhas = []
+    for record in event.get("Records", []):
+        try:
+            iid = json.loads(record["body"])["inscricaoId"]
+            insc = table_inscricoes.get_item(
+                Key={"id": iid},
+                ProjectionExpression="id, nomeCompleto, curso, valorCurso, paymentLinks, asaasPaymentStatus",
+                ConsistentRead=True
+            ).get("Item")
+            if not insc:
+                logger.warning("Inscrição %s não encontrada para pré-criar paymentLinks", iid)
+                continue
+            if not pagamento_em_aberto(insc):
+                logger.info("Inscrição %s com pagamento %s; links não renovados", iid, insc["asaasPaymentStatus"])
+                sair_da_renovacao(iid)
+                continue
+            links = dict(insc.get("paymentLinks") or {})
+            for pm in PAYMENTLINK_METODOS:
+                if not link_valido(links.get(pm), pm, margem):
+                    links[pm] = gerar_paymentlink(insc, pm, prazo)
+            atualizar_renovacao_links(iid, links)
+        except Exception:
+            logger.exception("Erro ao pré-criar paymentLinks %s", record.get("messageId"))
+            falhas.append({"itemIdentifier": record.get("messageId")})
+    return {"batchItemFailures": falhas}
+
+
+@logs.por_invocacao
+def renovar_paymentlinks(event, context):
+    """
+    Agendada: reenfileira as inscrições com pagamento em aberto cujos links
+    faltam ou vencem em menos de PAYMENTLINK_RENOVAR_ANTES_HORAS. Lê só o GSI
+    esparso renovacao-index (linksVencemEm < limite), sem scan; inscrições com
+    mais de PAYMENTLINK_RENOVAR_MAX_DIAS saem do índice em vez de renovar.
+    """
+    agora = datetime.now(TZ_BRASILIA)
+    desde = (agora - timedelta(days=PAYMENTLINK_RENOVAR_MAX_DIAS)).isoformat()
+    kwargs = {
+        "IndexName": PAYMENTLINK_RENOVACAO_INDEX,
+        "KeyConditionExpression": "renovacaoLinks = :p AND linksVencemEm < :lim",
+        "ExpressionAttributeValues": {
+            ":p": RENOVACAO_PENDENTE,
+            ":lim": (agora + timedelta(hours=PAYMENTLINK_RENOVAR_ANTES_HORAS)).isoformat()
+        },
+        "ProjectionExpression": "id, dataInscricao"
+    }
+    ids, antigas = [], 0
+    while True:
+        resp = consultar_indice(table_inscricoes, **kwargs)
+        for it in resp.get("Items", []):
+            if (it.get("dataInscricao") or "") > desde:
+                ids.append(it["id"])
+            else:
+                sair_da_renovacao(it["id"])
+                antigas += 1
+        if not resp.get("LastEvaluatedKey"):
+            break
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+    enfileirar_paymentlinks(*ids)
+    logger.info("Renovação de paymentLinks: %d inscrições enfileiradas, %d antigas retiradas do índice",
+                len(ids), antigas)
+    return {"enfileiradas": len(ids), "retiradas": antigas}
+
+
+def migrar_renovacao_paymentlinks(event, context):
+    """
+    Backfill do renovacao-index: inscrições dos últimos PAYMENTLINK_RENOVAR_MAX_DIAS
+    com pagamento em aberto ganham renovacaoLinks e linksVencemEm. Pode ser
+    retomado passando {"inicio": <ultimaChave>} quando o tempo da Lambda acabar.
+    """
+    desde = (datetime.now(TZ_BRASILIA) - timedelta(days=PAYMENTLINK_RENOVAR_MAX_DIAS)).isoformat()
+    scan_kwargs = {
+        "ProjectionExpression": "id, dataInscricao, paymentLinks, asaasPaymentStatus",
+        "FilterExpression": "dataInscricao > :d AND attribute_not_exists(renovacaoLinks)",
+        "ExpressionAttributeValues": {":d": desde}
     }
+    inicio = (event or {}).get("inicio")
+    if inicio:
+        scan_kwargs["ExclusiveStartKey"] = inicio
+
+    indexadas = 0
+    while True:
+        resp = table_inscricoes.scan(**scan_kwargs)
+        for insc in resp.get("Items", []):
+            if not pagamento_em_aberto(insc):
+                continue
+            try:
+                table_inscricoes.update_item(
+                    Key={"id": insc["id"]},
+                    UpdateExpression="SET renovacaoLinks = :p, linksVencemEm = :v",
+                    ConditionExpression="attribute_exists(id) AND "
+                                        "(attribute_not_exists(asaasPaymentStatus) OR asaasPaymentStatus IN (:pend, :venc))",
+                    ExpressionAttributeValues={
+                        ":p": RENOVACAO_PENDENTE, ":v": vencimento_links(insc.get("paymentLinks") or {}),
+                        ":pend": "PENDING", ":venc": "OVERDUE"
+                    }
+                )
+                indexadas += 1
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                    raise
+
+        ultima = resp.get("LastEvaluatedKey")
+        if not ultima:
+            break
+        scan_kwargs["ExclusiveStartKey"] = ultima
+        if context and context.get_remaining_time_in_millis() < 30000:
+            logger.info("Backfill renovacao-index interrompido: indexadas=%d", indexadas)
+            return {"concluido": False, "ultimaChave": ultima, "indexadas": indexadas}
+
+    logger.info("Backfill renovacao-index concluído: indexadas=%d", indexadas)
+    return {"concluido": True, "indexadas": indexadas}
 
 
 def enviar_email_boas_vindas_clube(item):
@@ -837,6 +2011,18 @@ def enviar_email_para_admin(insc):
                             "Body":{"Html":{"Data":html}}})
     logger.info("Email admin inscrição enviado")
 
+def enviar_email_admin_inscricao_lote(lote):
+    assunto = f"📥 Inscrição em lote: {lote['curso']} - {len(lote['alunos'])} alunos"
+    html = f"<h2>Inscrição em lote em {lote['curso']}</h2><p>Recebida em {lote['criadoEm']}</p><ul>" + "".join(
+        f"<li>{a['nomeCompleto']} - {a['cpf']} - {a['email']}</li>"
+        for a in lote["alunos"]
+    ) + "</ul>"
+    ses.send_email(Source=REMETENTE,
+                   Destination={"ToAddresses":[ADMIN_EMAIL]},
+                   Message={"Subject":{"Data":assunto},
+                            "Body":{"Html":{"Data":html}}})
+    logger.info("Email admin inscrição em lote enviado")
+
 def enviar_email_admin_is_assinatura(insc):
     assunto = f"📄 Solicitação de Assinatura - {insc.get('curso', '')} - {insc.get('nomeCompleto', '')}"
     html = "<h2>Foi solicitada a assinatura para a seguinte inscrição:</h2>"
@@ -857,30 +2043,741 @@ def enviar_email_admin_is_assinatura(insc):
 
 
 
+EMAIL_TEMPLATES = {
+    "inscricao_aluno": enviar_email_para_aluno,
+    "inscricao_admin": enviar_email_para_admin,
+    "assinatura_aluno": enviar_email_confirmacao_assinatura_aluno,
+    "assinatura_admin": enviar_email_admin_is_assinatura,
+    "lista_espera_admin": enviar_email_admin_lista_espera,
+    "clube_boas_vindas": enviar_email_boas_vindas_clube,
+    "clube_admin": enviar_email_admin_clube,
+    "inscricao_lote_admin": enviar_email_admin_inscricao_lote
+}
+
+
+def enfileirar_emails(*jobs):
+    """
+    Coloca jobs de e-mail (template, item) no outbox para envio assíncrono.
+    Sem fila configurada envia na hora como antes; se o SQS falhar, envia na hora
+    só os primeiros EMAIL_ENVIO_DIRETO_MAX e grava o resto em EmailsFalhos.
+    """
+    pendentes = list(jobs)
+    if not EMAIL_OUTBOX_QUEUE_URL:
+        for job in pendentes:
+            _enviar_email_job(*job)
+        return
+    nao_enfileirados = []
+    for i in range(0, len(pendentes), 10):
+        lote = pendentes[i:i + 10]
+        entradas = [
+            {"Id": str(n), "MessageBody": _corpo_email_job(*job)}
+            for n, job in enumerate(lote)
+        ]
+        try:
+            resp = sqs.send_message_batch(QueueUrl=EMAIL_OUTBOX_QUEUE_URL, Entries=entradas)
+        except Exception:
+            # fila inacessível: os lotes seguintes falhariam do mesmo jeito
+            logger.exception("Erro ao enfileirar e-mails no outbox")
+            nao_enfileirados.extend(pendentes[i:])
+            break
+        falhas = {f["Id"] for f in resp.get("Failed", [])}
+        nao_enfileirados.extend(job for n, job in enumerate(lote) if str(n) in falhas)
+    logger.info("E-mails enfileirados: %d de %d", len(pendentes) - len(nao_enfileirados), len(pendentes))
+    if nao_enfileirados:
+        _enviar_sem_outbox(nao_enfileirados)
+
+
+def _corpo_email_job(template, item):
+    return json.dumps({"template": template, "item": item}, default=str)
+
+
+def _enviar_sem_outbox(jobs):
+    """Fallback do outbox: envia os primeiros EMAIL_ENVIO_DIRETO_MAX e registra o resto em EmailsFalhos."""
+    for job in jobs[:EMAIL_ENVIO_DIRETO_MAX]:
+        _enviar_email_job(*job)
+    adiados = jobs[EMAIL_ENVIO_DIRETO_MAX:]
+    if not adiados:
+        return
+    logger.warning("Outbox indisponível: %d e-mails registrados em EmailsFalhos", len(adiados))
+    agora = datetime.now(TZ_BRASILIA).isoformat()
+    try:
+        with table_emails_falhos.batch_writer() as w:
+            for job in adiados:
+                w.put_item(Item={
+                    "id": str(uuid.uuid4()),
+                    "body": _corpo_email_job(*job),
+                    "erro": "Outbox indisponível",
+                    "criadoEm": agora
+                })
+    except Exception:
+        logger.exception("Erro ao registrar %d e-mails não enfileirados", len(adiados))
+
+
+def _enviar_email_job(template, item):
+    try:
+        EMAIL_TEMPLATES[template](item)
+    except Exception:
+        logger.exception("Erro ao enviar e-mail %s", template)
+
+
+def _enviar_com_ritmo(template, item):
+    """Envia respeitando SES_MAX_ENVIOS_POR_SEGUNDO, com backoff em throttling."""
+    global _proximo_envio_ses
+    for tentativa in range(SES_MAX_TENTATIVAS):
+        espera = _proximo_envio_ses - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        _proximo_envio_ses = max(time.monotonic(), _proximo_envio_ses) + 1.0 / SES_MAX_ENVIOS_POR_SEGUNDO
+        try:
+            EMAIL_TEMPLATES[template](item)
+            return
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in SES_ERROS_THROTTLING:
+                raise
+            if tentativa == SES_MAX_TENTATIVAS - 1:
+                raise
+            atraso = min(8.0, 0.5 * (2 ** tentativa)) * random.uniform(0.5, 1.0)
+            logger.warning("SES throttling em %s, tentativa %d; aguardando %.2fs", template, tentativa + 1, atraso)
+            time.sleep(atraso)
+
+
+@logs.por_invocacao
+def processar_outbox_emails(event, context):
+    """
+    Consumidor SQS do outbox de e-mails. Throttling do SES volta para a fila
+    (batchItemFailures); erros permanentes vão para a tabela EmailsFalhos.
+    """
+    falhas = []
+    for record in event.get("Records", []):
+        msg_id = record.get("messageId")
+        try:
+            job = json.loads(record["body"])
+            template, item = job["template"], job["item"]
+            if template not in EMAIL_TEMPLATES:
+                raise ValueError(f"Template de e-mail desconhecido: {template}")
+            _enviar_com_ritmo(template, item)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in SES_ERROS_THROTTLING:
+                falhas.append({"itemIdentifier": msg_id})
+                continue
+            if not _registrar_email_falho(record, e):
+                falhas.append({"itemIdentifier": msg_id})
+        except Exception as e:
+            if not _registrar_email_falho(record, e):
+                falhas.append({"itemIdentifier": msg_id})
+
+    logger.info("Outbox processado: %d mensagens, %d devolvidas", len(event.get("Records", [])), len(falhas))
+    return {"batchItemFailures": falhas}
+
+
+def _registrar_email_falho(record, erro):
+    logger.error("E-mail do outbox falhou definitivamente (%s): %s", record.get("messageId"), erro)
+    try:
+        table_emails_falhos.put_item(Item={
+            "id": record.get("messageId") or str(uuid.uuid4()),
+            "body": record.get("body"),
+            "erro": str(erro),
+            "criadoEm": datetime.now(TZ_BRASILIA).isoformat()
+        })
+    except Exception:
+        # sem o registro, a mensagem volta para a fila
+        logger.exception("Erro ao gravar e-mail falho %s", record.get("messageId"))
+        return False
+    return True
+
+
+def _to_decimal(v):
+    if v is None or v == "":
+        return None
+    try:
+        return Decimal(str(v)).quantize(Decimal("0.01"))
+    except Exception:
+        return None
+
+
+def montar_evento_asaas(body, raw, recebido_em):
+    """Item de AsaasEventos com o payload bruto e os campos usados no processamento."""
+    payment = body.get("payment") or {}
+    evento_id = (body.get("id") or "").strip()
+    if not evento_id:
+        # sem id do Asaas, a reentrega idêntica gera o mesmo hash
+        evento_id = "sha256:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return {
+        "id": evento_id,
+        "externalReference": (payment.get("externalReference") or "").strip(),
+        "evento": (body.get("event") or body.get("eventType") or "").strip() or None,
+        "paymentId": payment.get("id"),
+        "status": payment.get("status"),
+        "dataEvento": body.get("dateCreated") or recebido_em,
+        "dataEventoUtc": data_evento_utc(body.get("dateCreated")) or data_evento_utc(recebido_em),
+        "recebidoEm": recebido_em,
+        "payload": raw
+    }
+
+
+def data_evento_utc(valor):
+    """
+    Data de um evento do Asaas como texto UTC de largura fixa
+    ("2025-01-31T17:00:00.000000Z"), que ordena como datetime ao comparar
+    strings. Sem fuso, vale o horário de Brasília. None se não reconhecer.
+    """
+    m = _RE_DATA_ASAAS.match(str(valor or "").strip())
+    if not m:
+        return None
+    data, hora, fracao, fuso = m.groups()
+    hora = hora or "00:00:00"
+    if len(hora) == 5:
+        hora += ":00"
+    if fuso is None:
+        tz = TZ_BRASILIA
+    elif fuso == "Z":
+        tz = timezone.utc
+    else:
+        sinal = -1 if fuso[0] == "-" else 1
+        tz = timezone(sinal * timedelta(hours=int(fuso[1:3]), minutes=int(fuso[-2:])))
+    try:
+        dt = datetime.fromisoformat(f"{data}T{hora}.{(fracao or '')[:6].ljust(6, '0')}").replace(tzinfo=tz)
+    except ValueError:
+        return None
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def aplicar_evento_asaas(evento):
+    """
+    Aplica o evento na inscrição de forma idempotente. O update só acontece se a
+    ordem do status for maior que a gravada ou, na mesma ordem, se o evento for
+    mais novo; evento atrasado (ex.: PAYMENT_CREATED depois de RECEIVED) é ignorado.
+    A data comparada é a dataEventoUtc (asaasPaymentEventAtUtc na inscrição), não
+    o texto do Asaas, que mistura formatos e fusos.
+    Usa o client (thread-safe) para poder rodar no replay paralelo.
+    """
+    body = json.loads(evento["payload"]) if evento.get("payload") else {}
+    payment = body.get("payment") or {}
+    status = payment.get("status")
+    agora = datetime.now(TZ_BRASILIA).isoformat()
+    # eventos gravados antes da dataEventoUtc são normalizados aqui
+    data_utc = (evento.get("dataEventoUtc") or data_evento_utc(evento.get("dataEvento"))
+                or data_evento_utc(evento.get("recebidoEm")))
+
+    # cobrança paga, estornada ou em análise: a inscrição sai do renovacao-index
+    sai_da_renovacao = "" if status in ASAAS_STATUS_EM_ABERTO else " REMOVE renovacaoLinks, linksVencemEm"
+
+    resultado = "aplicado"
+    try:
+        ddb_client.update_item(
+            TableName=table_inscricoes.name,
+            Key={"id": evento["externalReference"]},
+            UpdateExpression=(
+                "SET asaasPaymentStatus = :s, "
+                "asaasPaymentStatusOrdem = :ord, "
+                "asaasPaymentId = :pid, "
+                "asaasPaymentEvent = :evt, "
+                "asaasPaymentEventAt = :evtat, "
+                "asaasPaymentEventAtUtc = :evtutc, "
+                "asaasPaymentBillingType = :bt, "
+                "asaasPaymentValue = :v, "
+                "asaasPaymentReceivedValue = :rv, "
+                "asaasPaymentCustomer = :c, "
+                "asaasPaymentUpdatedAt = :u, "
+                "updatedAt = :u" + sai_da_renovacao
+            ),
+            ConditionExpression=(
+                "attribute_exists(id) AND ("
+                "attribute_not_exists(asaasPaymentStatusOrdem) OR asaasPaymentStatusOrdem < :ord OR "
+                "(asaasPaymentStatusOrdem = :ord AND "
+                "(attribute_not_exists(asaasPaymentEventAtUtc) OR asaasPaymentEventAtUtc <= :evtutc)))"
+            ),
+            ExpressionAttributeValues={
+                ":s": status,
+                ":ord": ASAAS_ORDEM_STATUS.get(status, 0),
+                ":pid": payment.get("id"),
+                ":evt": evento.get("evento"),
+                ":evtat": evento["dataEvento"],
+                ":evtutc": data_utc,
+                ":bt": payment.get("billingType"),
+                ":v": _to_decimal(payment.get("value")),
+                ":rv": _to_decimal(payment.get("receivedValue")),
+                ":c": payment.get("customer"),
+                ":u": agora
+            }
+        )
+        logger.info("Webhook Asaas atualizado: %s status=%s", evento["externalReference"], status)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+        resultado = "ignorado"
+        logger.warning("Evento Asaas %s ignorado (inscrição %s inexistente ou evento mais antigo que o status atual)",
+                       evento["id"], evento["externalReference"])
+
+    try:
+        ddb_client.update_item(
+            TableName=table_asaas_eventos.name,
+            Key={"id": evento["id"]},
+            UpdateExpression="SET processadoEm = :u, resultado = :r",
+            ConditionExpression="attribute_not_exists(processadoEm)",
+            ExpressionAttributeValues={":u": agora, ":r": resultado}
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+    return resultado
+
+
+@logs.por_invocacao
+def processar_fila_eventos_asaas(event, context):
+    """Consumidor SQS dos eventos do webhook Asaas gravados em AsaasEventos."""
+    falhas = []
+    for record in event.get("Records", []):
+        try:
+            evento_id = json.loads(record["body"])["id"]
+            evento = table_asaas_eventos.get_item(Key={"id": evento_id}, ConsistentRead=True).get("Item")
+            if not evento:
+                logger.warning("Evento Asaas %s não encontrado em AsaasEventos", evento_id)
+                continue
+            if evento.get("processadoEm"):
+                continue
+            aplicar_evento_asaas(evento)
+        except Exception:
+            logger.exception("Erro ao processar evento Asaas %s", record.get("messageId"))
+            falhas.append({"itemIdentifier": record.get("messageId")})
+    return {"batchItemFailures": falhas}
+
+
+@logs.por_invocacao
+def reprocessar_eventos_asaas(event, context):
+    """
+    Reprocessa em paralelo os eventos de AsaasEventos ainda não processados
+    (ou todos, com {"todos": true}). Seguro de repetir: os updates são idempotentes.
+    """
+    event = event or {}
+    paralelismo = int(event.get("paralelismo") or 8)
+    scan_kwargs = {}
+    if not event.get("todos"):
+        scan_kwargs["FilterExpression"] = "attribute_not_exists(processadoEm)"
+
+    def _aplicar(evento):
+        try:
+            return aplicar_evento_asaas(evento)
+        except Exception:
+            logger.exception("Erro ao reprocessar evento Asaas %s", evento.get("id"))
+            return "erro"
+
+    contagem = {}
+    with ThreadPoolExecutor(max_workers=paralelismo) as pool:
+        while True:
+            resp = ddb_client.scan(TableName=table_asaas_eventos.name, **scan_kwargs)
+            for resultado in pool.map(_aplicar, resp.get("Items", [])):
+                contagem[resultado] = contagem.get(resultado, 0) + 1
+            if not resp.get("LastEvaluatedKey"):
+                break
+            scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    logger.info("Reprocessamento de eventos Asaas: %s", contagem)
+    return contagem
+
+
+def cpf_digitos(cpf):
+    """CPF só com os dígitos: "529.982.247-25" e "52998224725" são o mesmo aluno."""
+    return "".join(c for c in str(cpf or "") if c.isdigit())
+
+
+def chave_unicidade(cpf, curso):
+    return f"{cpf_digitos(cpf)}#{curso}"
+
+
 def verificar_inscricao_existente(cpf, curso):
-    resp = table_inscricoes.scan(
-        FilterExpression="cpf = :c AND curso = :u",
-        ExpressionAttributeValues={":c":cpf,":u":curso}
+    resp = table_unicidade.get_item(
+        Key={"chave": chave_unicidade(cpf, curso)},
+        ProjectionExpression="chave"
     )
-    exists = bool(resp.get("Items",[]))
+    exists = "Item" in resp
     logger.info("Verifica duplicidade cpf=%s curso=%s => %s", cpf, curso, exists)
     return exists
 
 
+def gravar_inscricao_unica(item, limites=None):
+    """
+    Grava a inscrição e o item-guarda (cpf+curso) de InscricoesUnicas na mesma
+    transação, junto com o resgate do cupom quando ele tem limites. Retorna
+    False se já existir inscrição para o mesmo cpf+curso; levanta
+    CupomIndisponivel se o cupom não puder mais ser resgatado.
+    """
+    guarda = {
+        "chave": chave_unicidade(item["cpf"], item["curso"]),
+        "inscricaoId": item["id"],
+        "criadoEm": item["dataInscricao"]
+    }
+    # o client do resource já serializa tipos Python (Decimal, dict, None...)
+    itens = [
+        {"Put": {
+            "TableName": table_unicidade.name,
+            "Item": guarda,
+            "ConditionExpression": "attribute_not_exists(chave)"
+        }},
+        {"Put": {
+            "TableName": table_inscricoes.name,
+            "Item": item,
+            "ConditionExpression": "attribute_not_exists(id)"
+        }}
+    ]
+    try:
+        if limites:
+            transacao_com_resgate(itens, limites, item["cpf"])
+        else:
+            ddb_client.transact_write_items(TransactItems=itens)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "TransactionCanceledException":
+            motivos = e.response.get("CancellationReasons") or []
+            if motivos and motivos[0].get("Code") == "ConditionalCheckFailed":
+                return False
+        raise
+    return True
+
+
+def buscar_unicidades_existentes(chaves):
+    """Das chaves cpf#curso informadas, devolve as que já têm item-guarda (BatchGetItem de 100 em 100)."""
+    chaves = list(chaves)
+    existentes = set()
+    for i in range(0, len(chaves), 100):
+        pendentes = {table_unicidade.name: {
+            "Keys": [{"chave": c} for c in chaves[i:i + 100]],
+            "ProjectionExpression": "chave"
+        }}
+        tentativa = 0
+        while pendentes:
+            resp = ddb_client.batch_get_item(RequestItems=pendentes)
+            existentes.update(it["chave"] for it in resp.get("Responses", {}).get(table_unicidade.name, []))
+            pendentes = resp.get("UnprocessedKeys") or {}
+            if pendentes:
+                tentativa += 1
+                if tentativa >= LOTE_MAX_TENTATIVAS:
+                    raise RuntimeError("BatchGetItem em InscricoesUnicas não processou todas as chaves")
+                _esperar_lote(tentativa)
+    return existentes
+
+
+def _esperar_lote(tentativa):
+    time.sleep(LOTE_BACKOFF_BASE_SEGUNDOS * (2 ** tentativa) * random.uniform(0.5, 1.0))
+
+
+def migrar_unicidade_inscricoes(event, context):
+    """
+    Backfill de InscricoesUnicas a partir das inscrições existentes.
+    Percorre Inscricoes paginando e pode ser retomado passando
+    {"inicio": <ultimaChave>} quando o tempo da Lambda acabar.
+    Inscrições antigas com o CPF pontuado passam a guardar só os dígitos e
+    os guardas com o CPF pontuado na chave são trocados pela chave só com
+    dígitos; inscrições que colidem na chave nova saem em duplicadosIds.
+    """
+    scan_kwargs = {"ProjectionExpression": "id, cpf, curso, dataInscricao"}
+    inicio = (event or {}).get("inicio")
+    if inicio:
+        scan_kwargs["ExclusiveStartKey"] = inicio
+
+    criados = duplicados = normalizados = 0
+    duplicados_ids = []
+    while True:
+        resp = table_inscricoes.scan(**scan_kwargs)
+        for insc in resp.get("Items", []):
+            cpf = (insc.get("cpf") or "").strip()
+            curso = (insc.get("curso") or "").strip()
+            try:
+                table_unicidade.put_item(
+                    Item={
+                        "chave": chave_unicidade(cpf, curso),
+                        "inscricaoId": insc["id"],
+                        "criadoEm": insc.get("dataInscricao")
+                    },
+                    ConditionExpression="attribute_not_exists(chave) OR inscricaoId = :i",
+                    ExpressionAttributeValues={":i": insc["id"]}
+                )
+                criados += 1
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                    raise
+                duplicados += 1
+                duplicados_ids.append(insc["id"])
+            if cpf != cpf_digitos(cpf):
+                remover_guarda_legado(f"{cpf}#{curso}", insc["id"])
+            if insc.get("cpf") and insc["cpf"] != cpf_digitos(cpf):
+                normalizados += normalizar_cpf_inscricao(insc["id"], insc["cpf"])
+
+        ultima = resp.get("LastEvaluatedKey")
+        if not ultima:
+            break
+        scan_kwargs["ExclusiveStartKey"] = ultima
+        if context and context.get_remaining_time_in_millis() < 30000:
+            logger.info("Backfill unicidade interrompido: criados=%d duplicados=%d cpfsNormalizados=%d",
+                        criados, duplicados, normalizados)
+            return {"concluido": False, "ultimaChave": ultima, "criados": criados, "duplicados": duplicados,
+                    "duplicadosIds": duplicados_ids, "cpfsNormalizados": normalizados}
+
+    logger.info("Backfill unicidade concluído: criados=%d duplicados=%d cpfsNormalizados=%d",
+                criados, duplicados, normalizados)
+    return {"concluido": True, "criados": criados, "duplicados": duplicados, "duplicadosIds": duplicados_ids,
+            "cpfsNormalizados": normalizados}
+
+
+def normalizar_cpf_inscricao(inscricao_id, cpf):
+    """Regrava o cpf da inscrição só com dígitos (se ainda estiver como lido); 1 se alterou."""
+    try:
+        table_inscricoes.update_item(
+            Key={"id": inscricao_id},
+            UpdateExpression="SET cpf = :novo",
+            ConditionExpression="cpf = :antigo",
+            ExpressionAttributeValues={":novo": cpf_digitos(cpf), ":antigo": cpf}
+        )
+        return 1
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+        return 0
+
+
+def remover_guarda_legado(chave, inscricao_id):
+    """Apaga o guarda gravado com o CPF pontuado na chave (só se ainda for desta inscrição)."""
+    try:
+        table_unicidade.delete_item(
+            Key={"chave": chave},
+            ConditionExpression="inscricaoId = :i",
+            ExpressionAttributeValues={":i": inscricao_id}
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+
 def verificar_interesse_existente(email):
-    resp = table_interesse.scan(
-        FilterExpression="email = :e",
-        ExpressionAttributeValues={":e":email}
+    resp = consultar_indice(
+        table_interesse,
+        IndexName=INTERESSE_EMAIL_INDEX,
+        KeyConditionExpression="email = :e",
+        ExpressionAttributeValues={":e":email},
+        ProjectionExpression="id",
+        Limit=1
     )
     exists = bool(resp.get("Items",[]))
     logger.info("Verifica interesse email=%s => %s", email, exists)
     return exists
 
 
-def listar_inscricoes():
-    items = table_inscricoes.scan().get("Items",[])
-    logger.info("Listagem de inscricoes, total=%d", len(items))
-    return resposta(200, items)
+def normalizar_email(email):
+    return str(email or "").strip().lower()
+
+
+def email_pode_estar_no_clube(email):
+    """
+    False = com certeza não está em ListaInteresse (sem ir ao DynamoDB);
+    True = talvez esteja (ou ainda não há filtro), confirmar com verificar_interesse_existente.
+    """
+    try:
+        filtro = filtro_interesse()
+    except Exception:
+        logger.exception("Filtro de interesse indisponível; consultando a tabela")
+        return True
+    if filtro is None:
+        filtro_interesse_stats["sem_filtro"] += 1
+        return True
+    return normalizar_email(email) in filtro
+
+
+def filtro_interesse():
+    """
+    Filtro de Bloom com os e-mails (normalizados) de ListaInteresse, ou None
+    enquanto não há snapshot. A base é o snapshot que publicar_filtro_interesse
+    grava no S3; a cada INTERESSE_FILTRO_ATUALIZAR_SEGUNDOS entram só os
+    cadastros novos, por query no GSI cadastro-index. Nenhum scan roda aqui.
+    """
+    estado = _filtro_interesse
+    agora = time.monotonic()
+    if estado["atualizado_em"] is not None and agora - estado["atualizado_em"] < INTERESSE_FILTRO_ATUALIZAR_SEGUNDOS:
+        return estado["filtro"]
+    # falhas abaixo só são tentadas de novo no próximo intervalo, não a cada GET
+    estado["atualizado_em"] = agora
+
+    filtro = estado["filtro"]
+    if filtro is None or agora - estado["carregado_em"] >= INTERESSE_FILTRO_SNAPSHOT_SEGUNDOS:
+        snapshot = carregar_snapshot_interesse()
+        if snapshot is not None:
+            filtro, desde = snapshot
+            estado.update(filtro=filtro, desde=desde, carregado_em=agora)
+    if filtro is None:
+        return None
+
+    desde = _agora_menos_margem_interesse()
+    novos = 0
+    for e in _emails_interesse(estado["desde"]):
+        filtro.adicionar(normalizar_email(e))
+        novos += 1
+    estado["desde"] = desde
+    logger.info("Filtro de interesse atualizado: %d e-mails novos", novos)
+    return filtro
+
+
+def _agora_menos_margem_interesse():
+    return (datetime.now(TZ_BRASILIA) - timedelta(seconds=INTERESSE_FILTRO_MARGEM_SEGUNDOS)).isoformat()
+
+
+def dia_cadastro(data_iso):
+    """Partição do GSI cadastro-index: o dia (AAAA-MM-DD, Brasília) de dataCadastro."""
+    return data_iso[:10]
+
+
+def _emails_interesse(desde):
+    """E-mails cadastrados depois de `desde`: uma query por dia no GSI cadastro-index."""
+    # dataCadastro é ISO no fuso de Brasília, então a comparação de strings segue a ordem do tempo
+    dia = datetime.fromisoformat(desde).astimezone(TZ_BRASILIA).date()
+    hoje = datetime.now(TZ_BRASILIA).date()
+    while dia <= hoje:
+        kwargs = {
+            "IndexName": INTERESSE_CADASTRO_INDEX,
+            "KeyConditionExpression": "diaCadastro = :dia AND dataCadastro > :d",
+            "ExpressionAttributeValues": {":dia": dia.isoformat(), ":d": desde},
+            "ProjectionExpression": "email",
+        }
+        while True:
+            resp = consultar_indice(table_interesse, **kwargs)
+            for it in resp.get("Items", []):
+                if it.get("email"):
+                    yield it["email"]
+            if not resp.get("LastEvaluatedKey"):
+                break
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        dia += timedelta(days=1)
+
+
+def _cliente_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = metricas.instrumentar(boto3.client('s3'), 'S3')
+    return _s3
+
+
+def carregar_snapshot_interesse():
+    """(filtro, desde) do snapshot no S3, ou None se ainda não foi publicado ou não deu para ler."""
+    if not INTERESSE_FILTRO_BUCKET:
+        return None
+    try:
+        obj = _cliente_s3().get_object(Bucket=INTERESSE_FILTRO_BUCKET, Key=INTERESSE_FILTRO_CHAVE)
+        meta = obj["Metadata"]
+        # snapshots sem 'bits' são de antes do arredondamento para bytes inteiros: posições não conferem
+        filtro = FiltroBloom.de_bytes(obj["Body"].read(), meta["hashes"], meta["capacidade"], meta["itens"],
+                                      meta["bits"])
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            logger.warning("Snapshot do filtro de interesse ainda não publicado")
+        else:
+            logger.exception("Erro lendo snapshot do filtro de interesse")
+        return None
+    except (KeyError, ValueError):
+        logger.warning("Snapshot do filtro de interesse em formato antigo ou inválido; aguardando republicação")
+        return None
+    logger.info("Snapshot do filtro de interesse carregado: %d e-mails, %d bytes, desde %s",
+                filtro.itens, filtro.tamanho_bytes(), meta["desde"])
+    return filtro, meta["desde"]
+
+
+@logs.por_invocacao
+def publicar_filtro_interesse(event, context):
+    """
+    Agendada: monta o filtro com um scan completo de ListaInteresse (fora de
+    qualquer requisição) e grava o snapshot no S3. 'desde' marca o início do
+    scan menos a margem; o que entrar depois disso os containers leem do GSI.
+    """
+    desde = _agora_menos_margem_interesse()
+    emails = []
+    kwargs = {"ProjectionExpression": "email"}
+    while True:
+        resp = table_interesse.scan(**kwargs)
+        emails.extend(normalizar_email(it["email"]) for it in resp.get("Items", []) if it.get("email"))
+        if not resp.get("LastEvaluatedKey"):
+            break
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    filtro = FiltroBloom(
+        max(INTERESSE_FILTRO_CAPACIDADE_MIN, 2 * len(emails)),
+        INTERESSE_FILTRO_TAXA_FP,
+        INTERESSE_FILTRO_MAX_BYTES
+    )
+    for e in emails:
+        filtro.adicionar(e)
+    _cliente_s3().put_object(
+        Bucket=INTERESSE_FILTRO_BUCKET, Key=INTERESSE_FILTRO_CHAVE, Body=filtro.para_bytes(),
+        ContentType="application/octet-stream",
+        Metadata={"desde": desde, "bits": str(filtro.bits), "hashes": str(filtro.hashes),
+                  "capacidade": str(filtro.capacidade), "itens": str(filtro.itens)}
+    )
+    logger.info("Filtro de interesse publicado: %d e-mails, %d bytes, %d hashes, fp estimado %.4f",
+                len(emails), filtro.tamanho_bytes(), filtro.hashes, filtro.taxa_estimada())
+    return {"emails": len(emails), "bytes": filtro.tamanho_bytes()}
+
+
+def listar_inscricoes(qs=None):
+    """
+    Listagem paginada de inscrições para o painel admin.
+      limite: itens por página (padrão LISTAGEM_LIMITE_PADRAO, máx. LISTAGEM_LIMITE_MAX)
+      cursor: continuação opaca devolvida em 'proximoCursor' na página anterior
+      campos: atributos separados por vírgula (vira ProjectionExpression)
+      curso:  filtra pelo curso com query no GSI curso-index, sem scan
+    """
+    qs = qs or {}
+    try:
+        limite = int(qs.get("limite") or LISTAGEM_LIMITE_PADRAO)
+    except ValueError:
+        return resposta(400, {"error": "Parâmetro 'limite' inválido."})
+    kwargs = {"Limit": max(1, min(limite, LISTAGEM_LIMITE_MAX))}
+
+    campos = [c.strip() for c in (qs.get("campos") or "").split(",") if c.strip()]
+    if campos:
+        nomes = {f"#c{i}": c for i, c in enumerate(campos)}
+        kwargs["ProjectionExpression"] = ", ".join(nomes)
+        kwargs["ExpressionAttributeNames"] = nomes
+
+    cursor = (qs.get("cursor") or "").strip()
+    if cursor:
+        inicio = decodificar_cursor(cursor)
+        if inicio is None:
+            return resposta(400, {"error": "Parâmetro 'cursor' inválido."})
+        kwargs["ExclusiveStartKey"] = inicio
+
+    curso = (qs.get("curso") or "").strip()
+    if curso:
+        resp = consultar_indice(
+            table_inscricoes,
+            IndexName=INSCRICOES_CURSO_INDEX,
+            KeyConditionExpression="curso = :c",
+            ExpressionAttributeValues={":c": curso},
+            **kwargs
+        )
+    else:
+        resp = table_inscricoes.scan(**kwargs)
+
+    items = resp.get("Items", [])
+    logger.info("Listagem de inscricoes, pagina=%d curso=%s", len(items), curso or "-")
+    return resposta(200, {
+        "items": items,
+        "proximoCursor": codificar_cursor(resp.get("LastEvaluatedKey"))
+    })
+
+
+def codificar_cursor(chave):
+    if not chave:
+        return None
+    raw = json.dumps(chave, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        chave = json.loads(raw)
+    except ValueError:
+        return None
+    # LastEvaluatedKey de Inscricoes/curso-index só tem atributos string (id, curso)
+    if not isinstance(chave, dict) or not chave or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in chave.items()):
+        return None
+    return chave
 
 
 def remover_inscricao(iid):
@@ -888,7 +2785,148 @@ def remover_inscricao(iid):
     logger.info("Inscrição removida: %s", iid)
     return resposta(200, {"message":"Inscrição removida"})
 
-def montar_pagamento_info(inscricao_id: str) -> dict:
+def carregar_catalogo(forcar=False):
+    """
+    Retorna o catálogo de cursos em memória, recarregando da tabela Cursos
+    quando o TTL expira (ou quando forcar=True).
+    """
+    carregado_em = _catalogo["carregado_em"]
+    if not forcar and carregado_em is not None and time.monotonic() - carregado_em < CATALOGO_TTL_SEGUNDOS:
+        catalogo_stats["hits"] += 1
+        return _catalogo
+
+    catalogo_stats["misses"] += 1
+    itens = []
+    scan_kwargs = {}
+    while True:
+        resp = table_cursos.scan(**scan_kwargs)
+        itens.extend(resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            break
+        scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    por_titulo = {}
+    for c in itens:
+        # mantém o primeiro encontrado, como fazia o scan por título
+        por_titulo.setdefault(c.get("title"), c)
+
+    # versão estável do catálogo (ETag de GET /cursos); só muda se algum curso mudar
+    versao = hashlib.sha1(
+        json.dumps(sorted(itens, key=lambda c: str(c.get("id"))), sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    if versao != _catalogo["versao"]:
+        _catalogo["modificado_em"] = datetime.now(timezone.utc).replace(microsecond=0)
+
+    precos.atualizar_cursos(itens)
+    _catalogo.update({
+        "itens": itens,
+        "por_id": {c["id"]: c for c in itens},
+        "por_titulo": por_titulo,
+        "carregado_em": time.monotonic(),
+        "versao": versao,
+        "json": JsonPronto(serializar(itens)),
+        "json_por_id": {c["id"]: JsonPronto(serializar(c)) for c in itens}
+    })
+    logger.info("Catálogo de cursos carregado: %d cursos", len(itens))
+    return _catalogo
+
+
+def invalidar_catalogo():
+    """Descarta o catálogo em memória; a próxima leitura recarrega do DynamoDB."""
+    _catalogo["carregado_em"] = None
+
+
+def _buscar_no_catalogo(indice, chave):
+    catalogo = carregar_catalogo()
+    item = catalogo[indice].get(chave)
+    if item is None and time.monotonic() - catalogo["carregado_em"] >= CATALOGO_RECARGA_MIN_SEGUNDOS:
+        # curso pode ter sido criado depois da última carga
+        item = carregar_catalogo(forcar=True)[indice].get(chave)
+    return item
+
+
+def buscar_curso_por_titulo(title):
+    return _buscar_no_catalogo("por_titulo", title)
+
+
+def buscar_curso_por_id(cid):
+    return _buscar_no_catalogo("por_id", cid)
+
+
+def listar_cursos():
+    return carregar_catalogo()["itens"]
+
+
+def montar_pagamento_info(inscricao_id: str):
+    """
+    Devolve (versao, documento JSON) da página de Pagamento com um único get_item:
+    o documento fica materializado na inscrição (pagamentoInfoJson) a cada escrita
+    e só é recalculado aqui se a versão gravada não bater com inscrição + curso atuais.
+    """
+    resp_insc = table_inscricoes.get_item(
+        Key={"id": inscricao_id},
+        ProjectionExpression=(
+            "id, curso, valorCurso, valorOriginal, isAssinatura, assinaturaSolicitadaEm, "
+            "pagamentoInfoJson, pagamentoInfoVersao"
+        )
+    )
+    insc = resp_insc.get("Item")
+    if not insc:
+        raise ValueError(f"Inscrição '{inscricao_id}' não encontrada.")
+
+    curso_title = (insc.get("curso") or "").strip()
+    if not curso_title:
+        raise ValueError("Título do curso ausente na inscrição.")
+
+    # Curso vem do catálogo em memória (metadados e fallback de preço)
+    curso_item = buscar_curso_por_titulo(curso_title)
+    if not curso_item:
+        raise ValueError(f"Curso '{curso_title}' não encontrado.")
+
+    versao = versao_pagamento_info(insc, curso_item)
+    if insc.get("pagamentoInfoJson") and insc.get("pagamentoInfoVersao") == versao:
+        return versao, JsonPronto(insc["pagamentoInfoJson"])
+
+    documento = JsonPronto(serializar(calcular_pagamento_info(insc, curso_item)))
+    try:
+        table_inscricoes.update_item(
+            Key={"id": inscricao_id},
+            UpdateExpression="SET pagamentoInfoJson = :j, pagamentoInfoVersao = :v",
+            ConditionExpression="attribute_exists(id)",
+            ExpressionAttributeValues={":j": documento, ":v": versao}
+        )
+    except Exception:
+        logger.exception("Erro ao materializar pagamento-info da inscrição %s", inscricao_id)
+    return versao, documento
+
+
+def versao_pagamento_info(insc, curso_item):
+    """Hash das entradas de calcular_pagamento_info (muda quando o documento precisa ser refeito)."""
+    entradas = [
+        PAGAMENTO_INFO_REGRAS,
+        insc.get("id"),
+        (insc.get("curso") or "").strip(),
+        _to_decimal(insc.get("valorCurso")),
+        _to_decimal(insc.get("valorOriginal")),
+        bool(insc.get("isAssinatura", False)),
+        insc.get("assinaturaSolicitadaEm")
+    ] + [curso_item.get(k) for k in ("price", "ativo", "obsPrice", "modalidade", "horario")]
+    return hashlib.sha1(json.dumps(entradas, default=str).encode("utf-8")).hexdigest()
+
+
+def pagamento_info_materializado(insc, curso_item):
+    """Atributos do pagamento-info para gravar junto com a inscrição (ou {} se não der para calcular)."""
+    try:
+        return {
+            "pagamentoInfoJson": serializar(calcular_pagamento_info(insc, curso_item)),
+            "pagamentoInfoVersao": versao_pagamento_info(insc, curso_item)
+        }
+    except ValueError as ve:
+        logger.warning("Pagamento-info não materializado para %s: %s", insc.get("id"), ve)
+        return {}
+
+
+def calcular_pagamento_info(insc, curso_item) -> dict:
     """
     Monta o payload de informações de pagamento para a página de Pagamento.
       - Base de preço PRIORITÁRIA:
@@ -899,36 +2937,12 @@ def montar_pagamento_info(inscricao_id: str) -> dict:
       - CARTÃO: base * 1.08; exibe 'até 12x de ...'
       - FULLSTACK: exibe plano de 6 mensalidades de R$250,00
     """
-    # 1) Busca inscrição
-    resp_insc = table_inscricoes.get_item(Key={"id": inscricao_id})
-    insc = resp_insc.get("Item")
-    if not insc:
-        raise ValueError(f"Inscrição '{inscricao_id}' não encontrada.")
-
+    inscricao_id = insc["id"]
     curso_title = (insc.get("curso") or "").strip()
     if not curso_title:
         raise ValueError("Título do curso ausente na inscrição.")
 
-    # 2) Busca curso por título (para metadados e fallback de preço)
-    resp_curso = table_cursos.scan(
-        FilterExpression="title = :t",
-        ExpressionAttributeValues={":t": curso_title}
-    )
-    cursos = resp_curso.get("Items", [])
-    if not cursos:
-        raise ValueError(f"Curso '{curso_title}' não encontrado.")
-    curso_item = cursos[0]
-
     # --- NOVO: escolhe a base priorizando valores salvos na inscrição ---
-    def _to_decimal(v):
-        if v is None or v == "":
-            return None
-        try:
-            # Decimal do DynamoDB já vem como Decimal; str cobre float/int
-            return Decimal(str(v)).quantize(Decimal("0.01"))
-        except Exception:
-            return None
-
     base = _to_decimal(insc.get("valorCurso")) or _to_decimal(insc.get("valorOriginal"))
 
     if base is None:
@@ -936,26 +2950,15 @@ def montar_pagamento_info(inscricao_id: str) -> dict:
         raw_price = (curso_item.get("price") or "").strip()
         if not raw_price:
             raise ValueError(f"Preço não definido para o curso '{curso_title}'.")
-        clean_price = raw_price.replace("R$", "").replace(".", "").replace(",", ".").strip()
         try:
-            base = Decimal(clean_price).quantize(Decimal("0.01"))
-        except Exception:
+            base = precos.preco_original(curso_title, curso_item)
+        except ValueError:
             raise ValueError(f"Preço inválido do curso: {raw_price}")
     # --- FIM DO NOVO TRECHO ---
 
-    is_fullstack = FULLSTACK_NOME_CURSO in curso_title
-
-    # 4) Regra PIX (desconto extra só para Fullstack)
-    desconto_pix = Decimal("150.00") if is_fullstack else Decimal("0.00")
-    pix_valor = (base - desconto_pix).quantize(Decimal("0.01"))
-    if pix_valor <= Decimal("0.00"):
-        pix_valor = Decimal("0.01")
-
-    # 5) Regra CARTÃO (8%)
-    cartao_valor = (base * Decimal("1.08")).quantize(Decimal("0.01"))
-    cartao_12x = (cartao_valor / Decimal("12")).quantize(Decimal("0.01"))
+    # PIX (desconto extra só para Fullstack), CARTÃO (8%, até 12x) e mensalidades (Fullstack)
+    v = precos.valores_metodos(base, curso_title)
 
-    # 6) Plano de Mensalidades (somente Fullstack)
     mensalidades_info = {
         "disponivel": False,
         "parcelas": 0,
@@ -963,32 +2966,32 @@ def montar_pagamento_info(inscricao_id: str) -> dict:
         "valorParcelaFmt": "",
         "mensagem": ""
     }
-    if is_fullstack:
+    if v["mensalidades"]:
         mensalidades_info = {
             "disponivel": True,
-            "parcelas": 6,
-            "valorParcela": 250.00,
-            "valorParcelaFmt": format_brl(250.00),
+            "parcelas": v["mensalidades"],
+            "valorParcela": float(v["valorMensalidade"]),
+            "valorParcelaFmt": v["valorMensalidadeFmt"],
             "mensagem": (
-                "Plano de 6 mensalidades: você recebe todo mês a cobrança de "
-                f"{format_brl(250.00)} (pagamento via PIX ou boleto). Simples e previsível. 😉"
+                f"Plano de {v['mensalidades']} mensalidades: você recebe todo mês a cobrança de "
+                f"{v['valorMensalidadeFmt']} (pagamento via PIX ou boleto). Simples e previsível. 😉"
             )
         }
 
-    # 7) Mensagens (com BRL formatado)
-    if is_fullstack and desconto_pix > 0:
+    # Mensagens (com BRL formatado)
+    if v["fullstack"] and v["descontoPix"] > 0:
         msg_pix = (
-            f"PIX com DESCONTO EXTRA de {format_brl(desconto_pix)} exclusivo para Fullstack. "
-            f"Aproveite: de {format_brl(base)} por {format_brl(pix_valor)} no PIX! 🎉"
+            f"PIX com DESCONTO EXTRA de {v['descontoPixFmt']} exclusivo para Fullstack. "
+            f"Aproveite: de {v['baseFmt']} por {v['pixFmt']} no PIX! 🎉"
         )
     else:
         msg_pix = (
-            f"Economize no PIX: pagamento à vista e acesso garantido. Valor: {format_brl(pix_valor)}."
+            f"Economize no PIX: pagamento à vista e acesso garantido. Valor: {v['pixFmt']}."
         )
 
     msg_cartao = (
-        f"No cartão: {format_brl(cartao_valor)} (já com taxas). "
-        f"Parcele em até 12x de {format_brl(cartao_12x)} e comece agora mesmo! 💳🚀"
+        f"No cartão: {v['cartaoFmt']} (já com taxas). "
+        f"Parcele em até {v['parcelasCartao']}x de {v['cartaoParcelaFmt']} e comece agora mesmo! 💳🚀"
     )
 
     # 8) Retorno para o front
@@ -999,22 +3002,22 @@ def montar_pagamento_info(inscricao_id: str) -> dict:
             "ativo": bool(curso_item.get("ativo", True))
         },
         # OBS: precoBase agora reflete a base escolhida (valorCurso > valorOriginal > price do curso)
-        "precoBase": float(base),
-        "precoBaseFmt": format_brl(base),
+        "precoBase": float(v["base"]),
+        "precoBaseFmt": v["baseFmt"],
         "pix": {
-            "valor": float(pix_valor),
-            "valorFmt": format_brl(pix_valor),
-            "descontoExtraAplicado": float(desconto_pix),
-            "descontoExtraAplicadoFmt": format_brl(desconto_pix) if desconto_pix > 0 else "",
+            "valor": float(v["pix"]),
+            "valorFmt": v["pixFmt"],
+            "descontoExtraAplicado": float(v["descontoPix"]),
+            "descontoExtraAplicadoFmt": v["descontoPixFmt"],
             "mensagem": msg_pix
         },
         "cartao": {
-            "valor": float(cartao_valor),
-            "valorFmt": format_brl(cartao_valor),
+            "valor": float(v["cartao"]),
+            "valorFmt": v["cartaoFmt"],
             "ate12x": {
-                "parcelas": 12,
-                "valorParcela": float(cartao_12x),
-                "valorParcelaFmt": format_brl(cartao_12x)
+                "parcelas": v["parcelasCartao"],
+                "valorParcela": float(v["cartaoParcela"]),
+                "valorParcelaFmt": v["cartaoParcelaFmt"]
             },
             "mensagem": msg_cartao
         },
@@ -1031,28 +3034,88 @@ def montar_pagamento_info(inscricao_id: str) -> dict:
     }
 
 
-def format_brl(value) -> str:
-    """
-    Formata número/Decimal como BRL (pt-BR), ex.: 1499.9 -> 'R$ 1.499,90'
-    """
-    d = Decimal(str(value)).quantize(Decimal("0.01"))
-    s = f"{d:,.2f}"                 # '1,234.56'
-    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {s}"
-
-
-
 def validar_jwt(hdr):
     if not hdr or not hdr.startswith("Bearer "):
         raise Exception("Invalid auth")
     token = hdr.split()[1]
-    dec = auth.verify_id_token(token)
+    dec = init_firebase().verify_id_token(token)
     logger.info("JWT validado: uid=%s email=%s", dec["uid"], dec.get("email"))
     return dec["uid"], dec.get("email")
 
 
+class JsonPronto(str):
+    """JSON já serializado (ex.: catálogo, cupons em cache); resposta() o usa sem reencodar."""
+    __slots__ = ()
+
+
+class _SemFloatExato(Exception):
+    """Decimal cujo float mais próximo não tem o mesmo valor: serializar() troca de encoder."""
+
+
+class _NumeroExato(float):
+    """Decimal levado ao encoder em Python, que escreve `texto` no lugar do repr do float."""
+    __slots__ = ("texto",)
+
+    def __new__(cls, valor):
+        numero = float.__new__(cls, valor)
+        # str(Decimal) é exato e já é um número JSON válido ("0.1000000000000000000001", "1E-30")
+        numero.texto = str(valor)
+        return numero
+
+
+def _json_padrao(valor):
+    # Decimal do DynamoDB sai sempre como número JSON (nunca string) e sem perder dígitos:
+    # inteiro como int; fracionário como float quando o texto do float é exatamente o
+    # mesmo número (o caso comum, ex. "1499.99"), e senão pelo encoder exato.
+    if isinstance(valor, Decimal):
+        if not valor.is_finite():
+            raise TypeError(f"Decimal não finito não é JSON: {valor}")
+        if valor == valor.to_integral_value():
+            return int(valor)
+        f = float(valor)
+        if Decimal(repr(f)) != valor:
+            raise _SemFloatExato()
+        return f
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor)
+    if isinstance(valor, Binary):
+        return base64.b64encode(valor.value).decode("ascii")
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+def _json_padrao_exato(valor):
+    if isinstance(valor, Decimal) and valor.is_finite() and valor != valor.to_integral_value():
+        return _NumeroExato(valor)
+    return _json_padrao(valor)
+
+
+def _float_texto(valor, _repr=float.__repr__):
+    return valor.texto if isinstance(valor, _NumeroExato) else _repr(valor)
+
+
+_encoder = json.JSONEncoder(default=_json_padrao, separators=(",", ":"))
+
+
+def serializar(obj):
+    """
+    Serializa para JSON aceitando os tipos que o boto3 devolve (Decimal, set, Binary).
+    Usa o encoder em C; só um Decimal sem float de mesmo valor (muitos dígitos)
+    faz a resposta passar pelo encoder em Python, que escreve o texto exato.
+    """
+    try:
+        return _encoder.encode(obj)
+    except _SemFloatExato:
+        pass
+    iterencode = json.encoder._make_iterencode(
+        {}, _json_padrao_exato, json.encoder.encode_basestring_ascii, None, _float_texto,
+        ":", ",", False, False, True
+    )
+    return "".join(iterencode(obj, 0))
+
+
 def resposta(status, body):
-    return {"statusCode": status, "headers": cors_headers(), "body": json.dumps(body)}
+    corpo = body if isinstance(body, JsonPronto) else serializar(body)
+    return {"statusCode": status, "headers": cors_headers(), "body": corpo}
 
 def cors_headers():
     return {
@@ -1061,3 +3124,7 @@ def cors_headers():
         "Access-Control-Allow-Methods": "OPTIONS,GET,POST,DELETE",
         "Content-Type": "application/json"
     }
+
+
+RELATORIO_COLD_START["importHandlerMs"] = round((time.perf_counter() - _INICIO_IMPORT) * 1000, 2)
+logger.info("Cold start: %s", RELATORIO_COLD_START)
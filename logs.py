@@ -0,0 +1,223 @@
+"""
+Logs estruturados: cada registro vira uma linha JSON compacta com request id e
+rota, com dados pessoais redigidos pela POLITICA_PII antes de sair.
+
+  - Os registros de uma invocação ficam em buffer e saem numa única escrita no
+    fim (por_invocacao); acima de LOG_BUFFER_MAX_BYTES o buffer é descarregado
+    antes, para não segurar memória em lotes grandes.
+  - payload() registra bodies/itens completos só numa amostra das invocações
+    (LOG_AMOSTRA_PAYLOAD) ou quando a invocação termina com erro; fora disso
+    sai só a mensagem com os campos resumidos.
+  - Fora de uma invocação (import, cold start) os registros saem na hora.
+
+Os módulos continuam usando logging.getLogger() normalmente; configurar()
+troca o handler da raiz pelo deste módulo.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+LOG_NIVEL            = os.environ.get('LOG_NIVEL', 'INFO')
+LOG_AMOSTRA_PAYLOAD  = float(os.environ.get('LOG_AMOSTRA_PAYLOAD', '0.01'))
+LOG_BUFFER_MAX_BYTES = 256 * 1024
+
+# campo (minúsculo) -> estratégia: "mascarar" (mantém o final), "hash" (correlaciona sem expor) ou "remover"
+POLITICA_PII = {
+    "cpf": "mascarar", "cpfcnpj": "mascarar", "rg": "mascarar",
+    "email": "mascarar", "whatsapp": "mascarar", "telefone": "mascarar", "celular": "mascarar",
+    "mobilephone": "mascarar", "phone": "mascarar",
+    "nome": "mascarar", "nomecompleto": "mascarar", "name": "mascarar", "nomeamigo": "mascarar",
+    "datanascimento": "remover", "endereco": "remover", "address": "remover", "postalcode": "remover",
+    "useragent": "remover", "ip": "hash"
+}
+_RE_EMAIL = re.compile(r"[\w.+-]+@([\w-]+(?:\.[\w-]+)+)")
+_RE_CPF = re.compile(r"(?<!\d)\d{3}\.?\d{3}\.?\d{3}-?\d{2}(?!\d)")
+# telefone formatado: (11) 98765-4321, +55 11 98765 4321, 11 8765-4321 (só dígitos corridos já caem no _RE_CPF)
+_RE_TELEFONE = re.compile(r"(?<![\w+])(?:\+?55\s?)?(?:\(\d{2}\)\s?|\d{2}[\s-]?)9?\d{4}[\s-]\d{4}(?!\d)")
+# atributos de todo LogRecord; o que sobrar veio do extra= da chamada
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# estado da invocação atual; buffer None = sem invocação (escreve direto)
+_contexto = {"rid": None, "rota": None, "amostrado": False, "erro": False}
+_buffer = None
+_buffer_bytes = 0
+
+
+def mascarar(valor):
+    texto = str(valor)
+    if "@" in texto:
+        usuario, _, dominio = texto.partition("@")
+        return f"{usuario[:1]}***@{dominio}"
+    return "***" + texto[-2:] if len(texto) > 4 else "***"
+
+
+def redigir(obj):
+    """Cópia de obj com os campos da POLITICA_PII redigidos (dicts e listas em qualquer nível)."""
+    if isinstance(obj, dict):
+        saida = {}
+        for k, v in obj.items():
+            estrategia = POLITICA_PII.get(str(k).lower())
+            if estrategia is None or v in (None, ""):
+                saida[k] = redigir(v)
+            elif estrategia == "hash":
+                saida[k] = hashlib.sha256(str(v).encode("utf-8")).hexdigest()[:12]
+            elif estrategia == "mascarar":
+                saida[k] = mascarar(v)
+            else:
+                saida[k] = "[removido]"
+        return saida
+    if isinstance(obj, (list, tuple, set)):
+        return [redigir(v) for v in obj]
+    if isinstance(obj, str):
+        return redigir_texto(obj)
+    return obj
+
+
+def redigir_texto(texto):
+    """Mascara CPFs, e-mails e telefones que aparecem soltos numa mensagem."""
+    if "@" in texto:
+        texto = _RE_EMAIL.sub(lambda m: f"***@{m.group(1)}", texto)
+    texto = _RE_CPF.sub(lambda m: "***" + m.group(0)[-2:], texto)
+    return _RE_TELEFONE.sub(lambda m: "***" + m.group(0)[-2:], texto)
+
+
+def _linha(nivel, mensagem, extra=None, t=None):
+    doc = {"t": round(t or time.time(), 3), "nivel": nivel, "rid": _contexto["rid"], "rota": _contexto["rota"],
+           "msg": mensagem}
+    if extra:
+        doc.update(extra)
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _escrever(linha, resumo=None):
+    """linha: JSON pronto ou, para payloads, função que serializa só se a linha completa for usada."""
+    global _buffer_bytes
+    if _buffer is None:
+        sys.stdout.write(linha + "\n")
+        return
+    _buffer.append((linha, resumo))
+    _buffer_bytes += len(resumo or "") if callable(linha) else len(linha)
+    if _buffer_bytes > LOG_BUFFER_MAX_BYTES:
+        descarregar()
+
+
+def escrever(linha):
+    """Linha já formatada (ex.: métricas EMF) no mesmo buffer dos logs, sem redação."""
+    _escrever(linha)
+
+
+class _HandlerJson(logging.Handler):
+
+    def emit(self, record):
+        try:
+            args = record.args
+            if args:
+                args = tuple(redigir(a) if isinstance(a, (dict, list, tuple, set)) else a for a in args) \
+                    if isinstance(args, tuple) else redigir(args)
+                mensagem = str(record.msg) % args
+            else:
+                mensagem = str(record.msg)
+            extra = redigir({k: v for k, v in vars(record).items() if k not in _ATRIBUTOS_RECORD})
+            if record.exc_info:
+                extra["exc"] = redigir_texto(logging.Formatter().formatException(record.exc_info))
+            if record.levelno >= logging.ERROR:
+                _contexto["erro"] = True
+            _escrever(_linha(record.levelname, redigir_texto(mensagem), extra))
+        except Exception:
+            self.handleError(record)
+
+
+def configurar():
+    """Põe o handler JSON como único handler do logger raiz."""
+    raiz = logging.getLogger()
+    raiz.handlers = [_HandlerJson()]
+    raiz.setLevel(LOG_NIVEL)
+
+
+def payload(mensagem, dados, **campos):
+    """
+    Registra `dados` (body, item, resposta externa) redigido, só se a invocação
+    foi amostrada ou terminar com erro; `campos` (ids, status) saem sempre.
+    """
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
+    resumo = redigir(campos) if campos else None
+    if _buffer is None:
+        if random.random() < LOG_AMOSTRA_PAYLOAD:
+            _escrever(_linha("INFO", mensagem, {**(resumo or {}), "payload": redigir(dados)}))
+        elif resumo:
+            _escrever(_linha("INFO", mensagem, resumo))
+        return
+    t = time.time()
+
+    def completo():
+        # serializado só no descarregamento, e só se a amostra/erro pedir o payload
+        return _linha("INFO", mensagem, {**(resumo or {}), "payload": redigir(dados)}, t)
+    _escrever(completo, resumo=_linha("INFO", mensagem, resumo) if resumo else "")
+
+
+def iniciar(request_id=None, rota=None):
+    global _buffer, _buffer_bytes
+    _contexto.update(rid=request_id, rota=rota, amostrado=random.random() < LOG_AMOSTRA_PAYLOAD, erro=False)
+    _buffer, _buffer_bytes = [], 0
+
+
+def definir_rota(rota):
+    _contexto["rota"] = rota
+
+
+def marcar_erro():
+    _contexto["erro"] = True
+
+
+def descarregar():
+    """Escreve o buffer num único write; payloads só entram se amostrados ou com erro na invocação."""
+    global _buffer_bytes
+    if not _buffer:
+        return
+    completos = _contexto["amostrado"] or _contexto["erro"]
+    linhas = []
+    for linha, resumo in _buffer:
+        if callable(linha):
+            linha = linha() if completos else resumo
+        if linha:
+            linhas.append(linha)
+    _buffer.clear()
+    _buffer_bytes = 0
+    if linhas:
+        sys.stdout.write("\n".join(linhas) + "\n")
+        sys.stdout.flush()
+
+
+def finalizar():
+    global _buffer
+    descarregar()
+    _buffer = None
+    _contexto.update(rid=None, rota=None, amostrado=False, erro=False)
+
+
+def por_invocacao(fn):
+    """
+    Decorator das funções de entrada da Lambda: abre o buffer com o request id
+    do context, marca erro em exceção ou statusCode >= 500 e descarrega no fim.
+    """
+    @functools.wraps(fn)
+    def envolvido(event, context):
+        iniciar(getattr(context, "aws_request_id", None), fn.__name__)
+        try:
+            resp = fn(event, context)
+            if isinstance(resp, dict) and isinstance(resp.get("statusCode"), int) and resp["statusCode"] >= 500:
+                marcar_erro()
+            return resp
+        except Exception:
+            marcar_erro()
+            raise
+        finally:
+            finalizar()
+    return envolvido
@@ -0,0 +1,175 @@
+"""
+Instrumentação de latência por rota e por dependência (DynamoDB, SES, SQS, Asaas),
+emitida no CloudWatch Embedded Metric Format (uma linha JSON por documento, que
+sai pelo buffer de logs.py junto com os logs da invocação).
+
+Com METRICAS_EMF=0 os objetos não são embrulhados e span() não mede nada.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import logs
+
+METRICAS_ATIVAS = os.environ.get('METRICAS_EMF', '1') == '1'
+NAMESPACE       = os.environ.get('METRICAS_NAMESPACE', 'ProgramaAI/Inscricoes')
+
+# operações do DynamoDB que aceitam ReturnConsumedCapacity
+OPERACOES_DYNAMO = frozenset((
+    "get_item", "put_item", "update_item", "delete_item", "query", "scan",
+    "batch_get_item", "batch_write_item", "transact_write_items", "transact_get_items"
+))
+
+# spans da invocação atual; None quando não há coleta em andamento
+_coleta = None
+
+
+def iniciar():
+    global _coleta
+    _coleta = []
+
+
+def _registrar(dependencia, operacao, inicio, erro=None, capacidade=None, retries=0):
+    if _coleta is None:
+        return
+    _coleta.append({
+        "dependencia": dependencia,
+        "operacao": operacao,
+        "ms": (time.perf_counter() - inicio) * 1000,
+        "erro": erro,
+        "capacidade": capacidade,
+        "retries": retries
+    })
+
+
+def _capacidade(resp):
+    cc = resp.get("ConsumedCapacity") if isinstance(resp, dict) else None
+    if not cc:
+        return None
+    if isinstance(cc, dict):
+        cc = [cc]
+    return float(sum(c.get("CapacityUnits", 0) for c in cc))
+
+
+@contextmanager
+def span(dependencia, operacao):
+    """Mede um trecho arbitrário (ex.: chamada HTTP ao Asaas)."""
+    if _coleta is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        _registrar(dependencia, operacao, inicio, erro=type(e).__name__)
+        raise
+    _registrar(dependencia, operacao, inicio)
+
+
+class _Instrumentado:
+    """Proxy que mede cada chamada de método de um Table/client do boto3."""
+
+    def __init__(self, alvo, dependencia, dynamo):
+        self._alvo = alvo
+        self._dependencia = dependencia
+        self._dynamo = dynamo
+
+    def __getattr__(self, nome):
+        attr = getattr(self._alvo, nome)
+        if not callable(attr) or nome.startswith("_"):
+            return attr
+        injeta_capacidade = self._dynamo and nome in OPERACOES_DYNAMO
+        dependencia = self._dependencia
+
+        def medido(*args, **kwargs):
+            if _coleta is None:
+                return attr(*args, **kwargs)
+            if injeta_capacidade:
+                kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+            inicio = time.perf_counter()
+            try:
+                resp = attr(*args, **kwargs)
+            except Exception as e:
+                resp_erro = getattr(e, "response", None)
+                codigo = resp_erro.get("Error", {}).get("Code") if isinstance(resp_erro, dict) else None
+                _registrar(dependencia, nome, inicio, erro=codigo or type(e).__name__)
+                raise
+            retries = resp.get("ResponseMetadata", {}).get("RetryAttempts", 0) if isinstance(resp, dict) else 0
+            _registrar(dependencia, nome, inicio, capacidade=_capacidade(resp), retries=retries)
+            return resp
+
+        self.__dict__[nome] = medido
+        return medido
+
+
+def instrumentar(alvo, dependencia, dynamo=False):
+    if not METRICAS_ATIVAS:
+        return alvo
+    return _Instrumentado(alvo, dependencia, dynamo)
+
+
+def _emitir(documento):
+    # vai para o buffer de logs.py: sai junto com os logs na única escrita da invocação
+    logs.escrever(json.dumps(documento, separators=(",", ":")))
+
+
+def finalizar(rota, status, inicio, erro=None):
+    """Emite as métricas da rota e de cada dependência usada na invocação."""
+    global _coleta
+    spans, _coleta = _coleta, None
+    if not METRICAS_ATIVAS or spans is None:
+        return
+    agora_ms = int(time.time() * 1000)
+    classe = f"{status // 100}xx"
+    _emitir({
+        "_aws": {
+            "Timestamp": agora_ms,
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["Rota"], ["Rota", "Classe"]],
+                "Metrics": [
+                    {"Name": "Requisicoes", "Unit": "Count"},
+                    {"Name": "Latencia", "Unit": "Milliseconds"},
+                    {"Name": "Erros", "Unit": "Count"}
+                ]
+            }]
+        },
+        "Rota": rota,
+        "Classe": classe,
+        "Requisicoes": 1,
+        "Latencia": round((time.perf_counter() - inicio) * 1000, 3),
+        "Erros": 1 if status >= 500 else 0,
+        "Status": status,
+        "Erro": erro
+    })
+
+    agrupados = {}
+    for s in spans:
+        agrupados.setdefault((s["dependencia"], s["operacao"]), []).append(s)
+    for (dependencia, operacao), itens in agrupados.items():
+        capacidades = [s["capacidade"] for s in itens if s["capacidade"] is not None]
+        doc = {
+            "_aws": {
+                "Timestamp": agora_ms,
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [["Dependencia"], ["Dependencia", "Operacao"], ["Rota", "Dependencia"]],
+                    "Metrics": [
+                        {"Name": "LatenciaDependencia", "Unit": "Milliseconds"},
+                        {"Name": "Retries", "Unit": "Count"},
+                        {"Name": "ErrosDependencia", "Unit": "Count"}
+                    ] + ([{"Name": "CapacidadeConsumida", "Unit": "Count"}] if capacidades else [])
+                }]
+            },
+            "Rota": rota,
+            "Dependencia": dependencia,
+            "Operacao": operacao,
+            "LatenciaDependencia": [round(s["ms"], 3) for s in itens],
+            "Retries": sum(s["retries"] for s in itens),
+            "ErrosDependencia": sum(1 for s in itens if s["erro"]),
+            "ClassesErro": sorted({s["erro"] for s in itens if s["erro"]})
+        }
+        if capacidades:
+            doc["CapacidadeConsumida"] = sum(capacidades)
+        _emitir(doc)
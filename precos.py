@@ -0,0 +1,196 @@
+"""
+Regras de preço em um só lugar: parse dos preços dos cursos ('R$1.499,99') e
+dos cupons ('10%', 'R$100'), desconto PIX do Fullstack, acréscimo do cartão,
+parcelas e os valores já formatados em BRL.
+
+As tabelas são montadas na carga, não na leitura:
+  - atualizar_cursos (carga do catálogo) parseia o price de cada curso e já
+    calcula o valor sem cupom e a tabela por método (PIX/cartão/mensalidades);
+  - registrar_cupons (quando o handler carrega um cupom do DynamoDB) calcula o
+    valor do curso com aquele desconto e a tabela por método dele.
+Os cupons não entram na carga do catálogo porque vêm por par (cupom, curso) do
+GSI cupom-curso-index; pré-carregar todos seria um scan em Descontos. Um
+curso cujo price muda é recalculado com todos os descontos já registrados, e
+cursos removidos saem da tabela. Inscrição, /paymentlink e pagamento-info só
+leem; valores_com_cupom ainda calcula (e guarda) um desconto que não passou
+por registrar_cupons, para não depender da ordem das cargas.
+"""
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+FULLSTACK_NOME_CURSO   = "Curso Presencial Programação Fullstack"
+CENTAVO                = Decimal("0.01")
+DESCONTO_PIX_FULLSTACK = Decimal("150.00")
+ACRESCIMO_CARTAO       = Decimal("1.08")
+PARCELAS_CARTAO        = 12
+MENSALIDADES_FULLSTACK = 6
+VALOR_MENSALIDADE      = Decimal("250.00")
+METODOS_CACHE_MAX      = 4096
+
+# título -> {"price": str, "precoOriginal": Decimal | None, "erro": str | None, "cupons": {desconto: Decimal}}
+_cursos = {}
+# título -> descontos ('10%', 'R$100') dos cupons já carregados para o curso
+_descontos = {}
+# (base, fullstack) -> valores por método
+_metodos = OrderedDict()
+
+
+def format_brl(value) -> str:
+    """
+    Formata número/Decimal como BRL (pt-BR), ex.: 1499.9 -> 'R$ 1.499,90'
+    """
+    d = Decimal(str(value)).quantize(CENTAVO)
+    s = f"{d:,.2f}"                 # '1,234.56'
+    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {s}"
+
+
+def parse_preco(raw):
+    """'R$1.499,99' -> Decimal('1499.99') (sem arredondar). ValueError se inválido."""
+    clean = (raw or "").replace("R$", "").replace(".", "").replace(",", ".").strip()
+    try:
+        return Decimal(clean)
+    except InvalidOperation:
+        raise ValueError(f"Preço inválido: {raw}")
+
+
+def parse_desconto(desconto):
+    """'10%' -> ('%', Decimal('0.1')); 'R$100' -> ('R$', Decimal('100.00')); None se vazio ou inválido."""
+    if not desconto or not isinstance(desconto, str):
+        return None
+    try:
+        if desconto.endswith("%"):
+            return "%", Decimal(desconto.rstrip("%")) / Decimal("100")
+        return "R$", Decimal(desconto.replace("R$", "").replace(",", ".").strip()).quantize(CENTAVO)
+    except InvalidOperation:
+        return None
+
+
+def aplicar_desconto(valor_original, desconto):
+    """Valor com o desconto já parseado (ou sem desconto, se None), arredondado em centavos."""
+    desconto_valor = Decimal("0")
+    if desconto is not None:
+        tipo, valor = desconto
+        desconto_valor = (valor_original * valor).quantize(CENTAVO) if tipo == "%" else valor
+    return _sem_zero_negativo((valor_original - desconto_valor).quantize(CENTAVO))
+
+
+def _sem_zero_negativo(valor):
+    # 100% sobre preço com centavos fracionários dá -0.00, que sairia 'R$ -0,00'
+    return abs(valor) if not valor else valor
+
+
+def atualizar_cursos(itens):
+    """Chamado na carga do catálogo: reaproveita os cursos cujo price não mudou e descarta os removidos."""
+    vistos = set()
+    for c in itens:
+        titulo = c.get("title")
+        if not titulo or titulo in vistos:
+            continue  # o catálogo mantém o primeiro curso de cada título
+        vistos.add(titulo)
+        _entrada_curso(titulo, c)
+    for titulo in set(_cursos) - vistos:
+        del _cursos[titulo]
+        _descontos.pop(titulo, None)
+
+
+def registrar_cupons(titulo, descontos):
+    """Chamado na carga de cupons do curso: calcula o valor com cada desconto ('10%', 'R$100')."""
+    conhecidos = _descontos.setdefault(titulo, set())
+    conhecidos.update(d for d in descontos if isinstance(d, str))
+    entrada = _cursos.get(titulo)
+    if entrada is not None and entrada["precoOriginal"] is not None:
+        for desconto in conhecidos:
+            _valor_com_desconto(entrada, titulo, desconto)
+
+
+def _entrada_curso(titulo, curso_item):
+    price = curso_item.get("price", "")
+    entrada = _cursos.get(titulo)
+    if entrada is not None and entrada["price"] == price:
+        return entrada
+    try:
+        original, erro = parse_preco(price), None
+    except (ValueError, AttributeError):
+        original, erro = None, f"Preço inválido: {price}"
+    entrada = {"price": price, "precoOriginal": original, "erro": erro, "cupons": {}}
+    _cursos[titulo] = entrada
+    if original is not None:
+        valores_metodos(original, titulo)
+        _valor_com_desconto(entrada, titulo, None)
+        for desconto in _descontos.get(titulo, ()):
+            _valor_com_desconto(entrada, titulo, desconto)
+    return entrada
+
+
+def _valor_com_desconto(entrada, titulo, desconto):
+    cupons = entrada["cupons"]
+    valor = cupons.get(desconto)
+    if valor is None:
+        valor = cupons[desconto] = aplicar_desconto(entrada["precoOriginal"], parse_desconto(desconto))
+        valores_metodos(valor, titulo)
+    return valor
+
+
+def preco_original(titulo, curso_item):
+    """Preço do curso como Decimal (sem arredondar). ValueError se o price for inválido."""
+    entrada = _entrada_curso(titulo, curso_item)
+    if entrada["erro"]:
+        raise ValueError(entrada["erro"])
+    return entrada["precoOriginal"]
+
+
+def valores_com_cupom(titulo, curso_item, desconto):
+    """
+    (preço original, preço com o desconto do cupom) do curso. desconto é o campo
+    'desconto' do cupom ('10%', 'R$100') ou None; desconto inválido não se aplica.
+    """
+    original = preco_original(titulo, curso_item)
+    chave = desconto if isinstance(desconto, str) else None
+    return original, _valor_com_desconto(_cursos[titulo], titulo, chave)
+
+
+def valores_metodos(base, titulo):
+    """
+    Valores por método para a base (preço já com cupom):
+      - PIX: base - R$150 nos cursos Fullstack (mínimo R$0,01)
+      - CARTÃO: base * 1.08, em até 12x
+      - mensalidades: 6x R$250 nos cursos Fullstack
+    Memoizado por (base, Fullstack); não altere o dict devolvido.
+    """
+    base = _sem_zero_negativo(Decimal(str(base)).quantize(CENTAVO))
+    fullstack = FULLSTACK_NOME_CURSO in titulo
+    chave = (base, fullstack)
+    valores = _metodos.get(chave)
+    if valores is not None:
+        _metodos.move_to_end(chave)
+        return valores
+
+    desconto_pix = DESCONTO_PIX_FULLSTACK if fullstack else Decimal("0.00")
+    pix = (base - desconto_pix).quantize(CENTAVO)
+    if pix <= Decimal("0.00"):
+        # Evita valor zero/negativo no Asaas
+        pix = CENTAVO
+    cartao = (base * ACRESCIMO_CARTAO).quantize(CENTAVO)
+    parcela = (cartao / Decimal(PARCELAS_CARTAO)).quantize(CENTAVO)
+    valores = {
+        "fullstack": fullstack,
+        "base": base,
+        "baseFmt": format_brl(base),
+        "pix": pix,
+        "pixFmt": format_brl(pix),
+        "descontoPix": desconto_pix,
+        "descontoPixFmt": format_brl(desconto_pix) if desconto_pix > 0 else "",
+        "cartao": cartao,
+        "cartaoFmt": format_brl(cartao),
+        "parcelasCartao": PARCELAS_CARTAO,
+        "cartaoParcela": parcela,
+        "cartaoParcelaFmt": format_brl(parcela),
+        "mensalidades": MENSALIDADES_FULLSTACK if fullstack else 0,
+        "valorMensalidade": VALOR_MENSALIDADE if fullstack else Decimal("0"),
+        "valorMensalidadeFmt": format_brl(VALOR_MENSALIDADE) if fullstack else ""
+    }
+    _metodos[chave] = valores
+    if len(_metodos) > METODOS_CACHE_MAX:
+        _metodos.popitem(last=False)
+    return valores
@@ -0,0 +1,115 @@
+"""
+Fixtures dos testes: DynamoDB/SES/SQS em memória (moto) e o handler importado
+contra eles. Cada teste recebe as tabelas vazias e os caches do handler limpos.
+
+Uso (precisa de boto3, moto e pytest):
+    python -m pytest -q tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "teste")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "teste")
+os.environ.setdefault("ADMIN_EMAIL", "admin@programaai.dev")
+os.environ.setdefault("EXPORT_BUCKET", "exportacao-teste")
+os.environ.setdefault("METRICAS_EMF", "0")
+os.environ.setdefault("LOG_NIVEL", "ERROR")
+
+# tabela -> (chave, [(índice, hash, range | None)])
+TABELAS = {
+    "Inscricoes": ("id", [("curso-index", "curso", None), ("renovacao-index", "renovacaoLinks", "linksVencemEm")]),
+    "InscricoesUnicas": ("chave", []),
+    "Cursos": ("id", []),
+    "Descontos": ("id", [("cupom-curso-index", "cupom", "curso")]),
+    "ListaInteresse": ("id", [("email-index", "email", None), ("cadastro-index", "diaCadastro", "dataCadastro")]),
+    "ListaDeEspera": ("id", []),
+    "AsaasEventos": ("id", []),
+    "Idempotencia": ("chave", []),
+    "EmailsFalhos": ("id", []),
+    "LimitesTaxa": ("chave", []),
+    "CuponsResgates": ("chave", []),
+}
+
+
+@pytest.fixture(scope="session")
+def aws():
+    moto = pytest.importorskip("moto")
+    with moto.mock_aws():
+        import boto3
+        yield boto3
+
+
+def criar_tabelas(boto3):
+    client = boto3.client("dynamodb")
+    for nome, (chave, gsis) in TABELAS.items():
+        attrs = {chave}
+        kwargs = {}
+        if gsis:
+            kwargs["GlobalSecondaryIndexes"] = [{
+                "IndexName": idx,
+                "KeySchema": [{"AttributeName": h, "KeyType": "HASH"}]
+                + ([{"AttributeName": r, "KeyType": "RANGE"}] if r else []),
+                "Projection": {"ProjectionType": "ALL"}
+            } for idx, h, r in gsis]
+            for _, h, r in gsis:
+                attrs.update(a for a in (h, r) if a)
+        client.create_table(
+            TableName=nome,
+            KeySchema=[{"AttributeName": chave, "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in sorted(attrs)],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs
+        )
+
+
+@pytest.fixture
+def handler(aws):
+    criar_tabelas(aws)
+    aws.client("ses").verify_email_identity(EmailAddress="no-reply@programaai.dev")
+    import handler as h
+    # rate limit desligado: os testes disparam várias requisições do mesmo IP
+    h.LIMITES_TAXA.update({cfg["nome"]: {"ip": 0, "email": 0, "cpf": 0} for cfg in h.ROTAS.values()})
+    # o moto não isola transações concorrentes (o rollback de uma desfaz a gravação de outra
+    # thread e updates condicionais perdem incrementos); no DynamoDB são atômicas, então aqui
+    # o lote grava uma linha por vez
+    h.LOTE_THREADS = 1
+    h.invalidar_catalogo()
+    h._cupons_positivos.clear()
+    h._cupons_negativos.clear()
+    h._cupons_restantes.clear()
+    h._buckets.clear()
+    h._filtro_interesse.update(filtro=None, desde=None, atualizado_em=None, carregado_em=None)
+    yield h
+    client = aws.client("dynamodb")
+    for nome in TABELAS:
+        client.delete_table(TableName=nome)
+
+
+@pytest.fixture
+def api(handler):
+    """
+    api(metodo, caminho, body=None, qs=None) -> (status, body decodificado);
+    com com_headers=True -> (status, body decodificado, headers).
+    """
+    def chamar(metodo, caminho, body=None, qs=None, headers=None, ip="203.0.113.10", com_headers=False):
+        resp = handler.salvar_inscricao({
+            "httpMethod": metodo,
+            "path": caminho,
+            "queryStringParameters": qs,
+            "headers": headers or {"User-Agent": "pytest"},
+            "body": json.dumps(body) if body is not None else None,
+            "requestContext": {"identity": {"sourceIp": ip}}
+        }, None)
+        corpo = resp.get("body")
+        corpo = json.loads(corpo) if corpo else None
+        if com_headers:
+            return resp["statusCode"], corpo, resp["headers"]
+        return resp["statusCode"], corpo
+    return chamar
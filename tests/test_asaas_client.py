@@ -0,0 +1,42 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+import asaas_client  # noqa: E402
+
+
+class _Lento(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        time.sleep(3)
+        self.send_response(200)
+        self.end_headers()
+
+
+@pytest.fixture
+def asaas_lento(monkeypatch):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Lento)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(asaas_client, "ASAAS_ENDPOINT", f"http://127.0.0.1:{srv.server_port}")
+    monkeypatch.setattr(asaas_client, "_circuito", {"falhas": 0, "aberto_ate": 0.0})
+    yield
+    srv.shutdown()
+
+
+def test_leitura_lenta_respeita_o_prazo_e_conta_no_circuito(asaas_lento):
+    inicio = time.monotonic()
+    with pytest.raises(asaas_client.AsaasIndisponivel):
+        asaas_client.post("/paymentLinks", {}, prazo=inicio + 1.5)
+    assert time.monotonic() - inicio < 2.0
+    assert asaas_client._circuito["falhas"] == 1
+
+
+def test_prazo_esgotado_nao_chama_nem_conta_falha(asaas_lento):
+    with pytest.raises(asaas_client.AsaasIndisponivel):
+        asaas_client.post("/paymentLinks", {}, prazo=time.monotonic() + 0.5)
+    assert asaas_client._circuito["falhas"] == 0
@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("2024-06-10 14:32:11", "2024-06-10T17:32:11.000000Z"),
+    ("2024-06-10T14:32:11-03:00", "2024-06-10T17:32:11.000000Z"),
+    ("2024-06-10T17:32:11Z", "2024-06-10T17:32:11.000000Z"),
+    ("2024-06-10T17:32:11.5+00:00", "2024-06-10T17:32:11.500000Z"),
+    ("2024-06-10T14:32:11.123456789-0300", "2024-06-10T17:32:11.123456Z"),
+    ("2024-06-10", "2024-06-10T03:00:00.000000Z"),
+    ("10/06/2024", None),
+    ("2024-13-10 00:00:00", None),
+    (None, None),
+])
+def test_data_evento_utc(handler, valor, esperado):
+    assert handler.data_evento_utc(valor) == esperado
+
+
+def _webhook(api, evento_id, evento, data, status="PENDING"):
+    return api("POST", "/asaas/webhook", {
+        "id": evento_id, "event": evento, "dateCreated": data,
+        "payment": {"id": "pay_1", "externalReference": "i1", "status": status, "value": 100}
+    })
+
+
+@pytest.mark.parametrize("antigo, novo", [
+    # "YYYY-MM-DD HH:MM:SS" é horário de Brasília; como string, " " < "T" invertia a ordem
+    ("2024-06-10T17:00:00-03:00", "2024-06-10 18:00:00"),
+    ("2024-06-10T20:30:00Z", "2024-06-10 18:00:00"),
+    ("2024-06-10 17:00:00", "2024-06-10T21:00:00+00:00"),
+])
+def test_evento_mais_novo_em_outro_formato_e_aplicado(handler, api, antigo, novo):
+    handler.table_inscricoes.put_item(Item={"id": "i1", "curso": "Curso Python"})
+    assert _webhook(api, "evt_1", "PAYMENT_CREATED", antigo)[0] == 200
+    assert _webhook(api, "evt_2", "PAYMENT_UPDATED", novo)[0] == 200
+    # e o atrasado (formato trocado) não sobrescreve o mais novo
+    assert _webhook(api, "evt_3", "PAYMENT_CREATED", antigo)[0] == 200
+
+    insc = handler.table_inscricoes.get_item(Key={"id": "i1"})["Item"]
+    assert insc["asaasPaymentEvent"] == "PAYMENT_UPDATED"
+    assert insc["asaasPaymentEventAtUtc"] == handler.data_evento_utc(novo)
@@ -0,0 +1,22 @@
+import pytest
+
+from bloom import FiltroBloom
+
+
+@pytest.mark.parametrize("capacidade, itens", [(100, 80), (2048, 1024), (10000, 8000), (50000, 45000)])
+def test_serializacao_preserva_as_posicoes(capacidade, itens):
+    filtro = FiltroBloom(capacidade, 0.01)
+    valores = [f"pessoa{i}@exemplo.com" for i in range(itens)]
+    for v in valores:
+        filtro.adicionar(v)
+    copia = FiltroBloom.de_bytes(filtro.para_bytes(), filtro.hashes, filtro.capacidade, filtro.itens, filtro.bits)
+
+    assert filtro.bits % 8 == 0 and copia.bits == filtro.bits
+    assert all(v in copia for v in valores)
+    falsos = sum(f"outro{i}@exemplo.com" in copia for i in range(5000))
+    assert falsos / 5000 < 0.03
+
+
+def test_bits_incompativeis_com_o_mapa():
+    with pytest.raises(ValueError):
+        FiltroBloom.de_bytes(b"\x00" * 4, 3, 10, 0, bits=64)
@@ -0,0 +1,100 @@
+import pytest
+
+CURSO = "Curso Python"
+
+
+@pytest.fixture
+def curso(handler):
+    def gravar(price="R$500,00", ativo=True):
+        handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": price, "ativo": ativo})
+        handler.invalidar_catalogo()
+    gravar()
+    return gravar
+
+
+@pytest.fixture
+def inscricao(api, curso):
+    status, corpo = api("POST", "/inscricao", {"cpf": "52998224725", "curso": CURSO,
+                                               "nomeCompleto": "Aluno", "email": "aluno@exemplo.com"})
+    assert status == 201
+    return corpo["inscricao_id"]
+
+
+@pytest.mark.parametrize("qs", [None, {"id": "c1"}])
+def test_cursos_etag_304_e_cache_control(api, curso, qs):
+    status, corpo, headers = api("GET", "/cursos", qs=qs, com_headers=True)
+    assert status == 200 and corpo
+    etag = headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert headers["Cache-Control"] == "public, max-age=300, stale-while-revalidate=60"
+    assert headers["Last-Modified"].endswith(" GMT")
+
+    status, corpo, h304 = api("GET", "/cursos", qs=qs, headers={"If-None-Match": etag}, com_headers=True)
+    assert (status, corpo) == (304, None)
+    assert h304["ETag"] == etag
+    assert h304["Cache-Control"] == headers["Cache-Control"]
+    # CDNs reescrevem o ETag como fraco; a comparação do If-None-Match é fraca
+    assert api("GET", "/cursos", qs=qs, headers={"If-None-Match": f'"outro", W/{etag}'})[0] == 304
+    assert api("GET", "/cursos", qs=qs, headers={"If-None-Match": '"outro"'})[0] == 200
+
+
+def test_cursos_if_modified_since(api, curso):
+    _, _, headers = api("GET", "/cursos", com_headers=True)
+    assert api("GET", "/cursos", headers={"If-Modified-Since": headers["Last-Modified"]})[0] == 304
+    assert api("GET", "/cursos", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})[0] == 200
+    # If-None-Match manda: com ETag diferente o If-Modified-Since é ignorado
+    assert api("GET", "/cursos", headers={"If-None-Match": '"outro"',
+                                          "If-Modified-Since": headers["Last-Modified"]})[0] == 200
+
+
+def test_curso_alterado_gera_etag_novo(api, curso):
+    _, _, antes = api("GET", "/cursos", com_headers=True)
+    _, _, antes_item = api("GET", "/cursos", qs={"id": "c1"}, com_headers=True)
+    curso("R$600,00")
+
+    status, corpo, depois = api("GET", "/cursos", headers={"If-None-Match": antes["ETag"]}, com_headers=True)
+    assert status == 200
+    assert corpo[0]["price"] == "R$600,00"
+    assert depois["ETag"] != antes["ETag"]
+    status, _, depois_item = api("GET", "/cursos", qs={"id": "c1"}, headers={"If-None-Match": antes_item["ETag"]},
+                                 com_headers=True)
+    assert status == 200 and depois_item["ETag"] != antes_item["ETag"]
+
+
+def test_curso_recarregado_sem_mudanca_mantem_etag(api, curso):
+    _, _, antes = api("GET", "/cursos", com_headers=True)
+    curso()
+    _, _, depois = api("GET", "/cursos", com_headers=True)
+    assert depois["ETag"] == antes["ETag"]
+    assert depois["Last-Modified"] == antes["Last-Modified"]
+
+
+def test_pagamento_info_etag_e_304(api, inscricao):
+    qs = {"inscricaoId": inscricao}
+    status, corpo, headers = api("GET", "/pagamento-info", qs=qs, com_headers=True)
+    assert status == 200 and corpo
+    assert headers["Cache-Control"] == "private, no-cache"
+    etag = headers["ETag"]
+
+    status, corpo, h304 = api("GET", "/pagamento-info", qs=qs, headers={"If-None-Match": etag}, com_headers=True)
+    assert (status, corpo) == (304, None)
+    assert h304["ETag"] == etag and h304["Cache-Control"] == "private, no-cache"
+
+
+def test_pagamento_info_muda_etag_com_o_curso(api, curso, inscricao):
+    qs = {"inscricaoId": inscricao}
+    _, antes, headers = api("GET", "/pagamento-info", qs=qs, com_headers=True)
+    # o preço fica gravado na inscrição; o que vem do curso é o resto (ex.: ativo)
+    curso(ativo=False)
+    status, depois, novos = api("GET", "/pagamento-info", qs=qs, headers={"If-None-Match": headers["ETag"]},
+                                com_headers=True)
+    assert status == 200
+    assert novos["ETag"] != headers["ETag"]
+    assert (antes["curso"]["ativo"], depois["curso"]["ativo"]) == (True, False)
+
+
+def test_erro_nao_e_cacheado(api, curso):
+    status, _, headers = api("GET", "/pagamento-info", qs={"inscricaoId": "nao-existe"}, com_headers=True)
+    assert status == 400
+    assert headers["Cache-Control"] == "no-store"
+    assert "ETag" not in headers
@@ -0,0 +1,60 @@
+import base64
+import gzip
+import json
+
+
+def _cursos(handler, n):
+    for i in range(n):
+        handler.table_cursos.put_item(Item={
+            "id": f"c{i}", "title": f"Curso {i}", "price": "R$500,00", "ativo": True,
+            "descricao": "Aprenda do zero ao deploy com projetos práticos. " * 3
+        })
+
+
+def _get(handler, caminho, headers, qs=None):
+    return handler.salvar_inscricao({
+        "httpMethod": "GET", "path": caminho, "queryStringParameters": qs, "headers": headers,
+        "requestContext": {"identity": {"sourceIp": "203.0.113.10"}}
+    }, None)
+
+
+def test_gzip_volta_em_base64_e_descomprime_no_original(handler):
+    _cursos(handler, 20)
+    puro = _get(handler, "/cursos", {})
+    assert not puro.get("isBase64Encoded")
+    assert len(puro["body"]) >= handler.COMPRESSAO_MIN_BYTES
+
+    resp = _get(handler, "/cursos", {"Accept-Encoding": "gzip, deflate"})
+    assert resp["isBase64Encoded"] is True
+    assert resp["headers"]["Content-Encoding"] == "gzip"
+    assert resp["headers"]["Vary"] == "Accept-Encoding"
+    original = gzip.decompress(base64.b64decode(resp["body"])).decode("utf-8")
+    assert original == puro["body"]
+    assert len(json.loads(original)) == 20
+    # mesma versão em outra representação: ETag fraco
+    assert resp["headers"]["ETag"] == "W/" + puro["headers"]["ETag"]
+
+
+def test_corpo_pequeno_sai_sem_compressao(handler):
+    _cursos(handler, 1)
+    resp = _get(handler, "/cursos", {"Accept-Encoding": "gzip"}, qs={"id": "c0"})
+    assert resp["statusCode"] == 200
+    assert len(resp["body"]) < handler.COMPRESSAO_MIN_BYTES
+    assert not resp.get("isBase64Encoded")
+    assert "Content-Encoding" not in resp["headers"]
+    assert json.loads(resp["body"])["id"] == "c0"
+
+
+def test_vary_mesmo_sem_accept_encoding(handler):
+    _cursos(handler, 20)
+    resp = _get(handler, "/cursos", {})
+    # caches intermediários não podem servir esta versão a quem pediu gzip (nem o contrário)
+    assert resp["headers"]["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in resp["headers"]
+
+
+def test_identity_ou_q_zero_nao_comprime(handler):
+    _cursos(handler, 20)
+    for accept in ("identity", "gzip;q=0", "br;q=0, *;q=0"):
+        resp = _get(handler, "/cursos", {"Accept-Encoding": accept})
+        assert not resp.get("isBase64Encoded"), accept
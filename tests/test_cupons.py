@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+
+CURSO = "Curso Python"
+
+
+def _cpf(n):
+    d = [int(c) for c in f"{n:09d}"]
+    dv1 = sum(x * (10 - i) for i, x in enumerate(d)) * 10 % 11 % 10
+    dv2 = (sum(x * (11 - i) for i, x in enumerate(d)) + dv1 * 2) * 10 % 11 % 10
+    return f"{n:09d}{dv1}{dv2}"
+
+
+def test_lote_respeita_limite_de_resgates_do_cupom(handler, api):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": "R$500,00", "ativo": True})
+    handler.table_descontos.put_item(Item={
+        "id": "d1", "cupom": "LOTE", "curso": CURSO, "desconto": "R$100", "ativo": True, "disponivel": True,
+        "maxResgates": 2
+    })
+    alunos = [{"cpf": _cpf(100000000 + i), "nomeCompleto": "Aluno", "email": "a@exemplo.com"} for i in range(4)]
+
+    status, corpo = api("POST", "/inscricoes/batch", {"curso": CURSO, "cupom": "lote", "alunos": alunos})
+
+    assert status == 200
+    assert corpo["resumo"] == {"criada": 4}
+    assert sum("avisoCupom" in r for r in corpo["resultados"]) == 2
+    valores = sorted(it["valorCurso"] for it in handler.table_inscricoes.scan()["Items"])
+    assert valores == [Decimal("400"), Decimal("400"), Decimal("500"), Decimal("500")]
+    assert sum(int(it["resgates"]) for it in handler.table_resgates.scan()["Items"]) == 2
+
+
+def test_indice_de_cupons_ausente_nao_cobra_preco_cheio(handler, api, monkeypatch):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": "R$500,00", "ativo": True})
+    handler.table_descontos.put_item(Item={"id": "d1", "cupom": "DEZ", "curso": CURSO, "desconto": "10%"})
+    # deploy sem o GSI cupom-curso-index
+    monkeypatch.setattr(handler, "CUPOM_CURSO_INDEX", "cupom-curso-index-inexistente")
+
+    status, _ = api("POST", "/inscricao", {"cpf": _cpf(123456789), "curso": CURSO, "nomeCompleto": "Aluno",
+                                           "email": "a@exemplo.com", "cupom": "DEZ"})
+    assert status == 500
+    assert handler.table_inscricoes.scan()["Items"] == []
+    assert api("GET", "/checa-cupom", qs={"cupom": "DEZ", "curso": CURSO})[0] == 500
+    # sem cupom a inscrição segue normal
+    assert api("POST", "/inscricao", {"cpf": _cpf(123456789), "curso": CURSO, "nomeCompleto": "Aluno",
+                                      "email": "a@exemplo.com"})[0] == 201
+
+
+def test_consultar_indice_reconhece_o_erro_do_dynamodb(handler):
+    class Tabela:
+        name = "Descontos"
+
+        def __init__(self, erro):
+            self.erro = erro
+
+        def query(self, **kwargs):
+            raise ClientError({"Error": self.erro}, "Query")
+
+    sem_indice = {"Code": "ValidationException",
+                  "Message": "The table does not have the specified index: cupom-curso-index"}
+    with pytest.raises(handler.IndiceAusente):
+        handler.consultar_indice(Tabela(sem_indice), IndexName="cupom-curso-index")
+    # outros erros (throttling, expressão inválida) continuam como ClientError
+    for erro in ({"Code": "ProvisionedThroughputExceededException"},
+                 {"Code": "ValidationException", "Message": "Invalid KeyConditionExpression"}):
+        with pytest.raises(ClientError) as exc:
+            handler.consultar_indice(Tabela(erro), IndexName="cupom-curso-index")
+        assert not isinstance(exc.value, handler.IndiceAusente)
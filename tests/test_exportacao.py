@@ -0,0 +1,61 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+
+BUCKET = "exportacao-teste"
+
+
+@pytest.fixture
+def exportacao(handler, aws, monkeypatch):
+    import moto.s3.models
+    import exportacao as mod
+    aws.client("s3").create_bucket(Bucket=BUCKET)
+    # blocos pequenos para o teste passar pelo multipart sem gerar megabytes
+    monkeypatch.setattr(moto.s3.models, "S3_UPLOAD_PART_MIN_SIZE", 256)
+    monkeypatch.setattr(mod, "BLOCO_MULTIPART_BYTES", 1024)
+    monkeypatch.setattr(mod, "ITENS_POR_PARTE", 150)
+    with handler.table_inscricoes.batch_writer() as w:
+        for i in range(400):
+            w.put_item(Item={
+                "id": f"i{i:04d}", "curso": "Curso Python", "nomeCompleto": uuid.uuid4().hex,
+                "valorCurso": Decimal("1499.99"), "valorOriginal": Decimal("0.1") * 3, "ordem": 40,
+                **({"cupom": "PROMO"} if i % 2 else {})
+            })
+    return mod
+
+
+def _ler(aws, manifest, formato):
+    s3 = aws.client("s3")
+    itens = []
+    for parte in manifest["tabelas"]["Inscricoes"]["partes"]:
+        corpo = gzip.decompress(s3.get_object(Bucket=BUCKET, Key=parte["chave"])["Body"].read()).decode("utf-8")
+        lidos = [json.loads(l) for l in corpo.splitlines()] if formato == "ndjson" else \
+            list(csv.DictReader(io.StringIO(corpo)))
+        assert len(lidos) == parte["itens"] <= 150
+        itens.extend(lidos)
+    return itens
+
+
+@pytest.mark.parametrize("formato", ["ndjson", "csv"])
+def test_exporta_em_multipart_com_decimais_exatos(exportacao, aws, formato):
+    resultado = exportacao.exportar_tabelas(
+        {"tabelas": ["Inscricoes"], "formato": formato, "segmentos": 2, "bucket": BUCKET, "prefixo": "t"}, None)
+    assert resultado["itens"] == {"Inscricoes": 400}
+    manifest = json.loads(aws.client("s3").get_object(Bucket=BUCKET, Key="t/manifest.json")["Body"].read())
+
+    partes = manifest["tabelas"]["Inscricoes"]["partes"]
+    assert any(p["bytes"] > exportacao.BLOCO_MULTIPART_BYTES for p in partes)  # enviadas em mais de um bloco
+    itens = _ler(aws, manifest, formato)
+    assert sorted(it["id"] for it in itens) == [f"i{i:04d}" for i in range(400)]
+    assert {it["valorCurso"] for it in itens} == {"1499.99"}
+    assert {it["valorOriginal"] for it in itens} == {"0.3"}
+    assert {it["ordem"] for it in itens} == {"40"}
+    if formato == "csv":
+        # cupom só aparece em parte dos itens: vai na coluna da página ou em _extras, nunca se perde
+        cupons = [it["cupom"] or json.loads(it["_extras"] or "{}").get("cupom") for it in itens]
+        assert sum(c == "PROMO" for c in cupons) == 200
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def clube(handler, aws, monkeypatch):
+    aws.client("s3").create_bucket(Bucket=handler.INTERESSE_FILTRO_BUCKET)
+    aws.client("s3").delete_object(Bucket=handler.INTERESSE_FILTRO_BUCKET, Key=handler.INTERESSE_FILTRO_CHAVE)
+    for k in handler.filtro_interesse_stats:
+        handler.filtro_interesse_stats[k] = 0
+
+    def _cadastrar(email, data="2025-01-01T10:00:00-03:00"):
+        handler.table_interesse.put_item(Item={
+            "id": email, "email": email, "dataCadastro": data, "diaCadastro": handler.dia_cadastro(data)
+        })
+    return _cadastrar
+
+
+def _sem_scan(handler, monkeypatch):
+    def scan(**kwargs):
+        raise AssertionError("scan no caminho da requisição")
+    monkeypatch.setattr(handler.table_interesse, "scan", scan)
+
+
+def test_get_usa_snapshot_e_nao_faz_scan(handler, api, clube, monkeypatch):
+    clube("antigo@exemplo.com")
+    assert handler.publicar_filtro_interesse({}, None)["emails"] == 1
+    _sem_scan(handler, monkeypatch)
+
+    assert api("GET", "/clube/interesse", qs={"email": "antigo@exemplo.com"}) == (200, {"existe": True})
+    assert api("GET", "/clube/interesse", qs={"email": "outro@exemplo.com"}) == (200, {"existe": False})
+    assert handler.filtro_interesse_stats["confirmados"] == 1
+    assert handler.filtro_interesse_stats["negativos"] == 1
+
+
+def test_cadastro_de_outro_container_entra_pelo_gsi(handler, api, clube, monkeypatch):
+    clube("antigo@exemplo.com")
+    handler.publicar_filtro_interesse({}, None)
+    _sem_scan(handler, monkeypatch)
+    assert api("GET", "/clube/interesse", qs={"email": "novo@exemplo.com"}) == (200, {"existe": False})
+
+    # gravado por outro container depois do snapshot; aparece no próximo delta
+    clube("novo@exemplo.com", datetime.now(handler.TZ_BRASILIA).isoformat())
+    handler._filtro_interesse["atualizado_em"] -= handler.INTERESSE_FILTRO_ATUALIZAR_SEGUNDOS
+    assert api("GET", "/clube/interesse", qs={"email": "novo@exemplo.com"}) == (200, {"existe": True})
+
+
+def test_sem_snapshot_consulta_o_gsi(handler, api, clube, monkeypatch):
+    clube("antigo@exemplo.com")
+    _sem_scan(handler, monkeypatch)
+    assert api("GET", "/clube/interesse", qs={"email": "antigo@exemplo.com"}) == (200, {"existe": True})
+    assert api("GET", "/clube/interesse", qs={"email": "outro@exemplo.com"}) == (200, {"existe": False})
+    assert handler.filtro_interesse_stats["sem_filtro"] == 2
+
+
+def test_post_grava_dia_do_cadastro(handler, api, clube):
+    status, _ = api("POST", "/clube/interesse", {"nome": "Maria", "email": "maria@exemplo.com",
+                                                  "aceitaContato": True})
+    assert status == 201
+    item = handler.table_interesse.scan()["Items"][0]
+    assert item["diaCadastro"] == item["dataCadastro"][:10]
+
+
+@pytest.mark.parametrize("capacidade", [1024, 2048, 5000])
+def test_filtro_grande_sobrevive_ao_snapshot(handler, api, clube, capacidade, monkeypatch):
+    monkeypatch.setattr(handler, "INTERESSE_FILTRO_CAPACIDADE_MIN", capacidade)
+    emails = [f"pessoa{i}@exemplo.com" for i in range(3000)]
+    with handler.table_interesse.batch_writer() as w:
+        for e in emails:
+            w.put_item(Item={"id": e, "email": e, "dataCadastro": "2025-01-01T10:00:00-03:00",
+                             "diaCadastro": "2025-01-01"})
+    handler.publicar_filtro_interesse({}, None)
+
+    filtro, _ = handler.carregar_snapshot_interesse()
+    assert filtro.bits % 8 == 0
+    assert [e for e in emails if e not in filtro] == []
+    _sem_scan(handler, monkeypatch)
+    assert api("GET", "/clube/interesse", qs={"email": emails[-1]}) == (200, {"existe": True})
+
+
+def test_snapshot_sem_bits_e_ignorado(handler, aws, clube):
+    from bloom import FiltroBloom
+    f = FiltroBloom(100)
+    aws.client("s3").put_object(
+        Bucket=handler.INTERESSE_FILTRO_BUCKET, Key=handler.INTERESSE_FILTRO_CHAVE, Body=f.para_bytes(),
+        Metadata={"desde": "2025-01-01T00:00:00-03:00", "hashes": "7", "capacidade": "100", "itens": "0"})
+    assert handler.carregar_snapshot_interesse() is None
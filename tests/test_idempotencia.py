@@ -0,0 +1,61 @@
+import hashlib
+import json
+import time
+import types
+
+
+def _contexto(restante_ms):
+    fim = time.monotonic() + restante_ms / 1000
+    return types.SimpleNamespace(
+        aws_request_id="teste", get_remaining_time_in_millis=lambda: int((fim - time.monotonic()) * 1000))
+
+
+def test_espera_pela_primeira_execucao_cabe_no_tempo_restante(handler):
+    corpo = json.dumps({"inscricaoId": "i1", "paymentMethod": "PIX"})
+    agora = int(time.time())
+    handler.table_idempotencia.put_item(Item={
+        "chave": "POST /paymentlink#k1", "status": "EM_ANDAMENTO",
+        "impressao": hashlib.sha256(corpo.encode("utf-8")).hexdigest(),
+        "travaAte": agora + handler.IDEMPOTENCIA_TRAVA_SEGUNDOS, "expiraEm": agora + 3600
+    })
+    evento = {"httpMethod": "POST", "path": "/paymentlink", "headers": {"Idempotency-Key": "k1"}, "body": corpo,
+              "requestContext": {"identity": {"sourceIp": "203.0.113.10"}}}
+
+    inicio = time.monotonic()
+    resp = handler.salvar_inscricao(evento, _contexto(1200))
+    assert resp["statusCode"] == 409
+    assert time.monotonic() - inicio < 1.0
+
+
+
+def test_chave_apagada_por_falha_da_primeira_e_retomada(handler, monkeypatch):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": "Curso Python", "price": "R$500,00", "ativo": True})
+    corpo = json.dumps({"cpf": "52998224725", "curso": "Curso Python", "nomeCompleto": "Aluno",
+                        "email": "aluno@exemplo.com"})
+    agora = int(time.time())
+    handler.table_idempotencia.put_item(Item={
+        "chave": "POST /inscricao#k1", "status": "EM_ANDAMENTO",
+        "impressao": hashlib.sha256(corpo.encode("utf-8")).hexdigest(),
+        "travaAte": agora + handler.IDEMPOTENCIA_TRAVA_SEGUNDOS, "expiraEm": agora + 3600
+    })
+    esperas = []
+
+    def sleep(segundos):
+        # enquanto esta espera, a primeira tentativa responde 5xx e apaga o registro
+        esperas.append(segundos)
+        handler.table_idempotencia.delete_item(Key={"chave": "POST /inscricao#k1"})
+    monkeypatch.setattr(handler.time, "sleep", sleep)
+    evento = {"httpMethod": "POST", "path": "/inscricao", "headers": {"Idempotency-Key": "k1"}, "body": corpo,
+              "requestContext": {"identity": {"sourceIp": "203.0.113.10"}}}
+
+    resp = handler.salvar_inscricao(evento, _contexto(10000))
+    assert resp["statusCode"] == 201, resp["body"]
+    assert len(esperas) == 1
+    registro = handler.table_idempotencia.get_item(Key={"chave": "POST /inscricao#k1"})["Item"]
+    assert registro["status"] == "CONCLUIDO"
+    assert json.loads(registro["resposta"])["body"] == resp["body"]
+
+    # a próxima repetição recebe a resposta da tentativa que retomou a chave
+    repetida = handler.salvar_inscricao(evento, _contexto(10000))
+    assert repetida["headers"]["Idempotent-Replayed"] == "true"
+    assert repetida["body"] == resp["body"]
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+CURSO = "Curso Python"
+
+
+@pytest.fixture
+def limites(handler, monkeypatch):
+    """limites(rota, ip=, email=, cpf=): liga o rate limit só na rota do teste."""
+    # longe da virada do minuto, para o contador compartilhado não trocar de janela no meio do teste
+    resto = handler.LIMITE_JANELA_SEGUNDOS - time.time() % handler.LIMITE_JANELA_SEGUNDOS
+    if resto < 5:
+        time.sleep(resto + 0.1)
+    for k in handler.limite_taxa_stats:
+        handler.limite_taxa_stats[k] = 0
+
+    def ligar(rota, **por_minuto):
+        monkeypatch.setitem(handler.LIMITES_TAXA, rota, {"ip": 0, "email": 0, "cpf": 0, **por_minuto})
+    return ligar
+
+
+def test_bloqueia_depois_de_n_requisicoes_com_retry_after(handler, api, limites):
+    limites("GET /clube/interesse", ip=3)
+    for _ in range(3):
+        assert api("GET", "/clube/interesse", qs={"email": "a@exemplo.com"})[0] == 200
+
+    resp = handler.salvar_inscricao({
+        "httpMethod": "GET", "path": "/clube/interesse", "queryStringParameters": {"email": "a@exemplo.com"},
+        "headers": {}, "requestContext": {"identity": {"sourceIp": "203.0.113.10"}}
+    }, None)
+    assert resp["statusCode"] == 429
+    assert 1 <= int(resp["headers"]["Retry-After"]) <= handler.LIMITE_JANELA_SEGUNDOS
+    assert handler.limite_taxa_stats["bloqueios_locais"] == 1
+    # outro IP segue liberado
+    assert api("GET", "/clube/interesse", qs={"email": "a@exemplo.com"}, ip="203.0.113.99")[0] == 200
+
+
+def test_limite_por_email_vale_entre_ips(handler, api, limites):
+    limites("GET /clube/interesse", email=2)
+    for i in range(2):
+        assert api("GET", "/clube/interesse", qs={"email": "A@Exemplo.com"}, ip=f"203.0.113.{i}")[0] == 200
+    assert api("GET", "/clube/interesse", qs={"email": "a@exemplo.com "}, ip="203.0.113.50")[0] == 429
+
+
+def test_contador_compartilhado_bloqueia_outro_container(handler, api, limites):
+    limites("GET /clube/interesse", ip=3)
+    for _ in range(3):
+        assert api("GET", "/clube/interesse", qs={"email": "a@exemplo.com"})[0] == 200
+    contagens = [int(it["contagem"]) for it in handler.table_limites.scan()["Items"]]
+    assert contagens == [3]
+    # a chave guarda só o hash do IP
+    assert "203.0.113.10" not in handler.table_limites.scan()["Items"][0]["chave"]
+
+    handler._buckets.clear()  # outra Lambda: bucket local cheio, mas a janela já foi gasta
+    assert api("GET", "/clube/interesse", qs={"email": "a@exemplo.com"})[0] == 429
+    assert handler.limite_taxa_stats["bloqueios_compartilhados"] == 1
+    # o bucket local ficou vazio: a próxima nem vai ao DynamoDB
+    assert api("GET", "/clube/interesse", qs={"email": "a@exemplo.com"})[0] == 429
+    assert handler.limite_taxa_stats["bloqueios_locais"] == 1
+
+
+def test_repeticao_da_idempotency_key_nao_gasta_limite_do_cpf(handler, api, limites):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": "R$500,00", "ativo": True})
+    limites("POST /inscricao", cpf=1)
+    aluno = {"cpf": "52998224725", "curso": CURSO, "nomeCompleto": "Aluno", "email": "aluno@exemplo.com"}
+    headers = {"Idempotency-Key": "k-1"}
+
+    status, primeira = api("POST", "/inscricao", aluno, headers=headers)
+    assert status == 201
+    for _ in range(3):
+        assert api("POST", "/inscricao", aluno, headers=headers) == (201, primeira)
+    # sem a chave (requisição nova) o limite do CPF continua valendo
+    assert api("POST", "/inscricao", aluno)[0] == 429
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def inscricoes(handler):
+    with handler.table_inscricoes.batch_writer() as w:
+        for i in range(23):
+            w.put_item(Item={"id": f"i{i:02d}", "curso": "Curso Python" if i % 3 else "Curso Dados",
+                             "nomeCompleto": f"Aluno {i}", "cpf": f"{i:011d}", "valorCurso": 500})
+    return handler
+
+
+@pytest.fixture
+def chamadas(handler, monkeypatch):
+    """Registra os kwargs de scan/query em Inscricoes."""
+    feitas = []
+    for operacao in ("scan", "query"):
+        original = getattr(handler.table_inscricoes, operacao)
+
+        def espiar(original=original, operacao=operacao, **kwargs):
+            feitas.append((operacao, kwargs))
+            return original(**kwargs)
+        monkeypatch.setattr(handler.table_inscricoes, operacao, espiar)
+    return feitas
+
+
+def _listar(handler, **qs):
+    resp = handler.listar_inscricoes(qs)
+    return resp["statusCode"], json.loads(resp["body"])
+
+
+def _todas_as_paginas(handler, **qs):
+    ids, paginas, cursor = [], 0, None
+    while True:
+        status, corpo = _listar(handler, **qs, **({"cursor": cursor} if cursor else {}))
+        assert status == 200
+        assert len(corpo["items"]) <= int(qs.get("limite", handler.LISTAGEM_LIMITE_PADRAO))
+        ids += [it["id"] for it in corpo["items"]]
+        paginas += 1
+        cursor = corpo["proximoCursor"]
+        if cursor is None:
+            return ids, paginas
+
+
+def test_cursor_percorre_todas_as_paginas(inscricoes):
+    ids, paginas = _todas_as_paginas(inscricoes, limite="5")
+    assert paginas >= 5
+    assert sorted(ids) == [f"i{i:02d}" for i in range(23)]
+
+
+def test_cursor_e_opaco_e_url_safe(inscricoes):
+    _, corpo = _listar(inscricoes, limite="5")
+    cursor = corpo["proximoCursor"]
+    assert cursor and "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert inscricoes.decodificar_cursor(cursor) == {"id": corpo["items"][-1]["id"]}
+
+
+@pytest.mark.parametrize("cursor", ["nao-e-base64!", "W10", "eyJpZCI6MX0", "bnVsbA"])
+def test_cursor_invalido(inscricoes, cursor):
+    # W10 = [], eyJpZCI6MX0 = {"id":1}, bnVsbA = null
+    assert _listar(inscricoes, cursor=cursor)[0] == 400
+
+
+@pytest.mark.parametrize("limite,esperado", [(None, 50), ("0", 1), ("-3", 1), ("7", 7), ("100000", 500)])
+def test_limite_fica_entre_1_e_o_maximo(inscricoes, chamadas, limite, esperado):
+    qs = {"limite": limite} if limite else {}
+    status, corpo = _listar(inscricoes, **qs)
+    assert status == 200
+    ((_, kwargs),) = chamadas
+    assert kwargs["Limit"] == esperado
+    assert len(corpo["items"]) == min(esperado, 23)
+
+
+def test_limite_invalido(inscricoes):
+    assert _listar(inscricoes, limite="dez")[0] == 400
+
+
+def test_campos_viram_projecao(inscricoes, chamadas):
+    status, corpo = _listar(inscricoes, campos="id, nomeCompleto,,curso")
+    assert status == 200
+    assert {frozenset(it) for it in corpo["items"]} == {frozenset({"id", "nomeCompleto", "curso"})}
+    ((_, kwargs),) = chamadas
+    # nomes sempre por placeholder: campos com palavra reservada do DynamoDB funcionam
+    assert set(kwargs["ExpressionAttributeNames"].values()) == {"id", "nomeCompleto", "curso"}
+
+
+def test_campos_reservados(inscricoes):
+    inscricoes.table_inscricoes.update_item(Key={"id": "i01"}, UpdateExpression="SET #s = :s",
+                                            ExpressionAttributeNames={"#s": "status"},
+                                            ExpressionAttributeValues={":s": "PAGO"})
+    _, corpo = _listar(inscricoes, campos="id,status", limite="100")
+    assert {it["id"]: it.get("status") for it in corpo["items"]}["i01"] == "PAGO"
+
+
+def test_filtro_por_curso_usa_o_gsi(inscricoes, chamadas):
+    ids, _ = _todas_as_paginas(inscricoes, curso="Curso Dados", limite="3", campos="id,curso")
+    assert sorted(ids) == [f"i{i:02d}" for i in range(23) if i % 3 == 0]
+    assert {op for op, _ in chamadas} == {"query"}
+    assert {kw["IndexName"] for _, kw in chamadas} == {inscricoes.INSCRICOES_CURSO_INDEX}
+
+
+def test_filtro_por_curso_sem_inscricoes(inscricoes, chamadas):
+    assert _listar(inscricoes, curso="Curso Inexistente") == (200, {"items": [], "proximoCursor": None})
+    assert [op for op, _ in chamadas] == ["query"]
@@ -0,0 +1,132 @@
+import json
+import logging
+import types
+
+import pytest
+
+import logs
+
+ALUNO = {"cpf": "52998224725", "email": "joao.silva@exemplo.com", "whatsapp": "(11) 98765-4321",
+         "nomeCompleto": "João da Silva", "curso": "Curso Python"}
+DADOS_CRUS = ("52998224725", "529.982.247-25", "joao.silva", "98765-4321", "98765 4321", "João da Silva")
+
+
+class _Saida:
+    """Substitui o stdout contando as escritas."""
+
+    def __init__(self):
+        self.escritas = []
+
+    def write(self, texto):
+        self.escritas.append(texto)
+
+    def flush(self):
+        pass
+
+    def linhas(self):
+        return [json.loads(l) for l in "".join(self.escritas).splitlines()]
+
+
+@pytest.fixture
+def saida(monkeypatch):
+    s = _Saida()
+    # o capture do pytest troca sys.stdout a cada fase; o logs.py passa a ver só esta saída
+    monkeypatch.setattr(logs, "sys", types.SimpleNamespace(stdout=s))
+    raiz = logging.getLogger()
+    handlers, nivel = raiz.handlers, raiz.level
+    logs.configurar()
+    raiz.setLevel(logging.INFO)
+    yield s
+    logs.finalizar()
+    raiz.handlers, raiz.level = handlers, nivel
+
+
+def _sem_dados_crus(texto):
+    return [d for d in DADOS_CRUS if d in texto]
+
+
+def test_mensagem_mascara_cpf_email_e_telefone(saida):
+    logging.getLogger("teste").info("Aluno %s, CPF %s, tel %s / +55 11 98765 4321, fixo 11 3456-7890",
+                                    "joao.silva@exemplo.com", "529.982.247-25", "(11) 98765-4321")
+    (linha,) = saida.linhas()
+    assert _sem_dados_crus(linha["msg"]) == []
+    assert "3456-7890" not in linha["msg"]
+    assert "***@exemplo.com" in linha["msg"] and "***25" in linha["msg"] and "***21" in linha["msg"]
+
+
+def test_mensagem_nao_mascara_datas_nem_valores(saida):
+    logging.getLogger("teste").info("Evento 2025-01-01 10:00:00, valor 1499.99, pedido 123456")
+    assert saida.linhas()[0]["msg"] == "Evento 2025-01-01 10:00:00, valor 1499.99, pedido 123456"
+
+
+def test_args_e_extra_redigidos_pela_politica(saida):
+    logging.getLogger("teste").info("Body: %s", ALUNO, extra={**ALUNO, "ip": "203.0.113.10", "inscricaoId": "i-1"})
+    (linha,) = saida.linhas()
+    assert _sem_dados_crus(json.dumps(linha, ensure_ascii=False)) == []
+    assert linha["cpf"] == "***25"
+    assert linha["email"] == "j***@exemplo.com"
+    assert linha["whatsapp"] == "***21"
+    assert linha["ip"] != "203.0.113.10" and len(linha["ip"]) == 12
+    # o que não está na política sai como veio
+    assert (linha["curso"], linha["inscricaoId"]) == ("Curso Python", "i-1")
+
+
+@pytest.mark.parametrize("amostra,com_payload", [(1.0, True), (0.0, False)])
+def test_payload_segue_a_amostra(saida, monkeypatch, amostra, com_payload):
+    monkeypatch.setattr(logs, "LOG_AMOSTRA_PAYLOAD", amostra)
+    logs.iniciar("rid-1", "teste")
+    logs.payload("Inscrição salva", ALUNO, id="i-1")
+    logs.finalizar()
+    (linha,) = saida.linhas()
+    assert linha["id"] == "i-1" and linha["rid"] == "rid-1"
+    assert ("payload" in linha) is com_payload
+    if com_payload:
+        assert linha["payload"]["cpf"] == "***25"
+        assert _sem_dados_crus(json.dumps(linha, ensure_ascii=False)) == []
+
+
+def test_payload_sai_completo_quando_a_invocacao_falha(saida, monkeypatch):
+    monkeypatch.setattr(logs, "LOG_AMOSTRA_PAYLOAD", 0.0)
+    logs.iniciar("rid-1", "teste")
+    logs.payload("Processando inscrição", ALUNO)
+    logging.getLogger("teste").error("Falha")
+    logs.finalizar()
+    linhas = saida.linhas()
+    assert [l["msg"] for l in linhas] == ["Processando inscrição", "Falha"]
+    assert linhas[0]["payload"]["email"] == "j***@exemplo.com"
+
+
+def test_fracao_amostrada(saida, monkeypatch):
+    monkeypatch.setattr(logs, "LOG_AMOSTRA_PAYLOAD", 0.25)
+    monkeypatch.setattr(logs.random, "random", iter([i / 100 for i in range(100)]).__next__)
+    for i in range(100):
+        logs.iniciar(f"rid-{i}", "teste")
+        logs.payload("Inscrição salva", ALUNO, id=i)
+        logs.finalizar()
+    assert sum("payload" in l for l in saida.linhas()) == 25
+
+
+def test_buffer_escrito_uma_vez_por_invocacao(handler, api, saida, monkeypatch):
+    monkeypatch.setattr(logs, "LOG_AMOSTRA_PAYLOAD", 1.0)
+    handler.table_cursos.put_item(Item={"id": "c1", "title": "Curso Python", "price": "R$500,00", "ativo": True})
+    for _ in range(3):
+        saida.escritas.clear()
+        assert api("POST", "/lista-espera", {"nome": "João da Silva", "email": "joao.silva@exemplo.com",
+                                              "telefone": "(11) 98765-4321", "curso": "Curso Python",
+                                              "comoConheceu": "Instagram"})[0] == 201
+        assert len(saida.escritas) == 1
+        linhas = saida.linhas()
+        assert len(linhas) > 1
+        assert "POST /lista-espera" in {l["rota"] for l in linhas}
+        assert any("payload" in l for l in linhas)
+        assert _sem_dados_crus(saida.escritas[0]) == []
+
+
+def test_buffer_grande_descarrega_antes_do_fim(saida, monkeypatch):
+    monkeypatch.setattr(logs, "LOG_BUFFER_MAX_BYTES", 1000)
+    logs.iniciar("rid-1", "teste")
+    for i in range(50):
+        logging.getLogger("teste").info("linha %d %s", i, "x" * 50)
+    assert 0 < len(saida.escritas) < 50
+    logs.finalizar()
+    assert len(saida.linhas()) == 50
@@ -0,0 +1,69 @@
+import threading
+
+CURSO = "Curso Python"
+
+
+def _cpf(n):
+    d = [int(c) for c in f"{n:09d}"]
+    dv1 = sum(x * (10 - i) for i, x in enumerate(d)) * 10 % 11 % 10
+    dv2 = (sum(x * (11 - i) for i, x in enumerate(d)) + dv1 * 2) * 10 % 11 % 10
+    return f"{n:09d}{dv1}{dv2}"
+
+
+def _alunos(n):
+    return [{"cpf": _cpf(200000000 + i), "nomeCompleto": f"Aluno {i}", "email": f"aluno{i}@exemplo.com"}
+            for i in range(n)]
+
+
+def _semear_curso(handler):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": "R$500,00", "ativo": True})
+
+
+def test_lote_grava_em_varias_threads_sem_conflito(handler, api, monkeypatch):
+    monkeypatch.setattr(handler, "LOTE_THREADS", 8)
+    _semear_curso(handler)
+    alunos = _alunos(40)
+    # o TransactWriteItems do moto não é thread-safe (copia as tabelas para o rollback enquanto
+    # outra thread grava); só a chamada ao moto é serializada, o fan-out continua em 8 threads
+    trava, threads = threading.Lock(), set()
+    transact = handler.ddb_client.transact_write_items
+
+    def transact_serializado(**kwargs):
+        threads.add(threading.get_ident())
+        with trava:
+            return transact(**kwargs)
+    monkeypatch.setattr(handler.ddb_client, "transact_write_items", transact_serializado)
+
+    status, corpo = api("POST", "/inscricoes/batch", {"curso": CURSO, "alunos": alunos})
+
+    assert status == 200
+    assert len(threads) > 1
+    assert corpo["resumo"] == {"criada": 40}
+    assert [r["linha"] for r in corpo["resultados"]] == list(range(40))
+    gravadas = {it["id"]: it["cpf"] for it in handler.table_inscricoes.scan()["Items"]}
+    assert {r["inscricao_id"]: a["cpf"] for r, a in zip(corpo["resultados"], alunos)} == gravadas
+    assert len(handler.table_unicidade.scan()["Items"]) == 40
+
+
+def test_lote_distribui_as_linhas_entre_threads(handler, api, monkeypatch):
+    """Gravador falso: cada linha espera as outras numa barreira, o que só termina se rodarem juntas."""
+    monkeypatch.setattr(handler, "LOTE_THREADS", 4)
+    _semear_curso(handler)
+    barreira = threading.Barrier(4, timeout=5)
+    threads = set()
+
+    def gravar(req, dados, nome_curso, curso_item, cupom, valor_original, valor_com_desconto, limites):
+        threads.add(threading.get_ident())
+        barreira.wait()
+        if dados["nomeCompleto"] == "Aluno 5":
+            raise RuntimeError("falha simulada")
+        item = handler.montar_item_inscricao(req, dados, nome_curso, cupom, valor_original, valor_com_desconto)
+        return item, dados["nomeCompleto"] != "Aluno 6", None
+    monkeypatch.setattr(handler, "gravar_inscricao_com_cupom", gravar)
+
+    status, corpo = api("POST", "/inscricoes/batch", {"curso": CURSO, "alunos": _alunos(8)})
+
+    assert status == 200
+    assert len(threads) == 4
+    assert [r["status"] for r in corpo["resultados"]] == ["criada"] * 5 + ["erro", "duplicada", "criada"]
+    assert corpo["resumo"] == {"criada": 6, "erro": 1, "duplicada": 1}
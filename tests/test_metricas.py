@@ -0,0 +1,94 @@
+import json
+import types
+
+import pytest
+
+import metricas
+
+
+class _Saida:
+    def __init__(self):
+        self.escritas = []
+
+    def write(self, texto):
+        self.escritas.append(texto)
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def emf(handler, monkeypatch):
+    """Liga o EMF depois do import (conftest importa com METRICAS_EMF=0) e devolve os documentos emitidos."""
+    monkeypatch.setattr(metricas, "METRICAS_ATIVAS", True)
+    for nome, dependencia in (("table_lista_espera", "ListaDeEspera"), ("table_cursos", "Cursos")):
+        monkeypatch.setattr(handler, nome, metricas.instrumentar(getattr(handler, nome), dependencia, dynamo=True))
+    monkeypatch.setattr(handler, "ses", metricas.instrumentar(handler.ses, "SES"))
+    saida = _Saida()
+    monkeypatch.setattr(handler.logs, "sys", types.SimpleNamespace(stdout=saida))
+
+    def documentos():
+        linhas = [json.loads(l) for l in "".join(saida.escritas).splitlines()]
+        return [l for l in linhas if "_aws" in l]
+    return documentos
+
+
+def _metricas(doc):
+    (diretiva,) = doc["_aws"]["CloudWatchMetrics"]
+    return diretiva["Namespace"], diretiva["Dimensions"], {m["Name"]: m["Unit"] for m in diretiva["Metrics"]}
+
+
+def test_emf_da_rota_e_das_dependencias(handler, api, emf):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": "Curso Python", "price": "R$500,00", "ativo": True})
+    status, _ = api("POST", "/lista-espera", {"nome": "Maria", "email": "maria@exemplo.com", "telefone": "11999999999",
+                                              "curso": "Curso Python", "comoConheceu": "Instagram"})
+    assert status == 201
+    docs = emf()
+
+    rota = [d for d in docs if "Latencia" in d]
+    assert len(rota) == 1
+    rota = rota[0]
+    namespace, dimensoes, unidades = _metricas(rota)
+    assert namespace == metricas.NAMESPACE
+    assert dimensoes == [["Rota"], ["Rota", "Classe"]]
+    assert unidades == {"Requisicoes": "Count", "Latencia": "Milliseconds", "Erros": "Count"}
+    assert (rota["Rota"], rota["Classe"], rota["Requisicoes"], rota["Erros"]) == ("POST /lista-espera", "2xx", 1, 0)
+    assert rota["Latencia"] > 0
+
+    dependencias = {(d["Dependencia"], d["Operacao"]): d for d in docs if "LatenciaDependencia" in d}
+    assert ("ListaDeEspera", "put_item") in dependencias
+    assert {dep for dep, _ in dependencias} >= {"ListaDeEspera", "SES"}
+    for (dependencia, operacao), d in dependencias.items():
+        namespace, dimensoes, unidades = _metricas(d)
+        assert namespace == metricas.NAMESPACE
+        assert dimensoes == [["Dependencia"], ["Dependencia", "Operacao"], ["Rota", "Dependencia"]]
+        assert unidades["LatenciaDependencia"] == "Milliseconds"
+        assert d["Rota"] == "POST /lista-espera"
+        # um valor por chamada, todos dentro da latência da rota
+        assert d["LatenciaDependencia"] and all(0 < ms <= rota["Latencia"] for ms in d["LatenciaDependencia"])
+        assert d["ErrosDependencia"] == 0
+    assert len(dependencias[("ListaDeEspera", "put_item")]["LatenciaDependencia"]) == 1
+
+
+def test_emf_conta_erro_de_dependencia(handler, api, emf, monkeypatch):
+    def falha(**kwargs):
+        from botocore.exceptions import ClientError
+        raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem")
+    monkeypatch.setattr(handler.table_lista_espera._alvo, "put_item", falha)
+    handler.table_cursos.put_item(Item={"id": "c1", "title": "Curso Python", "price": "R$500,00", "ativo": True})
+    status, _ = api("POST", "/lista-espera", {"nome": "Maria", "email": "maria@exemplo.com", "telefone": "11999999999",
+                                              "curso": "Curso Python", "comoConheceu": "Instagram"})
+    assert status == 500
+    docs = emf()
+    (rota,) = [d for d in docs if "Latencia" in d]
+    assert (rota["Classe"], rota["Erros"]) == ("5xx", 1)
+    (dep,) = [d for d in docs if d.get("Operacao") == "put_item" and d["Dependencia"] == "ListaDeEspera"]
+    assert dep["ErrosDependencia"] == 1
+    assert dep["ClassesErro"] == ["ProvisionedThroughputExceededException"]
+
+
+def test_sem_emf_nao_emite(handler, api, monkeypatch):
+    saida = _Saida()
+    monkeypatch.setattr(handler.logs, "sys", types.SimpleNamespace(stdout=saida))
+    assert api("GET", "/cursos")[0] == 200
+    assert "_aws" not in "".join(saida.escritas)
@@ -0,0 +1,112 @@
+import json
+import uuid
+
+import pytest
+from botocore.exceptions import ClientError
+
+CURSO = "Curso Python"
+
+
+@pytest.fixture
+def ses_enviados(handler, monkeypatch):
+    enviados = []
+    original = handler.ses.send_email
+
+    def send_email(**kwargs):
+        enviados.append(kwargs["Destination"]["ToAddresses"][0])
+        return original(**kwargs)
+    monkeypatch.setattr(handler.ses, "send_email", send_email)
+    monkeypatch.setattr(handler, "SES_MAX_ENVIOS_POR_SEGUNDO", 1000)
+    return enviados
+
+
+@pytest.fixture
+def fila(handler, aws, monkeypatch):
+    sqs = aws.client("sqs")
+    url = sqs.create_queue(QueueName=f"outbox-{uuid.uuid4().hex}")["QueueUrl"]
+    monkeypatch.setattr(handler, "EMAIL_OUTBOX_QUEUE_URL", url)
+
+    def receber():
+        msgs = []
+        while True:
+            resp = sqs.receive_message(QueueUrl=url, MaxNumberOfMessages=10)
+            if not resp.get("Messages"):
+                return msgs
+            msgs += resp["Messages"]
+            sqs.delete_message_batch(QueueUrl=url, Entries=[
+                {"Id": str(n), "ReceiptHandle": m["ReceiptHandle"]} for n, m in enumerate(resp["Messages"])])
+    return receber
+
+
+def _records(msgs):
+    return {"Records": [{"messageId": m["MessageId"], "body": m["Body"]} for m in msgs]}
+
+
+def test_inscricao_enfileira_em_vez_de_chamar_o_ses(handler, api, fila, ses_enviados):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": "R$500,00", "ativo": True})
+    status, _ = api("POST", "/inscricao", {"cpf": "52998224725", "curso": CURSO, "nomeCompleto": "Aluno",
+                                           "email": "aluno@exemplo.com"})
+    assert status == 201
+    assert ses_enviados == []
+
+    msgs = fila()
+    assert sorted(json.loads(m["Body"])["template"] for m in msgs) == ["inscricao_admin", "inscricao_aluno"]
+    assert handler.processar_outbox_emails(_records(msgs), None) == {"batchItemFailures": []}
+    assert sorted(ses_enviados) == sorted(["aluno@exemplo.com", handler.ADMIN_EMAIL])
+
+
+def test_consumidor_devolve_so_as_falhas_temporarias(handler, ses_enviados, monkeypatch):
+    def admin_clube(item):
+        if item.get("falha") == "throttling":
+            raise ClientError({"Error": {"Code": "Throttling"}}, "SendEmail")
+        if item.get("falha") == "permanente":
+            raise ClientError({"Error": {"Code": "MessageRejected"}}, "SendEmail")
+    monkeypatch.setitem(handler.EMAIL_TEMPLATES, "clube_admin", admin_clube)
+    monkeypatch.setattr(handler, "SES_MAX_TENTATIVAS", 1)
+    records = [
+        {"messageId": "ok", "body": json.dumps({"template": "clube_admin", "item": {}})},
+        {"messageId": "throttling", "body": json.dumps({"template": "clube_admin", "item": {"falha": "throttling"}})},
+        {"messageId": "permanente", "body": json.dumps({"template": "clube_admin", "item": {"falha": "permanente"}})},
+        {"messageId": "template", "body": json.dumps({"template": "nao-existe", "item": {}})},
+        {"messageId": "json", "body": "{"},
+    ]
+    assert handler.processar_outbox_emails({"Records": records}, None) == {
+        "batchItemFailures": [{"itemIdentifier": "throttling"}]}
+    falhos = {it["id"] for it in handler.table_emails_falhos.scan()["Items"]}
+    assert falhos == {"permanente", "template", "json"}
+
+
+def test_falha_sem_registro_volta_para_a_fila(handler, monkeypatch):
+    def put_item(**kwargs):
+        raise ClientError({"Error": {"Code": "InternalServerError"}}, "PutItem")
+    monkeypatch.setattr(handler.table_emails_falhos, "put_item", put_item)
+    records = [{"messageId": "template", "body": json.dumps({"template": "nao-existe", "item": {}})}]
+    assert handler.processar_outbox_emails({"Records": records}, None) == {
+        "batchItemFailures": [{"itemIdentifier": "template"}]}
+
+
+def test_fila_inacessivel_envia_poucos_na_hora_e_registra_o_resto(handler, fila, ses_enviados, monkeypatch):
+    monkeypatch.setattr(handler, "EMAIL_OUTBOX_QUEUE_URL", handler.EMAIL_OUTBOX_QUEUE_URL + "-nao-existe")
+    chamadas_sqs = []
+    send_message_batch = handler.sqs.send_message_batch
+    monkeypatch.setattr(handler.sqs, "send_message_batch",
+                        lambda **kw: chamadas_sqs.append(1) or send_message_batch(**kw))
+    jobs = [("clube_boas_vindas", {"nome": f"Aluno {i}", "email": f"aluno{i}@exemplo.com"}) for i in range(200)]
+
+    handler.enfileirar_emails(*jobs)
+    # o primeiro lote falha e os outros nem tentam o SQS
+    assert len(chamadas_sqs) == 1
+    assert len(ses_enviados) == handler.EMAIL_ENVIO_DIRETO_MAX
+    falhos = handler.table_emails_falhos.scan()["Items"]
+    assert len(falhos) == 200 - handler.EMAIL_ENVIO_DIRETO_MAX
+
+    # o registro tem o mesmo corpo da mensagem do outbox: dá para reprocessar pelo consumidor
+    records = [{"messageId": it["id"], "body": it["body"]} for it in falhos]
+    assert handler.processar_outbox_emails({"Records": records}, None) == {"batchItemFailures": []}
+    assert sorted(ses_enviados) == sorted(f"aluno{i}@exemplo.com" for i in range(200))
+
+
+def test_sem_fila_configurada_envia_na_hora(handler, ses_enviados, monkeypatch):
+    monkeypatch.setattr(handler, "EMAIL_OUTBOX_QUEUE_URL", None)
+    handler.enfileirar_emails(("clube_boas_vindas", {"nome": "Maria", "email": "maria@exemplo.com"}))
+    assert ses_enviados == ["maria@exemplo.com"]
@@ -0,0 +1,135 @@
+"""
+Equivalência de precos.py com as regras que ficavam espalhadas no handler
+(valores_inscricao, calcular_pagamento_info e criar_paymentlink_asaas), para
+todos os cursos e cupons da tabela abaixo.
+"""
+from decimal import Decimal
+
+import pytest
+
+import precos
+
+FULLSTACK = precos.FULLSTACK_NOME_CURSO
+CURSOS = [
+    (FULLSTACK, "R$1.499,99"),
+    (f"{FULLSTACK} - Noturno", "R$ 2.000,00"),
+    (FULLSTACK + " Intensivo", "R$149,99"),
+    ("Curso Python", "R$500,00"),
+    ("Curso Dados", "R$1.234,567"),
+    ("Curso Git", "R$0,50"),
+    ("Curso IA", "R$120"),
+]
+DESCONTOS = [None, "", "10%", "12.5%", "33%", "100%", "R$100", "R$ 49,90", "R$100.50", "R$2000", "abc", "R$"]
+
+
+def _antigo_valores_inscricao(price, desconto):
+    valor_original = Decimal(price.replace("R$", "").replace(".", "").replace(",", ".").strip())
+    desconto_valor = Decimal("0")
+    if desconto:
+        try:
+            if desconto.endswith("%"):
+                pct = Decimal(desconto.rstrip("%")) / Decimal("100")
+                desconto_valor = (valor_original * pct).quantize(Decimal("0.01"))
+            else:
+                val = desconto.replace("R$", "").replace(",", ".").strip()
+                desconto_valor = Decimal(val).quantize(Decimal("0.01"))
+        except Exception:
+            pass
+    return valor_original, (valor_original - desconto_valor).quantize(Decimal("0.01"))
+
+
+def _antigo_pagamento_info(titulo, base):
+    is_fullstack = FULLSTACK in titulo
+    desconto_pix = Decimal("150.00") if is_fullstack else Decimal("0.00")
+    pix_valor = (base - desconto_pix).quantize(Decimal("0.01"))
+    if pix_valor <= Decimal("0.00"):
+        pix_valor = Decimal("0.01")
+    cartao_valor = (base * Decimal("1.08")).quantize(Decimal("0.01"))
+    cartao_12x = (cartao_valor / Decimal("12")).quantize(Decimal("0.01"))
+    return {
+        "baseFmt": precos.format_brl(base),
+        "pix": pix_valor, "pixFmt": precos.format_brl(pix_valor),
+        "descontoPix": desconto_pix,
+        "descontoPixFmt": precos.format_brl(desconto_pix) if desconto_pix > 0 else "",
+        "cartao": cartao_valor, "cartaoFmt": precos.format_brl(cartao_valor),
+        "cartaoParcela": cartao_12x, "cartaoParcelaFmt": precos.format_brl(cartao_12x),
+        "mensalidades": 6 if is_fullstack else 0,
+    }
+
+
+def _antigo_paymentlink(titulo, valor, metodo):
+    valor_dec = Decimal(str(valor)).quantize(Decimal("0.01"))
+    if metodo == "PIX" and FULLSTACK in titulo:
+        valor_dec = (valor_dec - Decimal("150.00")).quantize(Decimal("0.01"))
+        if valor_dec <= Decimal("0.00"):
+            valor_dec = Decimal("0.01")
+    if metodo == "PIX":
+        return float(valor_dec)
+    return round(float(valor_dec) * 1.08, 2)
+
+
+def _novo_paymentlink(titulo, valor, metodo):
+    # mesma escolha de criar_paymentlink_asaas
+    valores = precos.valores_metodos(valor, titulo)
+    if metodo == "PIX":
+        return float(valores["pix"] if valores["descontoPix"] > 0 else valores["base"])
+    return float(valores["cartao"])
+
+
+@pytest.fixture(autouse=True)
+def tabelas_limpas():
+    precos._cursos.clear()
+    precos._descontos.clear()
+    precos._metodos.clear()
+    precos.atualizar_cursos([{"title": t, "price": p} for t, p in CURSOS])
+    for titulo, _ in CURSOS:
+        precos.registrar_cupons(titulo, DESCONTOS)
+
+
+@pytest.mark.parametrize("titulo,price", CURSOS)
+@pytest.mark.parametrize("desconto", DESCONTOS)
+def test_mesmos_valores_que_as_regras_antigas(titulo, price, desconto):
+    curso_item = {"title": titulo, "price": price}
+    original, com_desconto = precos.valores_com_cupom(titulo, curso_item, desconto)
+    assert (original, com_desconto) == _antigo_valores_inscricao(price, desconto)
+
+    valores = precos.valores_metodos(com_desconto, titulo)
+    # única diferença intencional: o zero negativo (100% sobre centavos fracionários) saía 'R$ -0,00'
+    esperado = {k: v.replace("-0,00", "0,00") if isinstance(v, str) else v
+                for k, v in _antigo_pagamento_info(titulo, com_desconto).items()}
+    assert {k: valores[k] for k in esperado} == esperado
+    for metodo in ("PIX", "CARTAO"):
+        assert _novo_paymentlink(titulo, com_desconto, metodo) == _antigo_paymentlink(titulo, com_desconto, metodo)
+
+
+def test_tabela_pronta_na_carga_sem_calcular_na_leitura(monkeypatch):
+    for titulo, _ in CURSOS:
+        cupons = precos._cursos[titulo]["cupons"]
+        assert set(cupons) == {d for d in DESCONTOS if isinstance(d, str)} | {None}
+
+    def recalculo(*args):
+        raise AssertionError("valor calculado na leitura")
+    monkeypatch.setattr(precos, "aplicar_desconto", recalculo)
+    for titulo, price in CURSOS:
+        for desconto in DESCONTOS:
+            precos.valores_com_cupom(titulo, {"title": titulo, "price": price}, desconto)
+
+
+def test_price_alterado_recalcula_os_cupons_registrados():
+    precos.atualizar_cursos([{"title": t, "price": "R$1.000,00" if t == "Curso Python" else p} for t, p in CURSOS])
+    cupons = precos._cursos["Curso Python"]["cupons"]
+    assert cupons["10%"] == Decimal("900.00")
+    assert cupons["R$100"] == Decimal("900.00")
+    assert cupons[None] == Decimal("1000.00")
+
+
+def test_curso_removido_sai_da_tabela():
+    precos.atualizar_cursos([{"title": t, "price": p} for t, p in CURSOS if t != "Curso Git"])
+    assert "Curso Git" not in precos._cursos
+    assert "Curso Git" not in precos._descontos
+
+
+def test_desconto_total_nao_gera_zero_negativo():
+    _, valor = precos.valores_com_cupom("Curso Dados", {"title": "Curso Dados", "price": "R$1.234,567"}, "100%")
+    assert str(valor) == "0.00"
+    assert precos.valores_metodos(Decimal("-0.00"), "Curso Dados")["baseFmt"] == "R$ 0,00"
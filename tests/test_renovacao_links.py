@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def renovacao(handler, monkeypatch):
+    enfileiradas, criados = [], []
+    monkeypatch.setattr(handler, "enfileirar_paymentlinks", lambda *ids: enfileiradas.extend(ids))
+
+    def scan(**kwargs):
+        raise AssertionError("scan em renovar_paymentlinks")
+    monkeypatch.setattr(handler.table_inscricoes, "scan", scan)
+
+    def gerar(insc, pm, prazo=None):
+        criados.append((insc["id"], pm))
+        return _link(pm, handler.PAYMENTLINK_VALIDADE_DIAS[pm] * 24, handler)
+    monkeypatch.setattr(handler, "gerar_paymentlink", gerar)
+    return enfileiradas, criados
+
+
+def _agora(handler, horas=0):
+    return (datetime.now(handler.TZ_BRASILIA) + timedelta(hours=horas)).isoformat()
+
+
+def _link(pm, horas, handler):
+    return {"url": f"https://asaas/{pm}", "paymentMethod": pm, "expiraEm": _agora(handler, horas)}
+
+
+def _inscricao(handler, iid, horas_links, dias_inscricao=1, status=None):
+    links = {pm: _link(pm, horas_links, handler) for pm in handler.PAYMENTLINK_METODOS}
+    item = {
+        "id": iid, "curso": "Curso Python", "nomeCompleto": "Aluno", "valorCurso": 500,
+        "dataInscricao": _agora(handler, -24 * dias_inscricao), "paymentLinks": links,
+        "renovacaoLinks": handler.RENOVACAO_PENDENTE, "linksVencemEm": handler.vencimento_links(links)
+    }
+    if status:
+        item["asaasPaymentStatus"] = status
+    handler.table_inscricoes.put_item(Item=item)
+
+
+def _no_indice(handler, iid):
+    return "renovacaoLinks" in handler.table_inscricoes.get_item(Key={"id": iid})["Item"]
+
+
+def test_renovar_consulta_so_links_perto_de_vencer(handler, renovacao):
+    enfileiradas, _ = renovacao
+    _inscricao(handler, "vencendo", horas_links=2)
+    _inscricao(handler, "em-dia", horas_links=72)
+    _inscricao(handler, "antiga", horas_links=2, dias_inscricao=handler.PAYMENTLINK_RENOVAR_MAX_DIAS + 1)
+
+    assert handler.renovar_paymentlinks({}, None) == {"enfileiradas": 1, "retiradas": 1}
+    assert enfileiradas == ["vencendo"]
+    assert not _no_indice(handler, "antiga")
+
+
+def test_pagamento_confirmado_sai_do_indice(handler, api, renovacao):
+    enfileiradas, _ = renovacao
+    _inscricao(handler, "paga", horas_links=2)
+    status, _ = api("POST", "/asaas/webhook", {
+        "id": "evt_1", "event": "PAYMENT_RECEIVED", "dateCreated": "2025-01-01 10:00:00",
+        "payment": {"id": "pay_1", "externalReference": "paga", "status": "RECEIVED", "value": 500}
+    })
+    assert status == 200
+    assert not _no_indice(handler, "paga")
+    handler.renovar_paymentlinks({}, None)
+    assert enfileiradas == []
+
+
+def test_worker_nao_renova_pagamento_fechado(handler, renovacao):
+    _, criados = renovacao
+    # status gravado sem passar pelo webhook (ex.: inscrição anterior ao índice)
+    _inscricao(handler, "estornada", horas_links=2, status="REFUNDED")
+    resp = handler.processar_fila_paymentlinks(
+        {"Records": [{"messageId": "m1", "body": json.dumps({"inscricaoId": "estornada"})}]}, None)
+    assert resp == {"batchItemFailures": []}
+    assert criados == []
+    assert not _no_indice(handler, "estornada")
+
+
+def test_worker_renova_e_regrava_vencimento(handler, renovacao):
+    _, criados = renovacao
+    _inscricao(handler, "vencendo", horas_links=2)
+    handler.processar_fila_paymentlinks(
+        {"Records": [{"messageId": "m1", "body": json.dumps({"inscricaoId": "vencendo"})}]}, None)
+    assert sorted(criados) == [("vencendo", "CARTAO"), ("vencendo", "PIX")]
+    insc = handler.table_inscricoes.get_item(Key={"id": "vencendo"})["Item"]
+    # o vencimento no índice passa a ser o do link PIX novo (2 dias), o mais próximo
+    assert insc["linksVencemEm"] > _agora(handler, 47)
+
+
+def test_inscricao_nova_entra_no_indice_ja_vencida(handler, api):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": "Curso Python", "price": "R$500,00", "ativo": True})
+    status, corpo = api("POST", "/inscricao", {"cpf": "52998224725", "curso": "Curso Python",
+                                               "nomeCompleto": "Aluno", "email": "aluno@exemplo.com"})
+    assert status == 201
+    insc = handler.table_inscricoes.get_item(Key={"id": corpo["inscricao_id"]})["Item"]
+    assert insc["renovacaoLinks"] == handler.RENOVACAO_PENDENTE
+    assert insc["linksVencemEm"] == insc["dataInscricao"]
+
+
+def test_backfill_indexa_so_pagamentos_em_aberto(handler):
+    for iid, status in (("aberta", None), ("vencida", "OVERDUE"), ("paga", "CONFIRMED")):
+        item = {"id": iid, "curso": "Curso Python", "dataInscricao": _agora(handler, -24)}
+        if status:
+            item["asaasPaymentStatus"] = status
+        handler.table_inscricoes.put_item(Item=item)
+
+    assert handler.migrar_renovacao_paymentlinks({}, None) == {"concluido": True, "indexadas": 2}
+    assert [iid for iid in ("aberta", "vencida", "paga") if _no_indice(handler, iid)] == ["aberta", "vencida"]
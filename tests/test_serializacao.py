@@ -0,0 +1,34 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.mark.parametrize("valor, texto", [
+    (Decimal("1499.99"), "1499.99"),
+    (Decimal("0.1") * 3, "0.3"),
+    (Decimal("1050.00"), "1050"),
+    (Decimal("1E+2"), "100"),
+    (Decimal("-12.5"), "-12.5"),
+    (Decimal(2 ** 60), str(2 ** 60)),
+    (Decimal("0"), "0"),
+])
+def test_decimal_sai_como_numero_exato(handler, valor, texto):
+    assert handler.serializar(valor) == texto
+
+
+@pytest.mark.parametrize("valor", [
+    Decimal("1.00000000000000000001"),
+    Decimal("12345678901234567.89"),
+    Decimal("0.1234567890123456789012345678901234567"),
+    Decimal("-98765432109876543210.5"),
+    Decimal("1E-30"),
+    Decimal("9.99999999999999999999E+40"),
+])
+def test_decimal_com_muitos_digitos_volta_exato(handler, valor):
+    corpo = handler.serializar({"v": valor, "lista": [valor, Decimal("1.5"), "ç"], "n": None})
+    lido = json.loads(corpo, parse_float=Decimal, parse_int=Decimal)
+    assert lido["v"] == valor and lido["lista"][0] == valor
+    assert lido["lista"][1:] == [Decimal("1.5"), "ç"] and lido["n"] is None
+    # continua número JSON, nunca string
+    assert isinstance(json.loads(corpo)["v"], (int, float))
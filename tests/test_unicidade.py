@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+CURSO = "Curso Python"
+
+
+def _semear_curso(handler):
+    handler.table_cursos.put_item(Item={"id": "c1", "title": CURSO, "price": "R$500,00", "ativo": True})
+
+
+def _aluno(cpf):
+    return {"cpf": cpf, "curso": CURSO, "nomeCompleto": "Aluno Teste", "email": "aluno@exemplo.com"}
+
+
+def test_mesmo_cpf_com_e_sem_pontuacao_e_duplicado(handler, api):
+    _semear_curso(handler)
+    status, _ = api("POST", "/inscricao", _aluno("52998224725"))
+    assert status == 201
+    status, corpo = api("POST", "/inscricao", _aluno("529.982.247-25"))
+    assert status == 409, corpo
+    assert handler.table_inscricoes.scan()["Count"] == 1
+
+
+def test_guarda_usa_cpf_so_com_digitos(handler, api):
+    _semear_curso(handler)
+    api("POST", "/inscricao", _aluno("529.982.247-25"))
+    chaves = [it["chave"] for it in handler.table_unicidade.scan()["Items"]]
+    assert chaves == [f"52998224725#{CURSO}"]
+    # a transação também barra o segundo formato quando a checagem prévia não vê o guarda
+    item = {"id": "outra", "cpf": "52998224725", "curso": CURSO, "dataInscricao": "2025-01-01T00:00:00-03:00"}
+    assert handler.gravar_inscricao_unica(item) is False
+
+
+def test_lote_trata_formatos_do_mesmo_cpf_como_repetidos(handler, api):
+    _semear_curso(handler)
+    status, corpo = api("POST", "/inscricoes/batch", {"curso": CURSO, "alunos": [
+        {k: v for k, v in _aluno("52998224725").items() if k != "curso"},
+        {k: v for k, v in _aluno("529.982.247-25").items() if k != "curso"},
+    ]})
+    assert status == 200
+    assert corpo["resumo"] == {"criada": 1, "duplicada": 1}
+
+
+def test_backfill_troca_guarda_legado_pela_chave_com_digitos(handler):
+    handler.table_inscricoes.put_item(Item={"id": "i1", "cpf": "529.982.247-25", "curso": CURSO})
+    handler.table_inscricoes.put_item(Item={"id": "i2", "cpf": "52998224725", "curso": CURSO})
+    handler.table_unicidade.put_item(Item={"chave": f"529.982.247-25#{CURSO}", "inscricaoId": "i1"})
+
+    resultado = handler.migrar_unicidade_inscricoes({}, None)
+
+    assert resultado["duplicados"] == 1
+    guardas = handler.table_unicidade.scan()["Items"]
+    assert [g["chave"] for g in guardas] == [f"52998224725#{CURSO}"]
+    assert resultado["duplicadosIds"] == [i for i in ("i1", "i2") if i != guardas[0]["inscricaoId"]]
+    assert resultado["cpfsNormalizados"] == 1
+    assert {it["cpf"] for it in handler.table_inscricoes.scan()["Items"]} == {"52998224725"}
+
+
+def test_inscricao_grava_cpf_so_com_digitos(handler, api):
+    _semear_curso(handler)
+    status, corpo = api("POST", "/inscricao", _aluno(" 529.982.247-25 "))
+    assert status == 201
+    item = handler.table_inscricoes.get_item(Key={"id": corpo["inscricao_id"]})["Item"]
+    assert item["cpf"] == "52998224725"
+
+
+def test_lote_nao_duplica_inscricao_gravada_durante_o_lote(handler, api, monkeypatch):
+    _semear_curso(handler)
+    checagem = handler.buscar_unicidades_existentes
+
+    def com_post_concorrente(chaves):
+        existentes = checagem(chaves)
+        # o POST individual grava entre a checagem do lote e a escrita
+        assert api("POST", "/inscricao", _aluno("52998224725"))[0] == 201
+        return existentes
+    monkeypatch.setattr(handler, "buscar_unicidades_existentes", com_post_concorrente)
+
+    alunos = [{k: v for k, v in _aluno(cpf).items() if k != "curso"} for cpf in ("529.982.247-25", "11144477735")]
+    status, corpo = api("POST", "/inscricoes/batch", {"curso": CURSO, "alunos": alunos})
+
+    assert status == 200
+    assert [r["status"] for r in corpo["resultados"]] == ["duplicada", "criada"]
+    assert handler.table_inscricoes.scan()["Count"] == 2
+
+
+@pytest.fixture
+def chamadas_dynamodb(handler):
+    """Operações (GetItem, Scan...) que o handler manda ao DynamoDB, pelo evento before-call do botocore."""
+    feitas = []
+    eventos = handler.dynamodb.meta.client.meta.events
+
+    def registrar(model, params, **kwargs):
+        feitas.append((model.name, json.loads(params["body"]).get("TableName")))
+    eventos.register("before-call.dynamodb", registrar, unique_id="teste-chamadas-dynamodb")
+    yield feitas
+    eventos.unregister("before-call.dynamodb", unique_id="teste-chamadas-dynamodb")
+
+
+def _cpf(n):
+    d = [int(c) for c in f"{n:09d}"]
+    dv1 = sum(x * (10 - i) for i, x in enumerate(d)) * 10 % 11 % 10
+    dv2 = (sum(x * (11 - i) for i, x in enumerate(d)) + dv1 * 2) * 10 % 11 % 10
+    return f"{n:09d}{dv1}{dv2}"
+
+
+def _semear_muitas(handler, n):
+    """n inscrições (e guardas) direto no backend do moto: pelo boto3 seriam minutos de batch_write."""
+    from moto.core import DEFAULT_ACCOUNT_ID
+    from moto.dynamodb.models import dynamodb_backends
+    backend = dynamodb_backends[DEFAULT_ACCOUNT_ID][handler.dynamodb.meta.client.meta.region_name]
+    inscricoes, unicidade = backend.get_table("Inscricoes"), backend.get_table("InscricoesUnicas")
+    for i in range(n):
+        cpf = _cpf(100_000_000 + i)
+        inscricoes.put_item({"id": {"S": f"i{i}"}, "cpf": {"S": cpf}, "curso": {"S": CURSO},
+                             "nomeCompleto": {"S": "Aluno"}, "dataInscricao": {"S": "2025-01-01T00:00:00-03:00"}})
+        unicidade.put_item({"chave": {"S": f"{cpf}#{CURSO}"}, "inscricaoId": {"S": f"i{i}"}})
+
+
+def test_checagem_de_duplicidade_nao_depende_do_tamanho_da_tabela(handler, api, chamadas_dynamodb):
+    _semear_curso(handler)
+    handler.carregar_catalogo()
+
+    def inscrever(cpf):
+        chamadas_dynamodb.clear()
+        status, _ = api("POST", "/inscricao", _aluno(cpf))
+        return status, list(chamadas_dynamodb)
+
+    status, nova_vazia = inscrever("52998224725")
+    assert status == 201
+    status, duplicada_vazia = inscrever("52998224725")
+    assert status == 409
+
+    _semear_muitas(handler, 100_000)
+    assert handler.table_unicidade.get_item(Key={"chave": f"{_cpf(100_099_999)}#{CURSO}"})["Item"]
+
+    status, nova_cheia = inscrever("11144477735")
+    assert status == 201
+    status, duplicada_cheia = inscrever(_cpf(100_012_345))
+    assert status == 409
+
+    # mesmas chamadas com a tabela vazia e com 100 mil inscrições
+    assert nova_cheia == nova_vazia
+    assert duplicada_cheia == duplicada_vazia
+    assert duplicada_cheia == [("GetItem", "InscricoesUnicas")]
+    assert not [op for op, _ in nova_cheia + duplicada_cheia if op in ("Scan", "Query")]
@@ -0,0 +1,16 @@
+import pytest
+
+import validacao
+
+validar = validacao.compilar({"cpf": validacao.cpf(obrigatorio=True)})
+
+
+@pytest.mark.parametrize("enviado", ["529.982.247-25", "52998224725", " 529982247-25 ", "529.982.24725"])
+def test_cpf_valido_sai_so_com_digitos(enviado):
+    assert validar({"cpf": enviado}) == ({"cpf": "52998224725"}, {})
+
+
+@pytest.mark.parametrize("enviado", ["529.982.247-26", "111.111.111-11", "5299822472", "529 982 247 25", 52998224725])
+def test_cpf_invalido(enviado):
+    dados, erros = validar({"cpf": enviado})
+    assert "cpf" in erros and "cpf" not in dados
@@ -0,0 +1,144 @@
+"""
+Validação declarativa dos bodies das rotas POST.
+
+Cada rota declara um schema {campo: regra} com as regras abaixo (texto, email,
+cpf, booleano, lista) e compilar() monta, uma vez no import, uma função
+validar(body) -> (dados, erros):
+  - dados: todos os campos do schema já normalizados (strings sem espaços nas
+    pontas, maiúsculas onde pedido, CPF só com dígitos, padrão nos ausentes)
+  - erros: {campo: mensagem} com todos os problemas de uma vez ({} se válido)
+
+Cada regra é uma tupla (obrigatorio, padrao, checar), onde checar(valor) ->
+(valor_normalizado, erro | None); vazio ("", None, []) conta como ausente.
+"""
+import re
+
+_RE_EMAIL = re.compile(
+    r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+    r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+$"
+)
+_RE_CPF = re.compile(r"^\d{3}\.?\d{3}\.?\d{3}-?\d{2}$")
+EMAIL_MAX = 254
+
+
+def texto(obrigatorio=False, maximo=200, minimo=0, maiusculas=False, opcoes=None, padrao=""):
+    """String (sem espaços nas pontas) de minimo..maximo caracteres; opcoes restringe a um enum."""
+    opcoes = frozenset(opcoes) if opcoes else None
+    lista_opcoes = ", ".join(sorted(opcoes)) if opcoes else ""
+
+    def checar(valor):
+        if not isinstance(valor, str):
+            return None, "Deve ser texto."
+        valor = valor.strip()
+        if not valor:
+            return "", None
+        if maiusculas:
+            valor = valor.upper()
+        if len(valor) > maximo:
+            return None, f"Máximo de {maximo} caracteres."
+        if len(valor) < minimo:
+            return None, f"Mínimo de {minimo} caracteres."
+        if opcoes is not None and valor not in opcoes:
+            return None, f"Valor deve ser um de: {lista_opcoes}."
+        return valor, None
+    return obrigatorio, padrao, checar
+
+
+def email(obrigatorio=False):
+    """E-mail com sintaxe válida (até 254 caracteres), mantido como enviado."""
+    def checar(valor):
+        if not isinstance(valor, str):
+            return None, "Deve ser texto."
+        valor = valor.strip()
+        if not valor:
+            return "", None
+        if len(valor) > EMAIL_MAX or not _RE_EMAIL.match(valor):
+            return None, "E-mail inválido."
+        return valor, None
+    return obrigatorio, "", checar
+
+
+def cpf(obrigatorio=False):
+    """CPF com ou sem pontuação (000.000.000-00) e dígitos verificadores corretos, normalizado para só os 11 dígitos."""
+    def checar(valor):
+        if not isinstance(valor, str):
+            return None, "Deve ser texto."
+        valor = valor.strip()
+        if not valor:
+            return "", None
+        digitos = valor.replace(".", "").replace("-", "")
+        if not _RE_CPF.match(valor) or not cpf_valido(digitos):
+            return None, "CPF inválido."
+        return digitos, None
+    return obrigatorio, "", checar
+
+
+def cpf_valido(digitos):
+    """Confere os dois dígitos verificadores de um CPF com 11 dígitos."""
+    if len(digitos) != 11 or digitos == digitos[0] * 11:
+        return False
+    d = [ord(c) - 48 for c in digitos]
+    soma1 = soma2 = 0
+    for i in range(9):
+        soma1 += d[i] * (10 - i)
+        soma2 += d[i] * (11 - i)
+    dv1 = soma1 * 10 % 11 % 10
+    dv2 = (soma2 + dv1 * 2) * 10 % 11 % 10
+    return dv1 == d[9] and dv2 == d[10]
+
+
+def booleano(obrigatorio=False, padrao=False):
+    """Valor convertido com bool(); obrigatorio exige verdadeiro (ex.: aceite de contato)."""
+    def checar(valor):
+        valor = bool(valor)
+        return (None if obrigatorio and not valor else valor), None
+    return obrigatorio, padrao, checar
+
+
+def lista(obrigatorio=False, max_itens=100, itens=None):
+    """Lista de até max_itens elementos; itens (regra) valida cada elemento."""
+    checar_item = itens[2] if itens else None
+
+    def checar(valor):
+        if not isinstance(valor, list):
+            return None, "Deve ser uma lista."
+        if len(valor) > max_itens:
+            return None, f"Máximo de {max_itens} itens."
+        if checar_item is None:
+            return valor, None
+        normalizados = []
+        for i, item in enumerate(valor):
+            item, erro = checar_item(item)
+            if erro:
+                return None, f"Item {i}: {erro}"
+            normalizados.append(item)
+        return normalizados, None
+    return obrigatorio, [], checar
+
+
+def compilar(schema):
+    """Transforma {campo: regra} em validar(body) -> (dados, erros)."""
+    campos = tuple((nome, obrigatorio, padrao, checar) for nome, (obrigatorio, padrao, checar) in schema.items())
+
+    def validar(body):
+        dados, erros = {}, {}
+        for nome, obrigatorio, padrao, checar in campos:
+            valor = body.get(nome)
+            if valor is not None:
+                valor, erro = checar(valor)
+                if erro:
+                    erros[nome] = erro
+                    continue
+            if valor is None or valor == "" or valor == []:
+                if obrigatorio:
+                    erros[nome] = "Campo obrigatório."
+                    continue
+                valor = list(padrao) if isinstance(padrao, list) else padrao
+            dados[nome] = valor
+        return dados, erros
+    return validar
+
+
+def mensagem_erros(erros):
+    """Resumo legível para o campo 'error' das respostas 400."""
+    return f"Campos inválidos: {', '.join(erros)}."